@@ -0,0 +1,84 @@
+"""Bulk stock adjustments: adjust_stock_bulk vs one adjust_stock call per line,
+plus the start-up time of the headless CLI.
+
+Run from the project root:
+
+    python benchmarks/bench_bulk.py 100000 300000
+
+Both paths save once at the end (autosave is flushed inside the timing),
+so the difference is the per-adjustment overhead.
+"""
+import os
+import random
+import subprocess
+import sys
+import tempfile
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from benchmarks.catalog import write_catalog  # noqa: E402
+from inventory import inventory as inv  # noqa: E402
+from inventory.errors import NegativeStockError  # noqa: E402
+
+def _moves(n_lines: int, seed: int = 7) -> list:
+    rng = random.Random(seed)
+    skus = [p.sku for p in inv.list_products()]
+    # Mostly restocks so few lines are rejected for going negative
+    return [(rng.choice(skus), rng.randint(-2, 5)) for _ in range(n_lines)]
+
+def _per_call(moves: list) -> float:
+    pid_of = {p.sku: p.id for p in inv.list_products()}
+    start = time.perf_counter()
+    for sku, delta in moves:
+        try:
+            inv.adjust_stock(pid_of[sku], delta)
+        except (NegativeStockError, ValueError):
+            pass
+    inv.flush_autosave()
+    return time.perf_counter() - start
+
+def _bulk(moves: list) -> float:
+    start = time.perf_counter()
+    inv.adjust_stock_bulk(moves)
+    inv.flush_autosave()
+    return time.perf_counter() - start
+
+def _cli_startup(path: str, runs: int = 5) -> float:
+    times = []
+    for _ in range(runs):
+        start = time.perf_counter()
+        subprocess.run([sys.executable, "-m", "inventory", "--file", path, "stats"], cwd=ROOT, check=True,
+                       stdout=subprocess.DEVNULL)
+        times.append(time.perf_counter() - start)
+    bare = []
+    for _ in range(runs):
+        start = time.perf_counter()
+        subprocess.run([sys.executable, "-c", "pass"], check=True)
+        bare.append(time.perf_counter() - start)
+    return min(times), min(bare)
+
+def main(argv):
+    n = int(argv[0]) if argv else 100_000
+    n_lines = int(argv[1]) if len(argv) > 1 else 300_000
+    with tempfile.TemporaryDirectory() as tmp:
+        path = write_catalog(os.path.join(tmp, "products.csv"), n)
+        inv.enable_autosave(3600)
+        try:
+            inv.load_from(path)
+            moves = _moves(n_lines)
+            per_call = _per_call(moves)
+            inv.load_from(path)
+            bulk = _bulk(moves)
+        finally:
+            inv.disable_autosave()
+        print(f"{n} products, {n_lines} adjustments")
+        print(f"adjust_stock per call  {per_call:8.3f}s  {n_lines / per_call:>10,.0f}/s")
+        print(f"adjust_stock_bulk      {bulk:8.3f}s  {n_lines / bulk:>10,.0f}/s")
+        small = write_catalog(os.path.join(tmp, "small.csv"), 100)
+        cli, bare = _cli_startup(small)
+        print(f"python -m inventory stats (100 products): {cli * 1000:.0f}ms, bare interpreter {bare * 1000:.0f}ms")
+
+if __name__ == "__main__":
+    main(sys.argv[1:])
@@ -0,0 +1,65 @@
+"""Compare memory used by the product representations.
+
+Run from the project root:
+
+    python benchmarks/bench_memory.py 100000 1000000
+
+For each row count it builds the same synthetic catalog as plain dataclass
+instances (the old Product), slotted Product instances and a ColumnarStore
+with row views, and reports the tracemalloc peak.
+"""
+import os
+import sys
+import tracemalloc
+from dataclasses import dataclass
+from typing import Optional
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from inventory.columnar import ColumnarStore  # noqa: E402
+from inventory.models import Product  # noqa: E402
+
+@dataclass
+class DictProduct:
+    id: int
+    name: str
+    sku: str
+    price: float
+    stock: int
+    reorder_level: int
+    supplier: Optional[str] = None
+
+_SUPPLIERS = ["WireWorks", "Acme", "Globex", "Initech", "Umbrella", "Hooli", "Stark", "Wayne"]
+
+def _rows(n: int):
+    for i in range(n):
+        # Build fresh strings like the CSV reader would
+        yield (i + 1, f"Product {i}", f"SKU-{i:08d}", float(i % 1000) + 0.99, i % 500, 10, "".join(_SUPPLIERS[i % 8]))
+
+def _measure(build, n: int) -> int:
+    tracemalloc.start()
+    data = build(n)
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    del data
+    return peak
+
+def build_dataclass(n):
+    return [DictProduct(*r) for r in _rows(n)]
+
+def build_slots(n):
+    return [Product(*r) for r in _rows(n)]
+
+def build_columnar(n):
+    store = ColumnarStore()
+    return store, [store.append(*r) for r in _rows(n)]
+
+def main(argv):
+    sizes = [int(a) for a in argv] or [100_000, 1_000_000]
+    print(f"{'rows':>10} {'dataclass':>12} {'slots':>12} {'columnar':>12}")
+    for n in sizes:
+        results = [_measure(b, n) / 1e6 for b in (build_dataclass, build_slots, build_columnar)]
+        print(f"{n:>10} " + " ".join(f"{mb:>10.1f}MB" for mb in results))
+
+if __name__ == "__main__":
+    main(sys.argv[1:])
@@ -0,0 +1,103 @@
+"""Throughput and latency of POST /products/<id>/adjust on the HTTP service.
+
+Starts an in-process server on a temporary catalog (or targets a running one
+with --url) and drives it from many keep-alive connections:
+
+    python benchmarks/bench_server.py --clients 64 --requests 20000
+    python benchmarks/bench_server.py --url http://127.0.0.1:8765
+"""
+import argparse
+import asyncio
+import json
+import os
+import random
+import sys
+import tempfile
+import time
+from urllib.parse import urlsplit
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from inventory import inventory as inv  # noqa: E402
+from inventory.server import InventoryServer  # noqa: E402
+
+async def _request(reader, writer, method: str, path: str, payload=None):
+    body = b"" if payload is None else json.dumps(payload).encode("utf-8")
+    writer.write(f"{method} {path} HTTP/1.1\r\nHost: bench\r\nContent-Length: {len(body)}\r\n\r\n".encode("latin-1") + body)
+    await writer.drain()
+    status = int((await reader.readline()).split()[1])
+    length = 0
+    while True:
+        line = await reader.readline()
+        if line in (b"\r\n", b""):
+            break
+        name, _, value = line.decode("latin-1").partition(":")
+        if name.lower() == "content-length":
+            length = int(value)
+    data = await reader.readexactly(length) if length else b""
+    return status, data
+
+async def _client(host, port, pids, n, latencies, seed):
+    rng = random.Random(seed)
+    reader, writer = await asyncio.open_connection(host, port)
+    try:
+        for _ in range(n):
+            pid = rng.choice(pids)
+            start = time.perf_counter()
+            await _request(reader, writer, "POST", f"/products/{pid}/adjust", {"delta": rng.choice([1, 2, 3])})
+            latencies.append(time.perf_counter() - start)
+    finally:
+        writer.close()
+
+async def run_load(host: str, port: int, clients: int, requests: int, products: int):
+    reader, writer = await asyncio.open_connection(host, port)
+    _, data = await _request(reader, writer, "GET", f"/products?limit={products}")
+    writer.close()
+    pids = [p["id"] for p in json.loads(data)["products"]]
+    if not pids:
+        raise SystemExit("Target catalog is empty")
+    latencies: list = []
+    per_client = max(requests // clients, 1)
+    start = time.perf_counter()
+    await asyncio.gather(*(_client(host, port, pids, per_client, latencies, seed) for seed in range(clients)))
+    elapsed = time.perf_counter() - start
+    latencies.sort()
+    pct = lambda q: latencies[min(int(q * len(latencies)), len(latencies) - 1)] * 1000  # noqa: E731
+    print(f"{len(latencies)} adjustments from {clients} clients in {elapsed:.2f}s")
+    print(f"throughput {len(latencies) / elapsed:,.0f} req/s  p50 {pct(0.50):.2f} ms  p99 {pct(0.99):.2f} ms")
+
+async def _in_process(args):
+    server = InventoryServer()
+    await server.start("127.0.0.1", 0)
+    print(f"{server.batcher.window * 1000:.0f} ms batch window")
+    try:
+        await run_load("127.0.0.1", server.port, args.clients, args.requests, args.products)
+    finally:
+        await server.close()
+    print(f"{server.batcher.batches} batches")
+
+def main(argv):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--url", help="benchmark an already running server instead")
+    parser.add_argument("--clients", type=int, default=64)
+    parser.add_argument("--requests", type=int, default=20_000)
+    parser.add_argument("--products", type=int, default=1000)
+    args = parser.parse_args(argv)
+    if args.url:
+        url = urlsplit(args.url)
+        asyncio.run(run_load(url.hostname, url.port or 80, args.clients, args.requests, args.products))
+        return
+    with tempfile.TemporaryDirectory() as tmp:
+        inv.load_from(None)
+        inv.set_current_path(os.path.join(tmp, "products.csv"))
+        with inv.transaction():
+            for i in range(args.products):
+                inv.create_product(name=f"Bench {i}", sku=f"BEN-{i:06d}", stock=100)
+        inv.enable_autosave()
+        try:
+            asyncio.run(_in_process(args))
+        finally:
+            inv.disable_autosave()
+
+if __name__ == "__main__":
+    main(sys.argv[1:])
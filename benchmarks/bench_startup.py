@@ -0,0 +1,45 @@
+"""Cold-start time of load_from: serial CSV, parallel CSV and binary snapshot.
+
+Run from the project root:
+
+    python benchmarks/bench_startup.py 100000 1000000
+"""
+import os
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from benchmarks.catalog import write_catalog  # noqa: E402
+from inventory import inventory as inv  # noqa: E402
+
+def _time_load(path: str, repeat: int = 3) -> float:
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        inv.load_from(path)
+        best = min(best, time.perf_counter() - start)
+    return best
+
+def main(argv):
+    sizes = [int(a) for a in argv] or [10_000, 100_000, 1_000_000]
+    print(f"{os.cpu_count()} CPUs")
+    print(f"{'rows':>10} {'csv':>10} {'parallel':>10} {'snapshot':>10}")
+    with tempfile.TemporaryDirectory() as tmp:
+        for n in sizes:
+            path = os.path.join(tmp, f"products_{n}.csv")
+            write_catalog(path, n)
+            inv.enable_snapshot(False)
+            csv_time = _time_load(path)
+            inv.configure_parallel_load(workers=max(os.cpu_count() or 1, 2), min_bytes=1)
+            par_time = _time_load(path)
+            inv.configure_parallel_load()
+            inv.enable_snapshot(True)
+            inv.save_to(path)
+            snap_time = _time_load(path)
+            inv.enable_snapshot(False)
+            print(f"{n:>10} {csv_time:>9.3f}s {par_time:>9.3f}s {snap_time:>9.3f}s")
+
+if __name__ == "__main__":
+    main(sys.argv[1:])
@@ -0,0 +1,67 @@
+"""Per-mutation latency of the storage backends: CSV, CSV + journal, SQLite.
+
+Run from the project root:
+
+    python benchmarks/bench_storage.py 100000
+
+Each mutation is persisted synchronously (no autosave), so the numbers are
+what a single adjust/update/create/delete costs on disk with each backend.
+"""
+import os
+import statistics
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from benchmarks.catalog import write_catalog  # noqa: E402
+from inventory import inventory as inv  # noqa: E402
+from inventory import storage  # noqa: E402
+
+def _latencies(calls) -> list:
+    out = []
+    for call in calls:
+        start = time.perf_counter()
+        call()
+        out.append(time.perf_counter() - start)
+    return out
+
+def _run_mode(path: str, ops: int) -> dict:
+    inv.load_from(path)
+    pids = [p.id for p in inv.list_products(0, ops)]
+    results = {
+        "adjust_stock": _latencies([lambda pid=pid: inv.adjust_stock(pid, 1) for pid in pids]),
+        "update_product": _latencies([lambda pid=pid: inv.update_product(pid, price=9.99) for pid in pids]),
+        "create_product": _latencies([lambda i=i: inv.create_product(name=f"New {i}", sku=f"NEW-{i:06d}", stock=1)
+                                      for i in range(ops)]),
+        "delete_product": _latencies([lambda pid=pid: inv.delete_product(pid) for pid in pids]),
+    }
+    inv.load_from(None)
+    return results
+
+def main(argv):
+    n = int(argv[0]) if argv else 100_000
+    with tempfile.TemporaryDirectory() as tmp:
+        csv_path = write_catalog(os.path.join(tmp, "products.csv"), n)
+        modes = {}
+        modes["csv"] = (os.path.join(tmp, "a.csv"), 10)
+        modes["csv+journal"] = (os.path.join(tmp, "b.csv"), 200)
+        modes["sqlite"] = (os.path.join(tmp, "c.db"), 200)
+        print(f"{n} products")
+        print(f"{'backend':<12} {'operation':<15} {'median':>10} {'p99':>10}")
+        for mode, (path, ops) in modes.items():
+            storage.migrate(csv_path, path)
+            if mode == "csv+journal":
+                inv.enable_journal(checkpoint_bytes=0)
+            try:
+                results = _run_mode(path, ops)
+            finally:
+                inv.disable_journal()
+            for op, samples in results.items():
+                samples.sort()
+                p99 = samples[min(int(0.99 * len(samples)), len(samples) - 1)]
+                print(f"{mode:<12} {op:<15} {statistics.median(samples) * 1000:>8.3f}ms {p99 * 1000:>8.3f}ms")
+
+if __name__ == "__main__":
+    main(sys.argv[1:])
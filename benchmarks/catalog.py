@@ -0,0 +1,50 @@
+"""Deterministic synthetic catalogs in the products.csv schema.
+
+    python benchmarks/catalog.py 100000 data/products_100k.csv
+
+The same (n, seed) always produces byte-identical files, so timings from
+different runs and machines are measured on the same data. Rows mix plain
+and quoted names (commas, quotes), blank suppliers and some low/zero stock.
+"""
+import csv
+import os
+import random
+import sys
+
+HEADERS = ["id", "name", "sku", "price", "stock", "reorder_level", "supplier"]
+
+SIZES = {"1k": 1_000, "100k": 100_000, "1m": 1_000_000}
+
+_ADJECTIVES = ["Blue", "Red", "Heavy", "Compact", "Steel", "Wireless", "Mini", "Pro", "Classic", "Eco"]
+_NOUNS = ["Widget", "Cable", "Bolt", "Adapter", "Bracket", "Charger", "Hinge", "Sensor", "Clamp", "Filter"]
+_SUPPLIERS = ["WireWorks", "Acme", "Globex", "Initech", "Umbrella", "Hooli", "Acme, Inc", ""]
+
+def catalog_rows(n: int, seed: int = 42, sku_prefix: str = "SKU"):
+    """Yield n rows as lists of strings, ids 1..n."""
+    rng = random.Random(seed)
+    for i in range(1, n + 1):
+        name = f"{rng.choice(_ADJECTIVES)} {rng.choice(_NOUNS)} {i}"
+        if i % 50 == 0:
+            name += ', 2" pack'
+        reorder = rng.randint(0, 20)
+        # Roughly one in ten products sits at or below its reorder level
+        stock = rng.randint(0, reorder) if rng.random() < 0.1 else rng.randint(reorder + 1, 500)
+        yield [str(i), name, f"{sku_prefix}-{i:08d}", f"{rng.uniform(0.5, 500):.2f}",
+               str(stock), str(reorder), rng.choice(_SUPPLIERS)]
+
+def write_catalog(path: str, n: int, seed: int = 42, sku_prefix: str = "SKU") -> str:
+    os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+    with open(path, "w", newline="", encoding="utf-8") as f:
+        writer = csv.writer(f, lineterminator="\n")
+        writer.writerow(HEADERS)
+        writer.writerows(catalog_rows(n, seed, sku_prefix))
+    return path
+
+def main(argv):
+    if len(argv) != 2:
+        raise SystemExit("usage: catalog.py <rows|1k|100k|1m> <output.csv>")
+    n = SIZES.get(argv[0].lower()) or int(argv[0])
+    write_catalog(argv[1], n)
+
+if __name__ == "__main__":
+    main(sys.argv[1:])
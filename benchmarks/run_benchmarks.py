@@ -0,0 +1,199 @@
+"""Benchmark suite for the core operations, with JSON results and regression checks.
+
+Run from the project root:
+
+    python benchmarks/run_benchmarks.py --sizes 1k 100k --out results.json
+    python benchmarks/run_benchmarks.py --sizes 1k 100k --baseline benchmarks/baseline.json
+    python benchmarks/run_benchmarks.py --sizes 1k 100k --out benchmarks/baseline.json
+
+Each size gets a deterministic catalog from benchmarks/catalog.py. For every
+operation it records the median and p95/p99 latency over the timed runs,
+throughput (rows/s for bulk operations, calls/s for adjust_stock and
+search) and the tracemalloc peak of one extra run. With --baseline, an
+operation whose median is more than --tolerance (and --min-delta-ms)
+slower than the stored one is reported as a regression and the script exits with status 1.
+"""
+import argparse
+import json
+import os
+import platform
+import shutil
+import statistics
+import sys
+import tempfile
+import time
+import tracemalloc
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from benchmarks.catalog import SIZES, write_catalog  # noqa: E402
+from inventory import inventory as inv  # noqa: E402
+
+SCHEMA = 1
+_ADJUST_CALLS = 2000
+_SEARCH_CALLS = 200
+
+def _percentile(samples: list, q: float) -> float:
+    ordered = sorted(samples)
+    return ordered[min(int(q * len(ordered)), len(ordered) - 1)]
+
+def _summarize(samples: list, units: int) -> dict:
+    median = statistics.median(samples)
+    return {
+        "runs": len(samples),
+        "median_s": median,
+        "p95_s": _percentile(samples, 0.95),
+        "p99_s": _percentile(samples, 0.99),
+        "throughput": units / median if median else None,
+    }
+
+def _peak_bytes(fn) -> int:
+    tracemalloc.start()
+    try:
+        fn()
+        return tracemalloc.get_traced_memory()[1]
+    finally:
+        tracemalloc.stop()
+
+def _bulk(fn, setup, units: int, repeat: int, memory: bool) -> dict:
+    """Time fn() `repeat` times (setup() untimed before each run)."""
+    samples = []
+    for _ in range(repeat):
+        setup()
+        start = time.perf_counter()
+        fn()
+        samples.append(time.perf_counter() - start)
+    out = _summarize(samples, units)
+    if memory:
+        setup()
+        out["peak_bytes"] = _peak_bytes(fn)
+    return out
+
+def _per_call(calls, memory: bool) -> dict:
+    """Latency of each call in `calls` (a list of zero-argument functions)."""
+    samples = []
+    for call in calls:
+        start = time.perf_counter()
+        call()
+        samples.append(time.perf_counter() - start)
+    out = _summarize(samples, 1)
+    if memory:
+        out["peak_bytes"] = _peak_bytes(lambda: [call() for call in calls[:100]])
+    return out
+
+def bench_size(n: int, tmp: str, repeat: int, memory: bool) -> dict:
+    catalog = write_catalog(os.path.join(tmp, f"catalog_{n}.csv"), n)
+    # Import feed: half updates existing SKUs, half brand new ones
+    feed = write_catalog(os.path.join(tmp, f"feed_{n}.csv"), n // 2, seed=7, sku_prefix="NEW")
+    with open(catalog, encoding="utf-8") as src, open(feed, "a", encoding="utf-8") as dst:
+        next(src)
+        for i, line in enumerate(src):
+            if i >= n - n // 2:
+                break
+            dst.write(line)
+    out_path = os.path.join(tmp, f"saved_{n}.csv")
+    # Loading makes a file current and later operations write to it (the
+    # import commits, adjustments go to its ledger), so every run starts
+    # from a fresh copy and the generated catalog itself is never touched
+    work = os.path.join(tmp, f"work_{n}.csv")
+
+    def reset():
+        shutil.copyfile(catalog, work)
+        for path in (work + ".journal", work + ".ledger"):
+            if os.path.exists(path):
+                os.remove(path)
+
+    def load():
+        reset()
+        inv.load_from(work)
+
+    results = {}
+    results["load_from"] = _bulk(lambda: inv.load_from(work), reset, n, repeat, memory)
+    results["list_products"] = _bulk(inv.list_products, load, n, repeat, memory)
+    results["save_to"] = _bulk(lambda: inv.save_to(out_path), load, n, repeat, memory)
+    results["import_csv"] = _bulk(lambda: inv.import_csv(feed), load, n, repeat, memory)
+
+    load()
+    # Debounce saves so adjust_stock measures the in-memory path, as in the app
+    inv.enable_autosave(delay=3600)
+    try:
+        pids = [p.id for p in inv.list_products(0, _ADJUST_CALLS)]
+        calls = [(lambda pid=pid, d=d: inv.adjust_stock(pid, d)) for d in (1, -1) for pid in pids]
+        results["adjust_stock"] = _per_call(calls, memory)
+    finally:
+        inv._autosaver.mark_clean()
+        inv.disable_autosave()
+    inv.search("warm")  # build the search index outside the timings
+    queries = ["widget", "cab", "SKU-0000", "blue bolt", "a"]
+    calls = [(lambda q=q: inv.search(q, limit=100)) for q in queries] * (_SEARCH_CALLS // len(queries))
+    results["search"] = _per_call(calls, memory)
+    inv.load_from(None)
+    return results
+
+def compare(current: dict, baseline: dict, tolerance: float, min_delta: float = 0.0) -> list:
+    """Return (size, op, baseline median, current median) for every regression.
+
+    Slowdowns smaller than min_delta seconds are treated as timer noise.
+    """
+    regressions = []
+    for size, ops in current["results"].items():
+        for op, stats in ops.items():
+            base = baseline.get("results", {}).get(size, {}).get(op)
+            if (base and stats["median_s"] > base["median_s"] * (1 + tolerance)
+                    and stats["median_s"] - base["median_s"] > min_delta):
+                regressions.append((size, op, base["median_s"], stats["median_s"]))
+    return regressions
+
+def _parse_size(token: str) -> int:
+    return SIZES.get(token.lower()) or int(token)
+
+def main(argv) -> int:
+    parser = argparse.ArgumentParser(description="Inventory benchmark suite")
+    parser.add_argument("--sizes", nargs="+", default=["1k", "100k", "1m"], help="catalog sizes (1k, 100k, 1m or a number)")
+    parser.add_argument("--repeat", type=int, default=5, help="timed runs per bulk operation")
+    parser.add_argument("--no-memory", action="store_true", help="skip the tracemalloc pass")
+    parser.add_argument("--out", help="write results JSON here")
+    parser.add_argument("--baseline", help="compare against this results JSON")
+    parser.add_argument("--tolerance", type=float, default=0.25, help="allowed slowdown before flagging (0.25 = 25%%)")
+    parser.add_argument("--min-delta-ms", type=float, default=0.05, help="ignore slowdowns smaller than this")
+    args = parser.parse_args(argv)
+
+    report = {
+        "schema": SCHEMA,
+        "meta": {
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "cpus": os.cpu_count(),
+            "created": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        },
+        "results": {},
+    }
+    with tempfile.TemporaryDirectory() as tmp:
+        # Keep the benchmark off the real products.csv
+        inv.set_current_path(os.path.join(tmp, "products.csv"))
+        for token in args.sizes:
+            n = _parse_size(token)
+            print(f"{n} products ...", flush=True)
+            report["results"][str(n)] = ops = bench_size(n, tmp, args.repeat, not args.no_memory)
+            for op, s in ops.items():
+                peak = f"{s['peak_bytes'] / 2**20:8.1f} MB" if "peak_bytes" in s else ""
+                print(f"  {op:<14} median {s['median_s'] * 1000:10.3f} ms  p99 {s['p99_s'] * 1000:10.3f} ms"
+                      f"  {s['throughput']:>14,.0f}/s {peak}")
+
+    if args.out:
+        with open(args.out, "w", encoding="utf-8") as f:
+            json.dump(report, f, indent=2)
+            f.write("\n")
+    if args.baseline:
+        with open(args.baseline, encoding="utf-8") as f:
+            baseline = json.load(f)
+        regressions = compare(report, baseline, args.tolerance, args.min_delta_ms / 1000)
+        for size, op, before, after in regressions:
+            print(f"REGRESSION {op} @ {size}: {before * 1000:.3f} ms -> {after * 1000:.3f} ms")
+        if regressions:
+            return 1
+        print(f"No regressions beyond {args.tolerance:.0%} of {args.baseline}")
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main(sys.argv[1:]))
@@ -0,0 +1,112 @@
+"""Headless command line for scripted jobs, no Tk or display needed:
+
+    python -m inventory adjust-bulk moves.csv      # SKU,delta lines ("-" = stdin)
+    python -m inventory low-stock --format jsonl
+    python -m inventory import supplier.csv
+    python -m inventory stats
+
+The catalog is INVENTORY_CSV_PATH (or products.csv), or --file. Only
+argparse is imported up front; each command imports what it needs.
+"""
+import argparse
+import contextlib
+import sys
+
+def _open_catalog(args):
+    from . import inventory as inv
+    inv.init_storage(args.file)
+    return inv
+
+def _rows(lines, line_numbers: list):
+    """(sku, delta) pairs from SKU,delta lines; skips blanks, comments and a header."""
+    for n, line in enumerate(lines, 1):
+        line = line.strip()
+        if not line or line.startswith("#"):
+            continue
+        sku, sep, delta = line.partition(",")
+        if n == 1 and sku.strip().lower() == "sku":
+            continue
+        line_numbers.append(n)
+        yield sku.strip(), delta.strip() if sep else ""
+
+def _reason(text: str) -> str:
+    from .ledger import check_reason
+    try:
+        check_reason(text)
+    except ValueError as e:
+        raise argparse.ArgumentTypeError(str(e))
+    return text
+
+def cmd_adjust_bulk(args) -> int:
+    inv = _open_catalog(args)
+    source = contextlib.nullcontext(sys.stdin) if args.path == "-" else open(args.path, "r", encoding="utf-8")
+    line_numbers: list = []
+    with source as lines:
+        result = inv.adjust_stock_bulk(_rows(lines, line_numbers), reason=args.reason, strict=args.strict)
+    for row, reason in result.errors:
+        print(f"line {line_numbers[row - 1]}: {reason}", file=sys.stderr)
+    if result.rejected > len(result.errors):
+        print(f"... and {result.rejected - len(result.errors)} more", file=sys.stderr)
+    if args.strict and result.rejected:
+        print(f"Rejected {result.rejected} lines; nothing applied", file=sys.stderr)
+    else:
+        print(f"Applied {result.applied} adjustments to {result.products} products, rejected {result.rejected}")
+    return 1 if result.rejected else 0
+
+def cmd_low_stock(args) -> int:
+    inv = _open_catalog(args)
+    from .export import encode_csv, encode_jsonl
+    encode = encode_jsonl if args.format == "jsonl" else encode_csv
+    out = sys.stdout.buffer
+    for chunk in encode(inv.iter_products(low_only=True, supplier=args.supplier)):
+        out.write(chunk)
+    out.flush()
+    return 0
+
+def cmd_import(args) -> int:
+    inv = _open_catalog(args)
+    result = inv.import_csv(args.path)
+    for line, reason in result.errors:
+        print(f"line {line}: {reason}", file=sys.stderr)
+    print(f"Created {result.created}, updated {result.updated}, rejected {result.rejected}")
+    return 1 if result.rejected else 0
+
+def cmd_stats(args) -> int:
+    inv = _open_catalog(args)
+    report = inv.valuation_report()
+    print(f"File:        {inv.current_path()}")
+    print(f"Products:    {report.products}")
+    print(f"Units:       {report.units}")
+    print(f"Value:       {report.value:,.2f}")
+    print(f"Low stock:   {report.low_stock} ({report.zero_stock} out of stock)")
+    print(f"Suppliers:   {sum(1 for r in report.by_supplier if r.supplier)}")
+    return 0
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(prog="python -m inventory", description="Headless inventory commands")
+    parser.add_argument("--file", help="catalog file (default: INVENTORY_CSV_PATH or products.csv)")
+    sub = parser.add_subparsers(dest="command", required=True)
+
+    p = sub.add_parser("adjust-bulk", help="apply SKU,delta lines as one batch")
+    p.add_argument("path", nargs="?", default="-", help='file of "SKU,delta" lines, or - for stdin')
+    p.add_argument("--reason", type=_reason, default="bulk", help="reason recorded in the stock ledger (at most 12 ASCII characters)")
+    p.add_argument("--strict", action="store_true", help="apply nothing if any line is rejected")
+    p.set_defaults(run=cmd_adjust_bulk)
+
+    p = sub.add_parser("low-stock", help="print products at or below their reorder level")
+    p.add_argument("--format", choices=("csv", "jsonl"), default="csv")
+    p.add_argument("--supplier")
+    p.set_defaults(run=cmd_low_stock)
+
+    p = sub.add_parser("import", help="merge products from a CSV (matched by SKU)")
+    p.add_argument("path")
+    p.set_defaults(run=cmd_import)
+
+    p = sub.add_parser("stats", help="catalog totals")
+    p.set_defaults(run=cmd_stats)
+
+    args = parser.parse_args(argv)
+    return args.run(args)
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,160 @@
+import heapq
+from array import array
+from operator import attrgetter
+from typing import List, Optional, Sequence
+
+from .models import ReorderLine, SupplierTotals, ValuationReport
+
+# NumPy is optional: with it the reports are vectorized over the cached
+# columns (zero-copy views of the arrays below); without it the same
+# columns are scanned in a single pure-Python pass. It is imported on the
+# first report, not with the module, so headless startup doesn't pay for it.
+_UNLOADED = object()
+np = _UNLOADED
+# Below this many rows the pure-Python pass is as fast as importing NumPy
+_NUMPY_MIN_ROWS = 20000
+
+def _numpy(rows: int = _NUMPY_MIN_ROWS):
+    global np
+    if rows < _NUMPY_MIN_ROWS:
+        return None
+    if np is _UNLOADED:
+        try:
+            import numpy
+        except ImportError:  # pragma: no cover - depends on the environment
+            numpy = None
+        np = numpy
+    return np
+
+class ProductColumns:
+    """Typed column arrays for every live product, built once per catalog state.
+
+    suppliers[code] names the supplier of rows whose supplier_codes entry is
+    code; code 0 is reserved for "no supplier".
+    """
+
+    def __init__(self, products: Sequence, store=None):
+        if store is not None:
+            self._gather(products, store)
+            return
+        self.ids = array("q", map(attrgetter("id"), products))
+        self.prices = array("d", map(attrgetter("price"), products))
+        self.stocks = array("q", map(attrgetter("stock"), products))
+        self.reorder_levels = array("q", map(attrgetter("reorder_level"), products))
+        codes = {None: 0}
+        # setdefault hands out the next code the first time a supplier is seen
+        self.supplier_codes = array("i", [codes.setdefault(s or None, len(codes))
+                                          for s in map(attrgetter("supplier"), products)])
+        self.suppliers: List[Optional[str]] = list(codes)
+        self._codes = codes
+        self._row_of = dict(zip(self.ids, range(len(self.ids))))
+
+    def _gather(self, views: Sequence, store):
+        """Copy the live rows out of a ColumnarStore (views are its ProductViews)."""
+        rows = [v._row for v in views]
+        self.ids = array("q", map(store.ids.__getitem__, rows))
+        self.prices = array("d", map(store.prices.__getitem__, rows))
+        self.stocks = array("q", map(store.stocks.__getitem__, rows))
+        self.reorder_levels = array("q", map(store.reorder_levels.__getitem__, rows))
+        # The store already interns suppliers (-1 = none); shift to make 0 "none"
+        self.supplier_codes = array("i", [store.supplier_ids[r] + 1 for r in rows])
+        self.suppliers = [None] + list(store.suppliers)
+        self._codes = {s: code for code, s in enumerate(self.suppliers)}
+        self._row_of = dict(zip(self.ids, range(len(self.ids))))
+
+    def __len__(self) -> int:
+        return len(self.ids)
+
+    def patch(self, p) -> bool:
+        """Refresh one existing product's row in place; False if it has no row."""
+        row = self._row_of.get(p.id)
+        if row is None:
+            return False
+        self.prices[row] = p.price
+        self.stocks[row] = p.stock
+        self.reorder_levels[row] = p.reorder_level
+        supplier = p.supplier or None
+        code = self._codes.get(supplier)
+        if code is None:
+            code = self._codes[supplier] = len(self.suppliers)
+            self.suppliers.append(supplier)
+        self.supplier_codes[row] = code
+        return True
+
+def reorder_target(reorder_level: int, cover: float) -> int:
+    """Stock to reorder up to: `cover` times the reorder level, and above it."""
+    return max(int(reorder_level * cover), reorder_level + 1)
+
+def valuation(cols: ProductColumns) -> ValuationReport:
+    groups = len(cols.suppliers)
+    np = _numpy(len(cols))
+    if np is not None:
+        sup = np.frombuffer(cols.supplier_codes, dtype=np.int32)
+        stocks = np.frombuffer(cols.stocks, dtype=np.int64)
+        values = stocks * np.frombuffer(cols.prices, dtype=np.float64)
+        low = stocks <= np.frombuffer(cols.reorder_levels, dtype=np.int64)
+        count = np.bincount(sup, minlength=groups).tolist()
+        units = np.bincount(sup, weights=stocks, minlength=groups).tolist()
+        value = np.bincount(sup, weights=values, minlength=groups).tolist()
+        low_count = np.bincount(sup[low], minlength=groups).tolist()
+        zero_count = int(np.count_nonzero(stocks == 0))
+    else:
+        count, units, value, low_count = [0] * groups, [0] * groups, [0.0] * groups, [0] * groups
+        zero_count = 0
+        for code, price, stock, level in zip(cols.supplier_codes, cols.prices, cols.stocks, cols.reorder_levels):
+            count[code] += 1
+            units[code] += stock
+            value[code] += stock * price
+            if stock <= level:
+                low_count[code] += 1
+                if not stock:
+                    zero_count += 1
+    rows = [
+        SupplierTotals(supplier=cols.suppliers[code], products=int(count[code]), units=int(units[code]),
+                       value=round(float(value[code]), 2), low_stock=int(low_count[code]))
+        for code in range(groups) if count[code]
+    ]
+    rows.sort(key=lambda r: (-r.value, r.supplier or ""))
+    return ValuationReport(
+        products=len(cols),
+        units=sum(r.units for r in rows),
+        value=round(sum(float(v) for v in value), 2),
+        low_stock=sum(r.low_stock for r in rows),
+        zero_stock=zero_count,
+        by_supplier=rows,
+    )
+
+def reorder_rows(cols: ProductColumns, cover: float, limit: Optional[int] = None) -> List[tuple]:
+    """(row, suggested quantity) for products at or below their reorder level.
+
+    Largest suggestion first (ties by id); only the first `limit` if given.
+    """
+    np = _numpy(len(cols))
+    if np is not None:
+        stocks = np.frombuffer(cols.stocks, dtype=np.int64)
+        levels = np.frombuffer(cols.reorder_levels, dtype=np.int64)
+        rows = np.flatnonzero(stocks <= levels)
+        lv = levels[rows]
+        qty = np.maximum((lv * cover).astype(np.int64), lv + 1) - stocks[rows]
+        order = np.lexsort((np.frombuffer(cols.ids, dtype=np.int64)[rows], -qty))[:limit]
+        return list(zip(rows[order].tolist(), qty[order].tolist()))
+    out = []
+    ids = cols.ids
+    for row, (stock, level) in enumerate(zip(cols.stocks, cols.reorder_levels)):
+        if stock <= level:
+            out.append((row, reorder_target(level, cover) - stock))
+    key = lambda t: (-t[1], ids[t[0]])  # noqa: E731
+    if limit is not None:
+        return heapq.nsmallest(limit, out, key=key)
+    out.sort(key=key)
+    return out
+
+def reorder_lines(cols: ProductColumns, cover: float, lookup, limit: Optional[int] = None) -> List[ReorderLine]:
+    """Reorder suggestions as ReorderLines; lookup(id) gives the product."""
+    lines = []
+    ids, stocks, levels, prices = cols.ids, cols.stocks, cols.reorder_levels, cols.prices
+    for row, qty in reorder_rows(cols, cover, limit):
+        p = lookup(ids[row])
+        lines.append(ReorderLine(id=ids[row], name=p.name, sku=p.sku, supplier=p.supplier, stock=stocks[row],
+                                 reorder_level=levels[row], suggested=qty, cost=round(qty * prices[row], 2)))
+    return lines
@@ -0,0 +1,96 @@
+import threading
+import time
+from typing import Callable, Optional
+from .models import SaveStatus
+
+class Autosaver:
+    """Coalesce mutations into one background save after a quiet period.
+
+    mark_dirty() is cheap and never touches the disk; a daemon thread calls
+    save() once no change has arrived for `delay` seconds. A failed save keeps
+    the state dirty and is retried after another delay.
+    """
+
+    def __init__(self, save: Callable[[], None], delay: float = 1.0):
+        self._save = save
+        self.delay = delay
+        self._cv = threading.Condition()
+        self._save_lock = threading.Lock()
+        self._dirty = False
+        self._last_change = 0.0
+        self._stopping = False
+        self._state = "idle"
+        self._last_saved: Optional[float] = None
+        self._error: Optional[str] = None
+        self._thread = threading.Thread(target=self._run, name="inventory-autosave", daemon=True)
+        self._thread.start()
+
+    def mark_dirty(self):
+        with self._cv:
+            self._dirty = True
+            self._last_change = time.monotonic()
+            if self._state != "saving":
+                self._state = "pending"
+            self._cv.notify()
+
+    def mark_clean(self):
+        """Forget pending changes (someone else just saved them)."""
+        with self._cv:
+            self._dirty = False
+            if self._state != "saving":
+                self._state = "idle"
+                self._error = None
+
+    @property
+    def dirty(self) -> bool:
+        return self._dirty
+
+    def status(self) -> SaveStatus:
+        with self._cv:
+            return SaveStatus(state=self._state, last_saved=self._last_saved, error=self._error)
+
+    def _run(self):
+        while True:
+            with self._cv:
+                while not self._dirty and not self._stopping:
+                    self._cv.wait()
+                if self._stopping:
+                    return
+                wait = self._last_change + self.delay - time.monotonic()
+                if wait > 0:
+                    self._cv.wait(wait)
+                    continue
+            self._save_now()
+
+    def _save_now(self):
+        with self._save_lock:
+            with self._cv:
+                if not self._dirty:
+                    return
+                self._dirty = False
+                self._state = "saving"
+            try:
+                self._save()
+            except Exception as e:
+                with self._cv:
+                    self._dirty = True
+                    self._last_change = time.monotonic()
+                    self._state = "error"
+                    self._error = str(e)
+                return
+            with self._cv:
+                self._last_saved = time.time()
+                self._error = None
+                self._state = "pending" if self._dirty else "idle"
+
+    def flush(self):
+        """Save now, on the calling thread, if anything is pending."""
+        self._save_now()
+        if self._error:
+            raise OSError(self._error)
+
+    def stop(self):
+        with self._cv:
+            self._stopping = True
+            self._cv.notify()
+        self._thread.join()
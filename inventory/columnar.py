@@ -0,0 +1,134 @@
+import sys
+from array import array
+from typing import Optional
+
+class ColumnarStore:
+    """Products stored column-wise: numbers in typed arrays, suppliers interned.
+
+    Rows are append-only; deleting a product simply drops every reference to
+    its ProductView, and the row is reclaimed on the next load. This keeps row
+    numbers stable, so views (and transaction rollback) stay valid.
+    """
+
+    def __init__(self):
+        self.ids = array("q")
+        self.prices = array("d")
+        self.stocks = array("q")
+        self.reorder_levels = array("q")
+        self.names: list[str] = []
+        self.skus: list[str] = []
+        # Index into suppliers; -1 means no supplier
+        self.supplier_ids = array("i")
+        self.suppliers: list[str] = []
+        self._supplier_index: dict[str, int] = {}
+
+    def __len__(self) -> int:
+        return len(self.ids)
+
+    def _supplier_id(self, supplier: Optional[str]) -> int:
+        if not supplier:
+            return -1
+        sid = self._supplier_index.get(supplier)
+        if sid is None:
+            sid = len(self.suppliers)
+            self.suppliers.append(sys.intern(supplier))
+            self._supplier_index[supplier] = sid
+        return sid
+
+    def append(self, id: int, name: str, sku: str, price: float, stock: int, reorder_level: int, supplier: Optional[str] = None) -> "ProductView":
+        row = len(self.ids)
+        self.ids.append(id)
+        self.names.append(name)
+        self.skus.append(sku)
+        self.prices.append(price)
+        self.stocks.append(stock)
+        self.reorder_levels.append(reorder_level)
+        self.supplier_ids.append(self._supplier_id(supplier))
+        return ProductView(self, row)
+
+    def extend(self, ids, names, skus, prices, stocks, reorder_levels, suppliers) -> list:
+        """Bulk-append whole columns; returns views for the new rows."""
+        start = len(self.ids)
+        self.ids.extend(ids)
+        self.names.extend(names)
+        self.skus.extend(skus)
+        self.prices.extend(prices)
+        self.stocks.extend(stocks)
+        self.reorder_levels.extend(reorder_levels)
+        self.supplier_ids.extend(map(self._supplier_id, suppliers))
+        return [ProductView(self, row) for row in range(start, len(self.ids))]
+
+class ProductView:
+    """Row view over a ColumnarStore with the same attributes as Product."""
+
+    __slots__ = ("_store", "_row")
+
+    def __init__(self, store: ColumnarStore, row: int):
+        self._store = store
+        self._row = row
+
+    @property
+    def id(self) -> int:
+        return self._store.ids[self._row]
+
+    @id.setter
+    def id(self, value: int):
+        self._store.ids[self._row] = value
+
+    @property
+    def name(self) -> str:
+        return self._store.names[self._row]
+
+    @name.setter
+    def name(self, value: str):
+        self._store.names[self._row] = value
+
+    @property
+    def sku(self) -> str:
+        return self._store.skus[self._row]
+
+    @sku.setter
+    def sku(self, value: str):
+        self._store.skus[self._row] = value
+
+    @property
+    def price(self) -> float:
+        return self._store.prices[self._row]
+
+    @price.setter
+    def price(self, value: float):
+        self._store.prices[self._row] = value
+
+    @property
+    def stock(self) -> int:
+        return self._store.stocks[self._row]
+
+    @stock.setter
+    def stock(self, value: int):
+        self._store.stocks[self._row] = value
+
+    @property
+    def reorder_level(self) -> int:
+        return self._store.reorder_levels[self._row]
+
+    @reorder_level.setter
+    def reorder_level(self, value: int):
+        self._store.reorder_levels[self._row] = value
+
+    @property
+    def supplier(self) -> Optional[str]:
+        sid = self._store.supplier_ids[self._row]
+        return self._store.suppliers[sid] if sid >= 0 else None
+
+    @supplier.setter
+    def supplier(self, value: Optional[str]):
+        self._store.supplier_ids[self._row] = self._store._supplier_id(value)
+
+    @property
+    def is_low_stock(self) -> bool:
+        store, row = self._store, self._row
+        return store.stocks[row] <= store.reorder_levels[row]
+
+    def __repr__(self):
+        return (f"ProductView(id={self.id!r}, name={self.name!r}, sku={self.sku!r}, price={self.price!r}, "
+                f"stock={self.stock!r}, reorder_level={self.reorder_level!r}, supplier={self.supplier!r})")
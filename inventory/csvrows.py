@@ -0,0 +1,58 @@
+import csv
+from typing import Iterable, List, Optional, Tuple
+from .sku import validate_sku
+
+# Parsed product columns: ids (0 = missing), names, skus, prices, stocks,
+# reorder levels, suppliers. Shared by the serial and parallel CSV loaders so
+# both produce exactly the same rows.
+Columns = Tuple[List[int], List[str], List[str], List[float], List[int], List[int], List[Optional[str]]]
+
+def empty_columns() -> Columns:
+    return [], [], [], [], [], [], []
+
+def parse_rows(rows: Iterable[list], fieldnames: List[str], out: Columns) -> Columns:
+    """Validate raw csv.reader rows and append the good ones to out.
+
+    Behaves like iterating csv.DictReader(fieldnames=fieldnames): blank rows are
+    skipped and missing trailing fields read as empty.
+    """
+    ids, names, skus, prices, stocks, reorders, suppliers = out
+    has_id = "id" in fieldnames
+    width = len(fieldnames)
+    for raw in rows:
+        if not raw:
+            continue
+        if len(raw) < width:
+            raw = raw + [None] * (width - len(raw))
+        row = dict(zip(fieldnames, raw))
+        try:
+            pid = int(row["id"]) if has_id and row.get("id") else None
+            name = (row.get("name") or "").strip()
+            sku = (row.get("sku") or "").strip().upper()
+            price = float(row.get("price") or 0)
+            stock = int(row.get("stock") or 0)
+            reorder_level = int(row.get("reorder_level") or 0)
+            supplier = (row.get("supplier") or "").strip() or None
+        except Exception:
+            continue
+        if not name or not validate_sku(sku):
+            continue
+        ids.append(pid or 0)
+        names.append(name)
+        skus.append(sku)
+        prices.append(price)
+        stocks.append(stock)
+        reorders.append(reorder_level)
+        suppliers.append(supplier)
+    return out
+
+def read_columns(path: str) -> Columns:
+    """Serial loader: parse a whole products CSV into columns."""
+    out = empty_columns()
+    with open(path, "r", newline="", encoding="utf-8") as f:
+        reader = csv.reader(f)
+        fieldnames = next(reader, None)
+        if fieldnames is None:
+            return out
+        parse_rows(reader, fieldnames, out)
+    return out
@@ -3,3 +3,6 @@ class NegativeStockError(Exception):
 
 class InvalidSKUError(Exception):
     pass
+
+class ExternalEditConflict(Exception):
+    pass
@@ -0,0 +1,132 @@
+"""Streaming export of products to CSV, JSON Lines or a compact binary format.
+
+Encoders take any iterable of products and yield encoded chunks, so an
+export never holds more than one chunk of output in memory. Binary layout,
+little-endian: the magic "INVEXP01", then per product
+
+    id (i64), price (f64), stock (i64), reorder_level (i64),
+    byte lengths of name, sku, supplier (u16 each), then the three UTF-8 strings
+
+read back with read_binary(). A ".gz" suffix (or compress=True) gzips any format.
+"""
+import csv
+import gzip
+import io
+import json
+import os
+import struct
+import tempfile
+from typing import BinaryIO, Iterable, Iterator, Optional
+
+from .models import Product
+from .storage import CSV_HEADERS
+
+FORMATS = ("csv", "jsonl", "bin")
+_SUFFIXES = {".csv": "csv", ".jsonl": "jsonl", ".ndjson": "jsonl", ".bin": "bin"}
+_MAGIC = b"INVEXP01"
+_FIXED = struct.Struct("<qdqqHHH")
+# Rows per encoded chunk
+_CHUNK = 1000
+
+def format_for(path: str) -> str:
+    """Guess the format from the file name (ignoring .gz); CSV if unknown."""
+    base = path[:-3] if path.lower().endswith(".gz") else path
+    return _SUFFIXES.get(os.path.splitext(base)[1].lower(), "csv")
+
+def _chunks(products: Iterable, size: int = _CHUNK) -> Iterator[list]:
+    chunk = []
+    for p in products:
+        chunk.append(p)
+        if len(chunk) >= size:
+            yield chunk
+            chunk = []
+    if chunk:
+        yield chunk
+
+def encode_csv(products: Iterable) -> Iterator[bytes]:
+    buf = io.StringIO()
+    writer = csv.writer(buf)
+    writer.writerow(CSV_HEADERS)
+    for chunk in _chunks(products):
+        # Same formatting as the CSV backend, so an export can be opened as a catalog
+        writer.writerows([(p.id, p.name, p.sku, f"{float(p.price):.2f}", int(p.stock), int(p.reorder_level), p.supplier or "")
+                          for p in chunk])
+        yield buf.getvalue().encode("utf-8")
+        buf.seek(0)
+        buf.truncate()
+    if buf.tell():
+        yield buf.getvalue().encode("utf-8")
+
+def encode_jsonl(products: Iterable) -> Iterator[bytes]:
+    dumps = json.JSONEncoder(ensure_ascii=False, separators=(",", ":")).encode
+    for chunk in _chunks(products):
+        yield "".join(
+            dumps({"id": p.id, "name": p.name, "sku": p.sku, "price": float(p.price), "stock": int(p.stock),
+                   "reorder_level": int(p.reorder_level), "supplier": p.supplier}) + "\n"
+            for p in chunk
+        ).encode("utf-8")
+
+def encode_binary(products: Iterable) -> Iterator[bytes]:
+    yield _MAGIC
+    pack = _FIXED.pack
+    for chunk in _chunks(products):
+        parts = []
+        for p in chunk:
+            name, sku, supplier = p.name.encode("utf-8"), p.sku.encode("utf-8"), (p.supplier or "").encode("utf-8")
+            parts.append(pack(p.id, float(p.price), int(p.stock), int(p.reorder_level), len(name), len(sku), len(supplier)))
+            parts += (name, sku, supplier)
+        yield b"".join(parts)
+
+_ENCODERS = {"csv": encode_csv, "jsonl": encode_jsonl, "bin": encode_binary}
+
+def write_export(path: str, products: Iterable, fmt: Optional[str] = None, compress: Optional[bool] = None) -> int:
+    """Stream products into path (temp file, then replace); returns bytes written."""
+    fmt = fmt or format_for(path)
+    if fmt not in _ENCODERS:
+        raise ValueError(f"Unknown export format {fmt!r} (expected one of {', '.join(FORMATS)})")
+    if compress is None:
+        compress = path.lower().endswith(".gz")
+    dir_name = os.path.dirname(path) or "."
+    os.makedirs(dir_name, exist_ok=True)
+    written = 0
+    with tempfile.NamedTemporaryFile("wb", delete=False, dir=dir_name) as tmp:
+        try:
+            out = gzip.GzipFile(fileobj=tmp, mode="wb", compresslevel=6) if compress else tmp
+            try:
+                for data in _ENCODERS[fmt](products):
+                    out.write(data)
+                    written += len(data)
+            finally:
+                if compress:
+                    out.close()
+        except BaseException:
+            tmp.close()
+            os.remove(tmp.name)
+            raise
+        temp_name = tmp.name
+    os.replace(temp_name, path)
+    return written
+
+def _read_exact(f: BinaryIO, n: int) -> bytes:
+    data = f.read(n)
+    if len(data) != n:
+        raise ValueError("Export file truncated")
+    return data
+
+def read_binary(path: str) -> Iterator[Product]:
+    """Yield the products of a binary export (gzipped or not)."""
+    with open(path, "rb") as raw:
+        gzipped = raw.read(2) == b"\x1f\x8b"
+        raw.seek(0)
+        f = gzip.GzipFile(fileobj=raw) if gzipped else raw
+        if f.read(len(_MAGIC)) != _MAGIC:
+            raise ValueError("Not an inventory binary export")
+        while True:
+            head = f.read(_FIXED.size)
+            if not head:
+                return
+            if len(head) != _FIXED.size:
+                raise ValueError("Export file truncated")
+            pid, price, stock, reorder_level, n_name, n_sku, n_supplier = _FIXED.unpack(head)
+            name, sku, supplier = (_read_exact(f, n).decode("utf-8") for n in (n_name, n_sku, n_supplier))
+            yield Product(pid, name, sku, price, stock, reorder_level, supplier or None)
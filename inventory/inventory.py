@@ -1,163 +1,1342 @@
+import atexit
+import bisect
 import csv
+import functools
+import heapq
 import os
-import tempfile
-from typing import List, Optional
-from .models import Product
+import threading
+import time
+from contextlib import contextmanager
+from typing import TYPE_CHECKING, Callable, Iterable, Iterator, List, Optional
+from .models import BulkAdjustResult, ExternalChanges, ExternalConflict, ImportResult, Product, ReorderLine, SaveStatus, StockMovement, ValuationReport
 from .sku import validate_sku
-from .errors import NegativeStockError, InvalidSKUError
+from .errors import ExternalEditConflict, NegativeStockError, InvalidSKUError
+from . import storage
+from .storage import StorageBackend
+from .csvrows import empty_columns, parse_rows
+from .locks import RWLock, ShardedLocks
+from . import metrics
+from . import analytics
 
-_HEADERS = ["id", "name", "sku", "price", "stock", "reorder_level", "supplier"]
+# The optional subsystems (journal, ledger, snapshot, columnar store,
+# autosave, search, watch) are imported by the functions that use them, so
+# a short-lived process such as `python -m inventory stats` doesn't pay for
+# the ones it never touches
+if TYPE_CHECKING:
+    from .autosave import Autosaver
+    from .columnar import ColumnarStore
+    from .journal import Journal
+    from .ledger import Ledger
+    from .search import SearchIndex
+    from .watcher import FileWatcher
+
+_HEADERS = storage.CSV_HEADERS
 _DEFAULT_PATH = "products.csv"
 _ENV_PATH = "INVENTORY_CSV_PATH"
+_ENV_METRICS = "INVENTORY_METRICS"
+_ENV_JOURNAL = "INVENTORY_JOURNAL"
+_ENV_COLUMNAR = "INVENTORY_COLUMNAR"
+_ENV_SNAPSHOT = "INVENTORY_SNAPSHOT"
+_ENV_AUTOSAVE_DELAY = "INVENTORY_AUTOSAVE_DELAY"
+_ENV_WATCH_INTERVAL = "INVENTORY_WATCH_INTERVAL"
+_DEFAULT_AUTOSAVE_DELAY = 1.0
+_DEFAULT_WATCH_INTERVAL = 2.0
+_DEFAULT_CHECKPOINT_BYTES = 1024 * 1024
+_IMPORT_CHUNK_SIZE = 5000
+_EXPORT_CHUNK_SIZE = 1000
+_PARALLEL_LOAD_BYTES = 64 * 1024 * 1024
+_MAX_IMPORT_ERRORS = 1000
+
+# _lock guards all in-memory state: structural changes (create, update,
+# delete, load, transactions, saves) hold it for writing; adjust_stock only
+# reads the structure and serializes per product on a _stock_locks shard.
+# _write_lock serializes whole-file writes and is only ever taken after
+# (never while waiting for) _lock. Each save takes a sequence number under
+# _lock so an older autosave can never land on disk after a newer save of
+# the same file.
+_lock = RWLock()
+_stock_locks = ShardedLocks()
+_write_lock = threading.Lock()
+_save_seq: int = 0
+_written_seq: dict[str, int] = {}
 
 _products: list[Product] = []
+_by_id: dict[int, Product] = {}
+_by_sku: dict[str, Product] = {}
+# Name-ordered view: _sorted_keys[i] is the sort key of _sorted_products[i]
+_sorted_keys: list[tuple] = []
+_sorted_products: list[Product] = []
+_sort_key_of: dict[int, tuple] = {}
+# Ids of products at/below reorder level, and the subset with zero stock
+_low_ids: set[int] = set()
+_zero_ids: set[int] = set()
+_low_stock_listeners: list[Callable[[Product, bool], None]] = []
+# Name/SKU/supplier search index, built on first search and then kept current
+_search: Optional["SearchIndex"] = None
+# Column arrays behind the reports; built on demand, patched on updates and
+# dropped on any other change
+_columns: Optional[analytics.ProductColumns] = None
 _next_id: int = 1
 _current_path: str = os.getenv(_ENV_PATH, _DEFAULT_PATH)
+# When set, products live in a ColumnarStore and _products holds row views
+_store: Optional["ColumnarStore"] = None
+# When set, save_to also writes <csv>.snap and load_from prefers it if fresh
+_snapshot_enabled: bool = False
+# CSVs at least this big are parsed by a process pool (0 disables)
+_parallel_min_bytes: int = _PARALLEL_LOAD_BYTES
+_parallel_workers: Optional[int] = None
+# Open backend of the current file when it takes row-level writes (SQLite);
+# None means the file is CSV and every save rewrites it whole
+_backend: Optional[StorageBackend] = None
+# Background debounced saver; when set, full saves are deferred to it
+_autosaver: Optional["Autosaver"] = None
+
+# External edit detection (see enable_watch): _disk_rows maps each row key to
+# its fingerprint as the CSV held it when we last read or wrote it, and
+# _disk_stat is the file's (mtime, size) at that point. _unsaved_ids are
+# products changed in memory since; _conflicts are rows changed both here and
+# in the file, which block saving until resolve_conflicts() picks a side.
+_watching: bool = False
+_watcher: Optional["FileWatcher"] = None
+_disk_rows: Optional[dict] = None
+_disk_stat: Optional[tuple] = None
+_unsaved_ids: set[int] = set()
+_conflicts: dict[int, ExternalConflict] = {}
+
+# Journal mode: mutations append to <csv>.journal instead of rewriting the CSV
+_journal_enabled: bool = False
+_journal_fsync_every: int = 1
+_checkpoint_bytes: int = _DEFAULT_CHECKPOINT_BYTES
+_journal: Optional["Journal"] = None
+_journal_open_lock = threading.Lock()
+
+# Every stock movement is also appended to <csv>.ledger (see stock_history)
+_ledger: Optional["Ledger"] = None
+_ledger_open_lock = threading.Lock()
+# Ids of deleted products live on in the ledger, so new ids start past the
+# highest one it has seen (None until the first create after opening it)
+_ledger_next_id: Optional[int] = None
+
+# Open transaction state (see transaction())
+_txn_depth: int = 0
+_txn_owner: Optional[int] = None
+_txn_records: list[dict] = []
+_txn_next_id: int = 0
+# Undo data for the products the transaction touched, nothing else: their
+# values before the first change (id -> (product, copy)) and, in order, the
+# products it added ("add", p) or removed ("remove", [(position, p), ...])
+_txn_originals: dict[int, tuple] = {}
+_txn_undo: list[tuple] = []
+_txn_events: list[tuple] = []
+# Products whose low-stock state changed, with whether they were low before
+# (id -> (product, was_low)); listeners hear the net crossing on commit
+_txn_low: dict[int, tuple] = {}
+_txn_movements: list[tuple] = []
 
-def init_storage():
-    path = os.getenv(_ENV_PATH, _DEFAULT_PATH)
-    load_from(path if os.path.exists(path) else None)
+# While a chunked import runs, full saves wait for it to finish (see
+# iter_import_csv); _save_pending says one is owed
+_save_deferred: int = 0
+_save_pending: bool = False
+
+# Change listeners get (kind, pid): kind is "create", "update", "delete",
+# "reload" (pid None) when the whole catalog was replaced, or "conflict" when
+# an external edit of pid clashes with an unsaved local one.
+_change_listeners: list[Callable[[str, Optional[int]], None]] = []
+
+def _locked(fn):
+    @functools.wraps(fn)
+    def wrapper(*args, **kwargs):
+        with _lock.write():
+            return fn(*args, **kwargs)
+    return wrapper
+
+def _env_flag(name: str) -> bool:
+    return os.getenv(name, "").strip().lower() in ("1", "true", "yes", "on")
+
+def init_storage(path: Optional[str] = None):
+    """Apply the INVENTORY_* settings and load path (default: INVENTORY_CSV_PATH)."""
+    path = path or os.getenv(_ENV_PATH, _DEFAULT_PATH)
+    if _env_flag(_ENV_METRICS):
+        metrics.enable()
+    if _env_flag(_ENV_COLUMNAR):
+        enable_columnar_store()
+    if _env_flag(_ENV_SNAPSHOT):
+        enable_snapshot()
+    if _env_flag(_ENV_JOURNAL):
+        enable_journal()
+    from .journal import journal_path
+    if os.path.exists(path) or os.path.exists(journal_path(path)):
+        load_from(path)
+    else:
+        # Start empty, but save (and keep the ledger) where we were told to
+        load_from(None)
+        set_current_path(path)
 
 def current_path() -> str:
     return _current_path
 
 def set_current_path(path: str):
     global _current_path
+    if path != _current_path:
+        _close_journal()
+        _close_ledger()
+        _close_backend()
     _current_path = path
 
+def _close_backend():
+    global _backend
+    if _backend is not None:
+        _backend.close()
+        _backend = None
+
+def _backend_for(path: str) -> StorageBackend:
+    """Backend for path; a row-level one for the current file stays open."""
+    global _backend
+    if _backend is not None and _backend.path == path:
+        return _backend
+    backend = storage.open_backend(path, _parallel_workers, _parallel_min_bytes)
+    if backend.row_level and path == _current_path:
+        _backend = backend
+    return backend
+
+def _row_store() -> Optional[StorageBackend]:
+    """The current file's backend if it takes individual records, else None."""
+    if _backend is not None:
+        return _backend
+    path = _current_path or _DEFAULT_PATH
+    return _backend_for(path) if storage.is_sqlite_path(path) else None
+
+def enable_columnar_store(enabled: bool = True):
+    """Switch between Product objects and the compact columnar store."""
+    global _store, _products
+    from .columnar import ColumnarStore
+    _store = ColumnarStore() if enabled else None
+    _products = [_make_product(p.id, p.name, p.sku, p.price, p.stock, p.reorder_level, p.supplier) for p in _products]
+    _rebuild_indexes()
+
+def _make_product(id: int, name: str, sku: str, price: float, stock: int, reorder_level: int, supplier: Optional[str] = None) -> Product:
+    if _store is not None:
+        return _store.append(id, name, sku, price, stock, reorder_level, supplier)
+    return Product(id=id, name=name, sku=sku, price=price, stock=stock, reorder_level=reorder_level, supplier=supplier)
+
+def _make_products(ids, names, skus, prices, stocks, reorder_levels, suppliers) -> list[Product]:
+    """Column-wise counterpart of _make_product, for bulk loads."""
+    if _store is not None:
+        return _store.extend(ids, names, skus, prices, stocks, reorder_levels, suppliers)
+    return list(map(Product, ids, names, skus, prices, stocks, reorder_levels, suppliers))
+
+def configure_parallel_load(workers: Optional[int] = None, min_bytes: int = _PARALLEL_LOAD_BYTES):
+    """Set the worker count (None = all CPUs) and size threshold for parallel loads."""
+    global _parallel_workers, _parallel_min_bytes
+    _parallel_workers = workers
+    _parallel_min_bytes = min_bytes
+
+def enable_snapshot(enabled: bool = True):
+    """Keep a binary snapshot next to the CSV for fast startup."""
+    global _snapshot_enabled
+    _snapshot_enabled = enabled
+
+def enable_journal(fsync_every: int = 1, checkpoint_bytes: int = _DEFAULT_CHECKPOINT_BYTES):
+    """Persist mutations as journal appends; fsync every N records (0 = never)."""
+    global _journal_enabled, _journal_fsync_every, _checkpoint_bytes
+    _close_journal()
+    _journal_enabled = True
+    _journal_fsync_every = fsync_every
+    _checkpoint_bytes = checkpoint_bytes
+
+def disable_journal():
+    """Fold any pending journal into the CSV and go back to full rewrites."""
+    global _journal_enabled
+    if _journal_enabled and _journal is not None:
+        checkpoint()
+    _close_journal()
+    _journal_enabled = False
+
+def journal_enabled() -> bool:
+    return _journal_enabled
+
+def _close_journal():
+    global _journal
+    if _journal is not None:
+        _journal.close()
+        _journal = None
+
+def _get_journal() -> "Journal":
+    global _journal
+    from .journal import Journal, journal_path
+    with _journal_open_lock:
+        if _journal is None:
+            _journal = Journal(journal_path(_current_path or _DEFAULT_PATH), fsync_every=_journal_fsync_every)
+        return _journal
+
+def _close_ledger():
+    global _ledger, _ledger_next_id
+    if _ledger is not None:
+        _ledger.close()
+        _ledger = None
+    _ledger_next_id = None
+
+def _get_ledger() -> "Ledger":
+    global _ledger
+    from .ledger import Ledger, ledger_path
+    with _ledger_open_lock:
+        if _ledger is None:
+            _ledger = Ledger(ledger_path(_current_path or _DEFAULT_PATH))
+        return _ledger
+
+def _record_movement(pid: int, delta: int, stock: int, reason: str):
+    """Log a stock change (buffered until commit in a transaction)."""
+    if not delta:
+        return
+    entry = (time.time(), pid, delta, stock, reason)
+    if _in_txn():
+        _txn_movements.append(entry)
+    else:
+        _get_ledger().extend([entry])
+
+def flush_journal():
+    if _journal is not None:
+        _journal.flush()
+
+def enable_autosave(delay: Optional[float] = None):
+    """Defer full CSV saves to a background thread, debounced by `delay` seconds.
+
+    Applies when journal mode is off (journal appends are already cheap).
+    """
+    global _autosaver
+    if delay is None:
+        delay = float(os.getenv(_ENV_AUTOSAVE_DELAY) or _DEFAULT_AUTOSAVE_DELAY)
+    if _autosaver is not None:
+        _autosaver.delay = delay
+        return
+    from .autosave import Autosaver
+    _autosaver = Autosaver(_autosave_write, delay)
+    atexit.register(disable_autosave)
+
+def disable_autosave():
+    """Stop the background saver after writing anything still pending."""
+    global _autosaver
+    saver = _autosaver
+    if saver is None:
+        return
+    saver.stop()
+    _autosaver = None
+    saver.flush()
+
+def flush_autosave():
+    """Write pending changes now (e.g. before exit); raises if the save fails."""
+    if _autosaver is not None:
+        _autosaver.flush()
+
+def save_status() -> SaveStatus:
+    if _autosaver is None:
+        return SaveStatus()
+    return _autosaver.status()
+
+def _count_written(op: str, target: str):
+    if metrics.enabled():
+        size = os.path.getsize(target)
+        if _snapshot_enabled and not storage.is_sqlite_path(target):
+            from .snapshot import snapshot_path
+            size += os.path.getsize(snapshot_path(target))
+        metrics.add_bytes(op, written=size)
+
+def _next_save_seq() -> int:
+    global _save_seq
+    _save_seq += 1
+    return _save_seq
+
+@metrics.timed(name="autosave")
+def _autosave_write():
+    if _watching:
+        # Merge edits made elsewhere first so this save doesn't clobber them
+        check_external_changes()
+    # Copy the rows under the state lock, then write without holding it
+    with _lock.write():
+        if _conflicts:
+            raise ExternalEditConflict("Resolve the conflicts with external edits before saving")
+        seq = _next_save_seq()
+        target = _current_path or _DEFAULT_PATH
+        rows = [Product(p.id, p.name, p.sku, p.price, p.stock, p.reorder_level, p.supplier) for p in _sorted_products]
+        written = _take_unsaved()
+    with _write_lock:
+        if seq < _written_seq.get(target, 0):
+            return
+        if _disk_rows is not None:
+            from .watcher import file_stat
+            if file_stat(target) != _disk_stat:
+                # Edited again since the merge above; the autosaver retries after the next merge
+                _unsaved_ids.update(written)
+                raise ExternalEditConflict(f"{target} changed on disk while saving")
+        try:
+            _backend_for(target).save_all(rows)
+        except BaseException:
+            _unsaved_ids.update(written)
+            raise
+        _note_synced(target, written)
+        if _snapshot_enabled and not storage.is_sqlite_path(target):
+            from .snapshot import write_snapshot
+            write_snapshot(target, rows)
+        _count_written("autosave", target)
+        _written_seq[target] = seq
+
+def enable_watch(interval: Optional[float] = None):
+    """Poll the current CSV every `interval` seconds and merge in edits made by
+    other programs (0 = no polling thread; call check_external_changes())."""
+    global _watching, _watcher
+    if interval is None:
+        interval = float(os.getenv(_ENV_WATCH_INTERVAL) or _DEFAULT_WATCH_INTERVAL)
+    flush_autosave()
+    with _lock.write():
+        _watching = True
+        _unsaved_ids.clear()
+        _reset_disk_baseline(_current_path)
+    if _watcher is None and interval > 0:
+        from .watcher import FileWatcher
+        _watcher = FileWatcher(check_external_changes, interval)
+        atexit.register(disable_watch)
+
+def disable_watch():
+    global _watching, _watcher
+    watcher = _watcher
+    _watcher = None
+    if watcher is not None:
+        watcher.stop()
+    with _lock.write():
+        _watching = False
+        _unsaved_ids.clear()
+        _conflicts.clear()
+        _reset_disk_baseline(None)
+
+def _reset_disk_baseline(path: Optional[str]):
+    """Fingerprint every product as the file at path now holds it."""
+    global _disk_rows, _disk_stat
+    # Row-level and journal saves don't rewrite the file we would diff
+    if not _watching or not path or storage.is_sqlite_path(path) or _journal_enabled:
+        _disk_rows = _disk_stat = None
+        return
+    from .watcher import file_stat, fingerprint, product_values
+    _disk_rows = {p.id: fingerprint(product_values(p)) for p in _products}
+    _disk_stat = file_stat(path)
+
+def _take_unsaved() -> dict:
+    """Fingerprints of the unsaved products about to be written (None = deleted)."""
+    if _disk_rows is None:
+        _unsaved_ids.clear()
+        return {}
+    from .watcher import fingerprint, product_values
+    written = {}
+    for pid in list(_unsaved_ids):
+        p = _by_id.get(pid)
+        written[pid] = fingerprint(product_values(p)) if p is not None else None
+    _unsaved_ids.difference_update(written)
+    return written
+
+def _note_synced(target: str, written: dict):
+    """After writing target: its rows now match `written` (from _take_unsaved)."""
+    global _disk_stat
+    if _disk_rows is None or target != _current_path:
+        return
+    from .watcher import file_stat
+    for pid, fp in written.items():
+        if fp is None:
+            _disk_rows.pop(pid, None)
+        else:
+            _disk_rows[pid] = fp
+    _disk_stat = file_stat(target)
+
+@metrics.timed
+def check_external_changes() -> Optional[ExternalChanges]:
+    """Merge edits other programs made to the current CSV since we last synced.
+
+    Rows are diffed by fingerprint, so only changed rows are parsed and
+    applied (as targeted create/update/delete events). A row that also has
+    unsaved local changes is left alone and recorded as a conflict. Returns
+    None when the file is unchanged.
+    """
+    global _disk_stat
+    path = _current_path
+    known, base_stat = _disk_rows, _disk_stat
+    if known is None:
+        return None
+    from .watcher import changed_rows, file_stat
+    st = file_stat(path)
+    if st is None or st == base_stat:
+        return None
+    # The slow part (reading the file) runs without any lock
+    changed, seen = changed_rows(path, known, _HEADERS)
+    with _lock.write():
+        with _write_lock:
+            if path != _current_path or _disk_rows is not known or _disk_stat != base_stat or file_stat(path) != st:
+                # We loaded or saved meanwhile, or it changed again: next poll
+                return None
+            result, numbered = _merge_external(changed, seen)
+            _disk_stat = st
+    if numbered and not _conflicts:
+        # Write the ids we gave to rows typed in without one
+        _save_all()
+    return result
+
+def _merge_external(changed: list, seen: set) -> tuple:
+    from .watcher import fingerprint, product_values
+    result = ExternalChanges()
+    numbered = False
+    for key, values in changed:
+        cols = parse_rows([list(values)], _HEADERS, empty_columns())
+        if not cols[0]:
+            result.skipped += 1
+            continue
+        pid, name, sku, price, stock, reorder_level, supplier = (c[0] for c in cols)
+        local = _by_id.get(pid) if pid else _by_sku.get(sku)
+        disk = Product(pid or (local.id if local else 0), name, sku, price, stock, reorder_level, supplier)
+        if disk.id in _unsaved_ids:
+            if local is None or product_values(local) != product_values(disk):
+                _conflict(disk.id, sku, local, disk, result)
+        elif local is not None and product_values(local) == product_values(disk):
+            pass
+        elif _by_sku.get(sku) not in (None, local):
+            result.skipped += 1
+            continue
+        else:
+            if not disk.id:
+                # Typed in without an id: give it one and write that back
+                disk.id = _new_id()
+                _unsaved_ids.add(disk.id)
+                numbered = True
+            before = local.stock if local is not None else 0
+            _apply_record(_row_record(disk))
+            _record_movement(disk.id, disk.stock - before, disk.stock, "external")
+            _update_next_id()
+            if local is None:
+                result.created += 1
+                _notify("create", disk.id)
+            else:
+                result.updated += 1
+                _notify("update", disk.id)
+        if pid:
+            _disk_rows[pid] = fingerprint(values)
+        elif local is not None:
+            # Its id cell was blanked: still the same product, so it isn't
+            # gone from the file; write the id back
+            seen.add(local.id)
+            _unsaved_ids.add(local.id)
+            numbered = True
+    gone = [key for key in _disk_rows if key not in seen]
+    doomed = []
+    for pid in gone:
+        del _disk_rows[pid]
+        local = _by_id.get(pid)
+        if local is None:
+            continue
+        if pid in _unsaved_ids:
+            _conflict(pid, local.sku, local, None, result)
+        else:
+            _record_movement(pid, -local.stock, 0, "external")
+            doomed.append(local)
+    if doomed:
+        _remove_products(doomed)
+        for p in doomed:
+            result.deleted += 1
+            _notify("delete", p.id)
+    return result, numbered
+
+def _conflict(pid: int, sku: str, local: Optional[Product], disk: Optional[Product], result: ExternalChanges):
+    if local is not None:
+        local = Product(local.id, local.name, local.sku, local.price, local.stock, local.reorder_level, local.supplier)
+    c = _conflicts[pid] = ExternalConflict(id=pid, sku=sku, local=local, disk=disk)
+    result.conflicts.append(c)
+    _notify("conflict", pid)
+
+def conflicts() -> List[ExternalConflict]:
+    return list(_conflicts.values())
+
+@_locked
+def resolve_conflicts(keep_local: bool, ids: Optional[List[int]] = None):
+    """Settle external-edit conflicts: keep our version (it gets saved) or take the file's."""
+    for pid in list(_conflicts if ids is None else ids):
+        c = _conflicts.pop(pid, None)
+        if c is None:
+            continue
+        p = _by_id.get(pid)
+        if keep_local:
+            _persist(_row_record(p) if p is not None else {"op": "delete", "id": pid})
+            continue
+        _unsaved_ids.discard(pid)
+        if c.disk is not None:
+            before = p.stock if p is not None else 0
+            _apply_record(_row_record(c.disk))
+            _record_movement(pid, c.disk.stock - before, c.disk.stock, "external")
+            _update_next_id()
+            _notify("update" if p is not None else "create", pid)
+        elif p is not None:
+            _remove_products([p])
+            _record_movement(pid, -p.stock, 0, "external")
+            _notify("delete", pid)
+
+def _save_all():
+    global _save_pending
+    if _autosaver is not None:
+        _autosaver.mark_dirty()
+    elif _save_deferred:
+        _save_pending = True
+    else:
+        save_to()
+
+@contextmanager
+def _deferred_saves():
+    """Hold back full saves until the block ends, then do at most one."""
+    global _save_deferred, _save_pending
+    with _lock.write():
+        _save_deferred += 1
+    try:
+        yield
+    finally:
+        with _lock.write():
+            _save_deferred -= 1
+            due = _save_pending and not _save_deferred
+            if due:
+                _save_pending = False
+        if due:
+            _save_all()
+
+@metrics.timed
+def checkpoint():
+    """Write a full CSV snapshot; save_to drops the journal it supersedes."""
+    save_to()
+
+def _in_txn() -> bool:
+    return bool(_txn_depth) and _txn_owner == threading.get_ident()
+
+def _persist(rec: dict, defer_save: bool = False) -> bool:
+    """Record a single mutation: a row write for SQLite, a journal append in
+    journal mode, else a full save.
+
+    With defer_save the caller only holds the read lock, so instead of saving
+    (which needs the write lock) return True and let it call _save_all()
+    once the lock is released.
+    """
+    if _in_txn():
+        _txn_records.append(rec)
+        return False
+    if _disk_rows is not None:
+        _unsaved_ids.add(rec["id"])
+    store = _row_store()
+    if store is not None:
+        store.apply([rec])
+        return False
+    if not _journal_enabled:
+        if defer_save and _autosaver is None:
+            return True
+        _save_all()
+        return False
+    j = _get_journal()
+    j.append(rec)
+    if _checkpoint_bytes and j.size() >= _checkpoint_bytes:
+        if defer_save:
+            return True
+        checkpoint()
+    return False
+
+def add_change_listener(callback: Callable[[str, Optional[int]], None]):
+    _change_listeners.append(callback)
+
+def remove_change_listener(callback: Callable[[str, Optional[int]], None]):
+    try:
+        _change_listeners.remove(callback)
+    except ValueError:
+        pass
+
+def _notify(kind: str, pid: Optional[int] = None):
+    """Tell change listeners about a mutation (deferred until commit in a transaction)."""
+    global _columns
+    # Stock and field edits patch the report columns; anything else drops them
+    cols = _columns
+    if cols is not None:
+        p = _by_id.get(pid) if kind == "update" and not _in_txn() else None
+        if p is None or not cols.patch(p):
+            _columns = None
+    if _in_txn():
+        _txn_events.append((kind, pid))
+        return
+    for cb in list(_change_listeners):
+        cb(kind, pid)
+
+def _touch(p: Product):
+    """Remember a product's pre-transaction values before mutating it."""
+    if _in_txn() and p.id not in _txn_originals:
+        _txn_originals[p.id] = (p, Product(p.id, p.name, p.sku, p.price, p.stock, p.reorder_level, p.supplier))
+
+def _add_product(p: Product):
+    """Append a new product to the catalog and its indexes."""
+    _products.append(p)
+    _index(p)
+    if _in_txn():
+        _txn_undo.append(("add", p))
+
+def _remove_products(doomed: List[Product]):
+    """Take products out of the catalog and its indexes."""
+    global _products
+    gone = {id(p) for p in doomed}
+    for p in doomed:
+        _unindex(p)
+    if _in_txn():
+        _txn_undo.append(("remove", [(i, p) for i, p in enumerate(_products) if id(p) in gone]))
+    _products = [p for p in _products if id(p) not in gone]
+
+def _rollback():
+    """Undo the open transaction's changes, touching only the products it changed."""
+    global _products, _next_id, _columns
+    added = {id(arg) for op, arg in _txn_undo if op == "add"}
+    changed = {id(p): p for p, _ in _txn_originals.values()}
+    for op, arg in _txn_undo:
+        for p in ([arg] if op == "add" else [p for _, p in arg]):
+            changed[id(p)] = p
+    # Out of the indexes under their current keys, back in under the old ones
+    for p in changed.values():
+        if _by_id.get(p.id) is p:
+            _unindex(p)
+    for p, orig in _txn_originals.values():
+        p.name, p.sku, p.price = orig.name, orig.sku, orig.price
+        p.stock, p.reorder_level, p.supplier = orig.stock, orig.reorder_level, orig.supplier
+    if _txn_undo:
+        products = list(_products)
+        for op, arg in reversed(_txn_undo):
+            if op == "add":
+                # Added products were appended, so they sit near the end
+                i = len(products) - 1
+                while products[i] is not arg:
+                    i -= 1
+                del products[i]
+            else:
+                for i, p in arg:
+                    products.insert(i, p)
+        _products = products
+    for key, p in changed.items():
+        if key not in added:
+            _index(p)
+    if changed:
+        # A report taken inside the transaction cached the undone values
+        _columns = None
+    _next_id = _txn_next_id
+
+@contextmanager
+def transaction():
+    """Group mutations so they are persisted once, or rolled back on error.
+
+    with transaction():
+        adjust_stock(1, -2)
+        adjust_stock(2, +5)
+
+    Nested transactions join the outermost one.
+    """
+    with _lock.write():
+        with _transaction():
+            yield
+
+@contextmanager
+def _transaction():
+    global _txn_depth, _txn_owner, _txn_next_id
+    if _txn_depth:
+        _txn_depth += 1
+        try:
+            yield
+        finally:
+            _txn_depth -= 1
+        return
+
+    _txn_depth = 1
+    _txn_owner = threading.get_ident()
+    _txn_next_id = _next_id
+    _txn_records.clear()
+    _txn_originals.clear()
+    _txn_undo.clear()
+    _txn_events.clear()
+    _txn_low.clear()
+    _txn_movements.clear()
+    try:
+        yield
+    except BaseException:
+        _rollback()
+        raise
+    else:
+        records = list(_txn_records)
+        events = list(_txn_events)
+        crossings = [(p, was_low) for p, was_low in _txn_low.values()
+                     if _by_id.get(p.id) is p and p.is_low_stock != was_low]
+        movements = list(_txn_movements)
+    finally:
+        _txn_depth = 0
+        _txn_owner = None
+        _txn_records.clear()
+        _txn_originals.clear()
+        _txn_undo.clear()
+        _txn_events.clear()
+        _txn_low.clear()
+        _txn_movements.clear()
+
+    if _disk_rows is not None:
+        _unsaved_ids.update(rec["id"] for rec in records)
+    try:
+        store = _row_store() if records else None
+        if store is not None:
+            store.apply(records)
+        elif records:
+            if not _journal_enabled:
+                _save_all()
+            else:
+                j = _get_journal()
+                for rec in records:
+                    j.append(rec)
+                j.flush()
+                if _checkpoint_bytes and j.size() >= _checkpoint_bytes:
+                    checkpoint()
+    finally:
+        # The changes stay in memory even if saving them failed, so their
+        # history and events must not be lost either
+        if movements:
+            _get_ledger().extend(movements)
+        for kind, pid in events:
+            _notify(kind, pid)
+        for p, was_low in crossings:
+            for cb in list(_low_stock_listeners):
+                cb(p, not was_low)
+
+def _row_record(p: Product) -> dict:
+    return {
+        "op": "put",
+        "id": p.id,
+        "name": p.name,
+        "sku": p.sku,
+        "price": p.price,
+        "stock": p.stock,
+        "reorder_level": p.reorder_level,
+        "supplier": p.supplier,
+    }
+
+def _apply_record(rec: dict):
+    """Replay one journal record onto the in-memory state."""
+    op = rec.get("op")
+    pid = rec.get("id")
+    p = _by_id.get(pid)
+    if op == "put":
+        if p is None:
+            _add_product(_make_product(pid, rec["name"], rec["sku"], float(rec["price"]), int(rec["stock"]),
+                                       int(rec["reorder_level"]), rec.get("supplier")))
+            return
+        _touch(p)
+        _unindex(p)
+        p.name = rec["name"]
+        p.sku = rec["sku"]
+        p.price = float(rec["price"])
+        p.stock = int(rec["stock"])
+        p.reorder_level = int(rec["reorder_level"])
+        p.supplier = rec.get("supplier")
+        _index(p)
+    elif op == "stock" and p is not None:
+        _touch(p)
+        p.stock = int(rec["stock"])
+        _track_low(p)
+    elif op == "delete" and p is not None:
+        _remove_products([p])
+
+def _sort_key(p: Product) -> tuple:
+    return (p.name.lower(), p.id)
+
+def _insert_sorted(p: Product):
+    key = _sort_key(p)
+    i = bisect.bisect_right(_sorted_keys, key)
+    _sorted_keys.insert(i, key)
+    _sorted_products.insert(i, p)
+    _sort_key_of[p.id] = key
+
+def _remove_sorted(p: Product):
+    key = _sort_key_of.pop(p.id, None)
+    if key is None:
+        return
+    i = bisect.bisect_left(_sorted_keys, key)
+    while i < len(_sorted_keys) and _sorted_keys[i] == key:
+        if _sorted_products[i] is p:
+            del _sorted_keys[i]
+            del _sorted_products[i]
+            return
+        i += 1
+
+def _reposition(p: Product):
+    """Move p in the name-ordered view after its name changed."""
+    if _sort_key_of.get(p.id) != _sort_key(p):
+        _remove_sorted(p)
+        _insert_sorted(p)
+
+def _track_low(p: Product):
+    if p.is_low_stock:
+        _low_ids.add(p.id)
+        if p.stock == 0:
+            _zero_ids.add(p.id)
+        else:
+            _zero_ids.discard(p.id)
+    else:
+        _low_ids.discard(p.id)
+        _zero_ids.discard(p.id)
+
+def _refresh_low(p: Product):
+    """Re-evaluate p after a stock/reorder change; notify on threshold crossings
+    (in a transaction, only of the net crossing once it commits)."""
+    was_low = p.id in _low_ids
+    _track_low(p)
+    if _in_txn():
+        if p.is_low_stock != was_low:
+            _txn_low.setdefault(p.id, (p, was_low))
+        return
+    if p.is_low_stock != was_low:
+        for cb in list(_low_stock_listeners):
+            cb(p, not was_low)
+
+def add_low_stock_listener(callback: Callable[[Product, bool], None]):
+    """Call callback(product, is_low) whenever a product crosses its reorder level."""
+    _low_stock_listeners.append(callback)
+
+def remove_low_stock_listener(callback: Callable[[Product, bool], None]):
+    try:
+        _low_stock_listeners.remove(callback)
+    except ValueError:
+        pass
+
+def _index(p: Product):
+    _by_id[p.id] = p
+    _by_sku[p.sku] = p
+    _insert_sorted(p)
+    _track_low(p)
+    if _search is not None:
+        _search.add(p)
+
+def _unindex(p: Product):
+    _by_id.pop(p.id, None)
+    if _by_sku.get(p.sku) is p:
+        del _by_sku[p.sku]
+    _remove_sorted(p)
+    _low_ids.discard(p.id)
+    _zero_ids.discard(p.id)
+    if _search is not None:
+        _search.remove(p.id)
+
+def _rebuild_indexes():
+    global _sorted_keys, _sorted_products, _search, _columns
+    _search = None
+    _columns = None
+    _by_id.clear()
+    _by_sku.clear()
+    _sort_key_of.clear()
+    _low_ids.clear()
+    _zero_ids.clear()
+    # Built in reverse so the first occurrence wins, matching the old linear scans
+    rev = _products[::-1]
+    _by_id.update(zip([p.id for p in rev], rev))
+    _by_sku.update(zip([p.sku for p in rev], rev))
+    keys = [(p.name.lower(), p.id) for p in _products]
+    _sort_key_of.update(zip([k[1] for k in reversed(keys)], reversed(keys)))
+    for p in _by_id.values():
+        if p.stock <= p.reorder_level:
+            _low_ids.add(p.id)
+            if p.stock == 0:
+                _zero_ids.add(p.id)
+    order = sorted(range(len(keys)), key=keys.__getitem__)
+    _sorted_keys = [keys[i] for i in order]
+    _sorted_products = [_products[i] for i in order]
+
 def _update_next_id():
     global _next_id
-    _next_id = (max((p.id for p in _products), default=0) + 1)
+    # Never moves back within a file, so a deleted product's id is not handed out again
+    _next_id = max(_next_id, max((p.id for p in _products), default=0) + 1)
+
+def _new_id() -> int:
+    global _next_id, _ledger_next_id
+    if _ledger_next_id is None:
+        _ledger_next_id = _get_ledger().max_product_id() + 1
+    pid = max(_next_id, _ledger_next_id)
+    _next_id = pid + 1
+    return pid
 
+@metrics.timed
 def load_from(path: Optional[str]):
     """Load products from CSV (or start empty if path is None)."""
-    global _products
+    # Don't lose debounced edits to the file we are about to leave
+    if _autosaver is not None and _autosaver.dirty:
+        _autosaver.flush()
+    with _lock.write():
+        _load_from(path)
+
+def _load_from(path: Optional[str]):
+    global _products, _store, _next_id
+    # The ledger file may have been replaced along with the catalog
+    _close_ledger()
+    _next_id = 1
+    if _store is not None:
+        _store = type(_store)()
     if path is None:
         _products = []
+        _rebuild_indexes()
         _update_next_id()
+        _unsaved_ids.clear()
+        _conflicts.clear()
+        _reset_disk_baseline(None)
+        _notify("reload")
         return
 
-    loaded: list[Product] = []
-    try:
-        with open(path, "r", newline="", encoding="utf-8") as f:
-            reader = csv.DictReader(f)
-            has_id = "id" in (reader.fieldnames or [])
-            for row in reader:
-                try:
-                    pid = int(row["id"]) if has_id and row.get("id") else None
-                    name = (row.get("name") or "").strip()
-                    sku = (row.get("sku") or "").strip().upper()
-                    price = float(row.get("price") or 0)
-                    stock = int(row.get("stock") or 0)
-                    reorder_level = int(row.get("reorder_level") or 0)
-                    supplier = (row.get("supplier") or "").strip() or None
-                except Exception:
-                    continue
-                if not name or not validate_sku(sku):
-                    continue
-                loaded.append(Product(
-                    id=pid or 0,
-                    name=name,
-                    sku=sku,
-                    price=price,
-                    stock=stock,
-                    reorder_level=reorder_level,
-                    supplier=supplier
-                ))
-    except FileNotFoundError:
-        loaded = []
-
-    # Fix ids if missing
-    next_id = 1
-    for p in loaded:
-        if not p.id or p.id < 0:
-            p.id = next_id
-            next_id += 1
-        else:
-            next_id = max(next_id, p.id + 1)
+    columns = None
+    backend = _backend_for(path)
+    if _snapshot_enabled and not backend.row_level:
+        from . import snapshot
+        if snapshot.is_fresh(path):
+            try:
+                columns = snapshot.read_snapshot(path)
+                if metrics.enabled():
+                    metrics.add_bytes("load_from", read=os.path.getsize(snapshot.snapshot_path(path)))
+            except (OSError, ValueError):
+                columns = None
+    if columns is None:
+        columns = backend.load()
+        if metrics.enabled() and os.path.exists(path):
+            metrics.add_bytes("load_from", read=os.path.getsize(path))
+    if backend is not _backend:
+        backend.close()
+    storage.assign_missing_ids(columns[0])
+    loaded = _make_products(*columns)
 
     _products = loaded
+    _rebuild_indexes()
     set_current_path(path)
+    _unsaved_ids.clear()
+    _conflicts.clear()
+    _reset_disk_baseline(path)
+    from .journal import journal_path, read_records
+    for rec in read_records(journal_path(path)):
+        _apply_record(rec)
     _update_next_id()
+    _notify("reload")
 
+@metrics.timed
 def save_to(path: Optional[str] = None):
-    """Write products to CSV (temp file then replace)."""
-    target = path or _current_path or _DEFAULT_PATH
-    os.makedirs(os.path.dirname(target) or ".", exist_ok=True)
-    dir_name = os.path.dirname(target) or "."
-    with tempfile.NamedTemporaryFile("w", delete=False, dir=dir_name, newline="", encoding="utf-8") as tmp:
-        writer = csv.DictWriter(tmp, fieldnames=_HEADERS)
-        writer.writeheader()
-        for p in sorted(_products, key=lambda x: x.name.lower()):
-            writer.writerow({
-                "id": p.id,
-                "name": p.name,
-                "sku": p.sku,
-                "price": f"{float(p.price):.2f}",
-                "stock": int(p.stock),
-                "reorder_level": int(p.reorder_level),
-                "supplier": p.supplier or "",
-            })
-        temp_name = tmp.name
-    os.replace(temp_name, target)
-    set_current_path(target)
-
-def export_csv(path: str):
-    save_to(path)
-
-def import_csv(path: str) -> int:
-    """Merge from CSV by SKU; overwrite fields and stock."""
+    """Write every product to path (or the current file) through its backend."""
+    if _watching and (path or _current_path) == _current_path:
+        check_external_changes()
+    with _lock.write(), _write_lock:
+        target = path or _current_path or _DEFAULT_PATH
+        if _conflicts and target == _current_path:
+            raise ExternalEditConflict("Resolve the conflicts with external edits before saving")
+        seq = _next_save_seq()
+        backend = _backend_for(target)
+        backend.save_all(_sorted_products)
+        if backend is not _backend:
+            backend.close()
+        if _snapshot_enabled and not backend.row_level:
+            from .snapshot import write_snapshot
+            write_snapshot(target, _sorted_products)
+        _count_written("save_to", target)
+        _written_seq[target] = seq
+        if target == _current_path:
+            _close_journal()
+            if _autosaver is not None:
+                _autosaver.mark_clean()
+        try:
+            from .journal import journal_path
+            os.remove(journal_path(target))
+        except FileNotFoundError:
+            pass
+        if target == _current_path and _disk_rows is not None:
+            _note_synced(target, _take_unsaved())
+        else:
+            set_current_path(target)
+            _unsaved_ids.clear()
+            _reset_disk_baseline(target)
+
+def iter_products(sort: bool = True, low_only: bool = False, supplier: Optional[str] = None,
+                  sku_prefix: Optional[str] = None, chunk_size: int = _EXPORT_CHUNK_SIZE) -> Iterator[Product]:
+    """Yield copies of matching products, by name (or storage order), a chunk at a time.
+
+    The lock is only held while copying each chunk, so edits can go on during
+    a long export. Sorted iteration resumes after the last sort key it gave
+    out and never repeats or skips a product that stays put; unsorted
+    iteration resumes by position and can shift if products are deleted.
+    """
+    supplier_key = supplier.strip().lower() if supplier else None
+    prefix = sku_prefix.strip().upper() if sku_prefix else None
+
+    def wanted(p: Product) -> bool:
+        if low_only and p.stock > p.reorder_level:
+            return False
+        if supplier_key is not None and (p.supplier or "").lower() != supplier_key:
+            return False
+        return prefix is None or p.sku.startswith(prefix)
+
+    pos = 0
+    last_key = None
+    while True:
+        with _lock.read():
+            if sort:
+                if last_key is not None:
+                    pos = bisect.bisect_right(_sorted_keys, last_key)
+                chunk = _sorted_products[pos:pos + chunk_size]
+                if chunk:
+                    last_key = _sort_key_of[chunk[-1].id]
+            else:
+                chunk = _products[pos:pos + chunk_size]
+                pos += len(chunk)
+            rows = [Product(p.id, p.name, p.sku, p.price, p.stock, p.reorder_level, p.supplier)
+                    for p in chunk if wanted(p)]
+        yield from rows
+        if len(chunk) < chunk_size:
+            return
+
+@metrics.timed
+def export_products(path: str, fmt: Optional[str] = None, *, sort: bool = True, low_only: bool = False,
+                    supplier: Optional[str] = None, sku_prefix: Optional[str] = None,
+                    compress: Optional[bool] = None) -> int:
+    """Stream matching products to path as CSV, JSON Lines or binary; returns the count.
+
+    The format defaults to the file extension and a ".gz" suffix gzips it
+    (see inventory.export). Unlike save_to, the current file is unchanged.
+    """
+    from . import export
     count = 0
+
+    def counted():
+        nonlocal count
+        for p in iter_products(sort, low_only, supplier, sku_prefix):
+            count += 1
+            yield p
+
+    written = export.write_export(path, counted(), fmt, compress)
+    if metrics.enabled():
+        metrics.add_bytes("export_products", written=written)
+    return count
+
+def export_csv(path: str) -> int:
+    return export_products(path, "csv")
+
+def _parse_import_row(row: dict) -> tuple:
+    """Normalize and validate one import row; raises ValueError with a reason."""
+    name = (row.get("name") or "").strip()
+    if not name:
+        raise ValueError("missing name")
+    sku = (row.get("sku") or "").strip().upper()
+    if not validate_sku(sku):
+        raise ValueError(f"invalid SKU {sku!r}")
     try:
-        with open(path, "r", newline="", encoding="utf-8") as f:
-            reader = csv.DictReader(f)
-            for row in reader:
-                name = (row.get("name") or "").strip()
-                sku = (row.get("sku") or "").strip().upper()
-                if not name or not validate_sku(sku):
-                    continue
-                price = float(row.get("price") or 0)
-                stock = int(row.get("stock") or 0)
-                reorder_level = int(row.get("reorder_level") or 0)
-                supplier = (row.get("supplier") or "").strip() or None
-                existing = _find_by_sku(sku)
-                if existing:
-                    existing.name = name
-                    existing.price = price
-                    existing.stock = stock
-                    existing.reorder_level = reorder_level
-                    existing.supplier = supplier
-                else:
-                    _add_new(name=name, sku=sku, price=price, stock=stock, reorder_level=reorder_level, supplier=supplier)
-                count += 1
-        save_to()
-        return count
-    except Exception:
-        return 0
+        price = float(row.get("price") or 0)
+        stock = int(row.get("stock") or 0)
+        reorder_level = int(row.get("reorder_level") or 0)
+    except (TypeError, ValueError):
+        raise ValueError("price, stock and reorder_level must be numeric")
+    if stock < 0 or reorder_level < 0:
+        raise ValueError("stock and reorder_level must be >= 0")
+    supplier = (row.get("supplier") or "").strip() or None
+    return name, sku, price, stock, reorder_level, supplier
 
-def list_products() -> List[Product]:
-    return list(sorted(_products, key=lambda p: p.name.lower()))
+def _merge_import_chunk(rows: list, result: ImportResult):
+    for name, sku, price, stock, reorder_level, supplier in rows:
+        existing = _by_sku.get(sku)
+        if existing:
+            _record_movement(existing.id, stock - existing.stock, stock, "import")
+            _touch(existing)
+            existing.name = name
+            existing.price = price
+            existing.stock = stock
+            existing.reorder_level = reorder_level
+            existing.supplier = supplier
+            _reposition(existing)
+            _refresh_low(existing)
+            if _search is not None:
+                _search.update(existing)
+            result.updated += 1
+            _notify("update", existing.id)
+        else:
+            existing = _add_new(name=name, sku=sku, price=price, stock=stock, reorder_level=reorder_level, supplier=supplier)
+            _record_movement(existing.id, existing.stock, existing.stock, "import")
+            result.created += 1
+            _notify("create", existing.id)
+        _persist(_row_record(existing))
+        result.applied += 1
+
+def iter_import_csv(path: str, chunk_size: int = _IMPORT_CHUNK_SIZE) -> Iterator[ImportResult]:
+    """Merge from CSV by SKU in chunks, yielding the running result after each.
+
+    Each chunk is merged in its own transaction, so memory stays bounded by
+    the chunk size and the lock is free between chunks. A failure rolls back
+    only the chunk being merged; closing the generator early keeps the
+    chunks merged so far. A full CSV save happens once, at the end.
+    """
+    result = ImportResult()
+    started = time.perf_counter()
+    with _deferred_saves(), open(path, "r", newline="", encoding="utf-8") as f:
+        reader = csv.DictReader(f)
+        chunk: list = []
+        for row in reader:
+            result.rows_read += 1
+            try:
+                chunk.append(_parse_import_row(row))
+            except ValueError as e:
+                result.rejected += 1
+                if len(result.errors) < _MAX_IMPORT_ERRORS:
+                    result.errors.append((reader.line_num, str(e)))
+            if result.rows_read % chunk_size == 0:
+                with transaction():
+                    _merge_import_chunk(chunk, result)
+                chunk = []
+                result.bytes_read = f.buffer.tell()
+                result.elapsed = time.perf_counter() - started
+                yield result
+        with transaction():
+            _merge_import_chunk(chunk, result)
+        result.bytes_read = f.buffer.tell()
+    result.elapsed = time.perf_counter() - started
+    # Timed here rather than by a decorator so the UI's chunked imports count too
+    metrics.record("import_csv", result.elapsed)
+    metrics.add_bytes("import_csv", read=result.bytes_read)
+    yield result
+
+def import_csv(path: str, chunk_size: int = _IMPORT_CHUNK_SIZE) -> ImportResult:
+    """Merge from CSV by SKU; overwrite fields and stock."""
+    result = ImportResult()
+    for result in iter_import_csv(path, chunk_size):
+        pass
+    return result
+
+@metrics.timed
+def list_products(offset: int = 0, limit: Optional[int] = None) -> List[Product]:
+    """Products in name order; pass offset/limit for one page (costs O(limit))."""
+    offset = max(offset, 0)
+    return _sorted_products[offset:] if limit is None else _sorted_products[offset:offset + limit]
+
+@metrics.timed
+def snapshot_products() -> List[Product]:
+    """Detached copies of every product in name order, taken atomically.
+
+    Unlike list_products() the result never changes under the caller, even
+    while other threads keep adjusting stock.
+    """
+    with _lock.write():
+        return [Product(p.id, p.name, p.sku, p.price, p.stock, p.reorder_level, p.supplier) for p in _sorted_products]
+
+def product_position(pid: int) -> int:
+    """Index of a product in the name-ordered catalog, or -1."""
+    key = _sort_key_of.get(pid)
+    if key is None:
+        return -1
+    return bisect.bisect_left(_sorted_keys, key)
+
+def product_count() -> int:
+    return len(_sorted_products)
+
+def list_low_stock(offset: int = 0, limit: Optional[int] = None) -> List[Product]:
+    """Low-stock products in name order; a page only sorts offset + limit of them."""
+    offset = max(offset, 0)
+    # The read lock keeps deletes out; adjust_stock still runs under it and
+    # may resize the set, so iterate over a copy
+    with _lock.read():
+        low = [_by_id[i] for i in _low_ids.copy()]
+    if limit is None:
+        return sorted(low, key=_sort_key)[offset:]
+    return heapq.nsmallest(offset + limit, low, key=_sort_key)[offset:]
+
+def _name_prefix_range(prefix: str) -> tuple[int, int]:
+    """Bounds of the names starting with prefix in the name-ordered view."""
+    lo = bisect.bisect_left(_sorted_keys, (prefix,))
+    hi = bisect.bisect_left(_sorted_keys, (prefix + "\U0010ffff",), lo)
+    return lo, hi
+
+@metrics.timed
+def search(query: str = "", supplier: Optional[str] = None, low_only: bool = False, limit: Optional[int] = None) -> List[Product]:
+    """Products whose name or SKU matches query, optionally by supplier, in name order.
+
+    Queries of 3+ characters match anywhere (case-insensitive); shorter ones
+    match the start of the name or SKU.
+    """
+    global _search
+    from .search import SearchIndex
+    while True:
+        # Queries only read, so they run side by side (and beside adjust_stock)
+        with _lock.read():
+            index = _search
+            if index is not None:
+                return _query(index, query, supplier, low_only, limit)
+        # Built once under the write lock; a load may drop it again meanwhile
+        with _lock.write():
+            if _search is None:
+                _search = SearchIndex(_by_id.values())
+
+def _query(index: "SearchIndex", query: str, supplier: Optional[str], low_only: bool, limit: Optional[int]) -> List[Product]:
+    q = query.strip()
+    ids = None
+    ordered: List[Product] = []
+    if q:
+        ids = index.match_ids(q)
+        if index.is_short(q):
+            # Name-prefix hits are a contiguous, already ordered slice
+            lo, hi = _name_prefix_range(q.lower())
+            ordered = _sorted_products[lo:hi]
+            ids = ids - {p.id for p in ordered}
+    if supplier is not None:
+        by_supplier = index.supplier_ids(supplier)
+        if ids is None:
+            ids = by_supplier
+        else:
+            ids = ids & by_supplier
+            ordered = [p for p in ordered if p.id in by_supplier]
+    if low_only:
+        # adjust_stock resizes the set under the read lock too
+        low = _low_ids.copy()
+        if ids is None:
+            ids = low
+        else:
+            ids = ids & low
+            ordered = [p for p in ordered if p.id in low]
+    if ids is None:
+        return list_products()[:limit] if limit is not None else list_products()
+    if len(ids) > len(_sorted_products) // 8:
+        # Big hit sets: filtering the ordered view beats sorting them
+        extra = [p for p in _sorted_products if p.id in ids]
+    else:
+        extra = sorted((_by_id[i] for i in ids), key=_sort_key)
+    found = list(heapq.merge(ordered, extra, key=_sort_key)) if ordered else extra
+    return found[:limit] if limit is not None else found
+
+def _report_columns() -> analytics.ProductColumns:
+    global _columns
+    if _columns is None:
+        _columns = analytics.ProductColumns(_products, _store)
+    return _columns
+
+@metrics.timed
+@_locked
+def valuation_report() -> ValuationReport:
+    """Catalog totals (units, stock x price value, low/zero stock), overall and per supplier."""
+    return analytics.valuation(_report_columns())
+
+@metrics.timed
+@_locked
+def reorder_report(cover: float = 2.0, limit: Optional[int] = None) -> List[ReorderLine]:
+    """Low-stock products with how many units to order, biggest order first.
 
-def list_low_stock() -> List[Product]:
-    return [p for p in list_products() if p.is_low_stock]
+    The suggestion restocks to `cover` times the reorder level (and always
+    above it, so a reorder level of 0 still suggests one unit).
+    """
+    return analytics.reorder_lines(_report_columns(), cover, _by_id.__getitem__, limit)
+
+def low_stock_count() -> int:
+    return len(_low_ids)
+
+def zero_stock_count() -> int:
+    return len(_zero_ids)
 
 def get_product(pid: int) -> Optional[Product]:
-    for p in _products:
-        if p.id == pid:
-            return p
-    return None
+    return _by_id.get(pid)
 
 def _find_by_sku(sku: str) -> Optional[Product]:
-    su = sku.strip().upper()
-    for p in _products:
-        if p.sku.upper() == su:
-            return p
-    return None
+    return _by_sku.get(sku.strip().upper())
 
 def _add_new(name: str, sku: str, price: float, stock: int, reorder_level: int, supplier: Optional[str]) -> Product:
-    global _next_id
-    new = Product(
-        id=_next_id,
+    new = _make_product(
+        id=_new_id(),
         name=name.strip(),
         sku=sku.strip().upper(),
         price=float(price),
@@ -165,10 +1344,11 @@ def _add_new(name: str, sku: str, price: float, stock: int, reorder_level: int,
         reorder_level=int(reorder_level),
         supplier=(supplier or None),
     )
-    _products.append(new)
-    _next_id += 1
+    _add_product(new)
     return new
 
+@metrics.timed
+@_locked
 def create_product(name: str, sku: str, price: float = 0.0, stock: int = 0, reorder_level: int = 0, supplier: Optional[str] = None) -> int:
     if not validate_sku(sku):
         raise InvalidSKUError("SKU must be 4-20 chars (A-Z, 0-9, -)")
@@ -177,13 +1357,20 @@ def create_product(name: str, sku: str, price: float = 0.0, stock: int = 0, reor
     if _find_by_sku(sku):
         raise ValueError("SKU already exists")
     p = _add_new(name, sku, price, stock, reorder_level, supplier)
-    save_to()
+    _record_movement(p.id, p.stock, p.stock, "create")
+    _persist(_row_record(p))
+    _notify("create", p.id)
     return p.id
 
+@metrics.timed
+@_locked
 def update_product(pid: int, *, name: Optional[str] = None, sku: Optional[str] = None, price: Optional[float] = None, reorder_level: Optional[int] = None, supplier: Optional[str] = None):
     p = get_product(pid)
     if not p:
         raise ValueError("Product not found")
+    if reorder_level is not None and reorder_level < 0:
+        raise ValueError("Reorder level must be >= 0")
+    _touch(p)
     if sku is not None:
         su = sku.strip().upper()
         if not validate_sku(su):
@@ -191,35 +1378,140 @@ def update_product(pid: int, *, name: Optional[str] = None, sku: Optional[str] =
         other = _find_by_sku(su)
         if other and other.id != pid:
             raise ValueError("Another product already uses this SKU")
-        p.sku = su
+        if su != p.sku:
+            _unindex(p)
+            p.sku = su
+            _index(p)
     if name is not None:
         p.name = name.strip()
+        _reposition(p)
     if price is not None:
         p.price = float(price)
     if reorder_level is not None:
-        if reorder_level < 0:
-            raise ValueError("Reorder level must be >= 0")
         p.reorder_level = int(reorder_level)
+        _refresh_low(p)
     if supplier is not None:
         p.supplier = supplier.strip() or None
-    save_to()
+    if _search is not None:
+        _search.update(p)
+    _persist(_row_record(p))
+    _notify("update", pid)
 
+@metrics.timed
+@_locked
 def delete_product(pid: int):
-    global _products
-    before = len(_products)
-    _products = [p for p in _products if p.id != pid]
-    if len(_products) == before:
+    p = _by_id.get(pid)
+    if not p:
         raise ValueError("Product not found")
-    save_to()
+    _remove_products([p])
+    _record_movement(pid, -p.stock, 0, "delete")
+    _persist({"op": "delete", "id": pid})
+    _notify("delete", pid)
 
-def adjust_stock(pid: int, delta: int):
+@metrics.timed
+def adjust_stock(pid: int, delta: int, reason: str = "adjust"):
+    """Change a product's stock by delta; reason is logged in the stock ledger
+    (at most 12 ASCII characters, longer ones raise ValueError)."""
+    from .ledger import check_reason
     if not isinstance(delta, int):
         raise ValueError("Delta must be an integer")
-    p = get_product(pid)
-    if not p:
-        raise ValueError("Product not found")
-    new_stock = p.stock + delta
-    if new_stock < 0:
-        raise NegativeStockError("Stock cannot be negative")
-    p.stock = new_stock
-    save_to()
\ No newline at end of file
+    check_reason(reason)
+    # Concurrent adjustments of different products don't block each other
+    with _lock.read():
+        p = get_product(pid)
+        if not p:
+            raise ValueError("Product not found")
+        with _stock_locks.for_key(pid):
+            new_stock = p.stock + delta
+            if new_stock < 0:
+                raise NegativeStockError("Stock cannot be negative")
+            _touch(p)
+            p.stock = new_stock
+            _refresh_low(p)
+            _record_movement(pid, delta, new_stock, reason)
+            # Records hold absolute stock, so they must reach the journal or
+            # row store in the same order as the changes they describe
+            save_due = _persist({"op": "stock", "id": pid, "stock": new_stock}, defer_save=True)
+        _notify("update", pid)
+    if save_due:
+        if _journal_enabled:
+            checkpoint()
+        else:
+            _save_all()
+
+@metrics.timed
+def adjust_stock_bulk(rows: Iterable[tuple], reason: str = "bulk", strict: bool = False) -> BulkAdjustResult:
+    """Apply many (sku, delta) adjustments as one batch with a single save.
+
+    Every row is checked first, in order, against the stock left by the rows
+    before it: bad deltas, unknown SKUs and changes that would go below zero
+    are rejected and reported by row number (1-based). The rest are applied
+    in one transaction, or none at all if strict and anything was rejected.
+    The reason follows the adjust_stock() rules and is checked before any row.
+    """
+    from .ledger import check_reason
+    check_reason(reason)
+    result = BulkAdjustResult()
+    find = _by_sku.get
+    with _lock.write():
+        stocks: dict[int, int] = {}
+        moves = []
+        for n, (sku, delta) in enumerate(rows, 1):
+            if type(delta) is int:
+                d = delta
+            else:
+                # Text from a file; anything else (floats, bools) is rejected
+                try:
+                    d = int(delta.strip())
+                except (AttributeError, ValueError):
+                    _reject(result, n, f"Invalid delta {delta!r}")
+                    continue
+            p = find(sku) or find(sku.strip().upper())
+            if p is None:
+                _reject(result, n, f"Unknown SKU {sku!r}")
+                continue
+            pid = p.id
+            new_stock = stocks.get(pid, p.stock) + d
+            if new_stock < 0:
+                _reject(result, n, f"Stock of {p.sku} cannot go below zero")
+                continue
+            stocks[pid] = new_stock
+            moves.append((pid, d, new_stock))
+        if strict and result.rejected:
+            return result
+        now = time.time()
+        with _transaction():
+            for pid, new_stock in stocks.items():
+                p = _by_id[pid]
+                _touch(p)
+                p.stock = new_stock
+                _refresh_low(p)
+                _persist({"op": "stock", "id": pid, "stock": new_stock})
+                _notify("update", pid)
+            _txn_movements.extend((now, pid, d, after, reason) for pid, d, after in moves if d)
+        result.applied = len(moves)
+        result.products = len(stocks)
+    return result
+
+def _reject(result: BulkAdjustResult, row: int, reason: str):
+    result.rejected += 1
+    if len(result.errors) < _MAX_IMPORT_ERRORS:
+        result.errors.append((row, reason))
+
+@metrics.timed
+def stock_history(pid: int, since: Optional[float] = None, until: Optional[float] = None) -> List[StockMovement]:
+    """Recorded stock movements of a product, oldest first (times in epoch seconds)."""
+    return _get_ledger().history(pid, since, until)
+
+@metrics.timed
+def stock_as_of(pid: int, at: float) -> Optional[int]:
+    """Stock of a product at time `at` (epoch seconds), from the ledger.
+
+    Products the ledger never saw moving report their current stock, or None
+    if they don't exist.
+    """
+    stock = _get_ledger().stock_at(pid, at)
+    if stock is None:
+        p = _by_id.get(pid)
+        return p.stock if p is not None else None
+    return stock
@@ -0,0 +1,80 @@
+import json
+import os
+import threading
+from typing import Iterator
+from . import metrics
+
+# Journal records are one compact JSON object per line, e.g.
+#   {"op":"stock","id":3,"stock":12}
+# Values are absolute (not deltas) so replaying a record twice is harmless.
+
+def journal_path(csv_path: str) -> str:
+    return csv_path + ".journal"
+
+def read_records(path: str) -> Iterator[dict]:
+    """Yield records from a journal file; stop at a torn/partial last line."""
+    try:
+        f = open(path, "r", encoding="utf-8")
+    except FileNotFoundError:
+        return
+    with f:
+        for line in f:
+            if not line.endswith("\n"):
+                break
+            try:
+                rec = json.loads(line)
+            except ValueError:
+                break
+            yield rec
+
+class Journal:
+    """Append-only mutation log sitting next to a CSV snapshot."""
+
+    def __init__(self, path: str, fsync_every: int = 1):
+        self.path = path
+        self.fsync_every = fsync_every
+        self._file = None
+        self._pending = 0
+        # Appends may come from several threads at once (see adjust_stock)
+        self._mutex = threading.RLock()
+
+    def _open(self):
+        if self._file is None:
+            os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+            self._file = open(self.path, "a", encoding="utf-8")
+        return self._file
+
+    def append(self, rec: dict):
+        line = json.dumps(rec, separators=(",", ":")) + "\n"
+        with self._mutex:
+            self._open().write(line)
+            metrics.add_bytes("journal", written=len(line))
+            self._pending += 1
+            if self.fsync_every and self._pending >= self.fsync_every:
+                self.flush()
+
+    @metrics.timed(name="journal_flush")
+    def flush(self):
+        with self._mutex:
+            if self._file is None:
+                return
+            self._file.flush()
+            if self._pending:
+                os.fsync(self._file.fileno())
+            self._pending = 0
+
+    def size(self) -> int:
+        with self._mutex:
+            if self._file is not None:
+                self._file.flush()
+            try:
+                return os.path.getsize(self.path)
+            except FileNotFoundError:
+                return 0
+
+    def close(self):
+        with self._mutex:
+            if self._file is not None:
+                self.flush()
+                self._file.close()
+                self._file = None
@@ -0,0 +1,202 @@
+import bisect
+import os
+import struct
+import threading
+import time
+from array import array
+from typing import Dict, Iterable, List, Optional, Tuple
+from . import metrics
+from .models import StockMovement
+
+# Stock ledger written next to the CSV (<csv>.ledger): the magic "INVLEDG1"
+# followed by fixed-size little-endian records
+#
+#   at (f64 seconds), product id (i64), delta (i64), stock after (i64),
+#   reason (12 bytes ASCII, NUL padded)
+#
+# Reasons are short codes ("sale", "restock"): longer or non-ASCII ones are
+# rejected rather than cut down, see check_reason().
+#
+# Every record carries the balance it left behind, so each one doubles as a
+# checkpoint: the stock at any time is one bisect over that product's
+# timestamps, never a replay. The file is append-only; a torn last record
+# (crash mid-write) is ignored.
+
+_MAGIC = b"INVLEDG1"
+MAX_REASON = 12
+_RECORD = struct.Struct(f"<dqqq{MAX_REASON}s")
+# Just the product id of a record
+_PID = struct.Struct("<8xq28x")
+
+# (at, product id, delta, stock after, reason)
+Entry = Tuple[float, int, int, int, str]
+
+def check_reason(reason: str):
+    """Raise ValueError unless reason fits a record (MAX_REASON ASCII characters)."""
+    if not isinstance(reason, str) or not reason.isascii() or len(reason) > MAX_REASON:
+        raise ValueError(f"Reason must be at most {MAX_REASON} ASCII characters: {reason!r}")
+
+def ledger_path(csv_path: str) -> str:
+    return csv_path + ".ledger"
+
+class Ledger:
+    """Append-only history of stock movements with per-product time indexes."""
+
+    def __init__(self, path: str):
+        self.path = path
+        self._file = None
+        self._last_at = 0.0
+        # Columns of every record in file order, read on the first query
+        self._loaded = False
+        self._at = array("d")
+        self._delta = array("q")
+        self._after = array("q")
+        self._reason: List[str] = []
+        # product id -> (timestamps, record numbers), both ascending
+        self._by_product: Dict[int, Tuple[array, array]] = {}
+        # Highest product id on file, read on the first max_product_id()
+        self._max_pid: Optional[int] = None
+        # Appends come from several threads at once (see adjust_stock)
+        self._mutex = threading.Lock()
+
+    def _open(self):
+        if self._file is None:
+            os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+            f = open(self.path, "a+b")
+            end = f.seek(0, os.SEEK_END)
+            if end == 0:
+                f.write(_MAGIC)
+            else:
+                # Drop a torn last record so new ones stay aligned
+                end -= (end - len(_MAGIC)) % _RECORD.size
+                f.truncate(end)
+                if end > len(_MAGIC):
+                    f.seek(end - _RECORD.size)
+                    self._last_at = max(self._last_at, _RECORD.unpack(f.read(_RECORD.size))[0])
+            self._file = f
+        return self._file
+
+    def _load(self):
+        if self._loaded:
+            return
+        self._loaded = True
+        if self._file is not None:
+            self._file.flush()
+        try:
+            with open(self.path, "rb") as f:
+                data = f.read()
+        except FileNotFoundError:
+            return
+        metrics.add_bytes("ledger", read=len(data))
+        if data[:len(_MAGIC)] != _MAGIC:
+            return
+        body = memoryview(data)[len(_MAGIC):]
+        body = body[:len(body) - len(body) % _RECORD.size]
+        for rec in _RECORD.iter_unpack(body):
+            self._index(*rec)
+
+    def _index(self, at: float, pid: int, delta: int, after: int, reason):
+        n = len(self._at)
+        self._at.append(at)
+        self._delta.append(delta)
+        self._after.append(after)
+        self._reason.append(reason.rstrip(b"\0").decode("ascii", "replace") if isinstance(reason, bytes) else reason)
+        times, rows = self._by_product.get(pid) or self._by_product.setdefault(pid, (array("d"), array("q")))
+        times.append(at)
+        rows.append(n)
+        if at > self._last_at:
+            self._last_at = at
+
+    def extend(self, entries: Iterable[Entry]):
+        """Append movements; timestamps never go backwards in the file."""
+        with self._mutex:
+            f = self._open()
+            chunks = []
+            pack = _RECORD.pack
+            encoded: Dict[str, bytes] = {}
+            last = self._last_at
+            for at, pid, delta, after, reason in entries:
+                if at < last:
+                    at = last
+                last = at
+                code = encoded.get(reason)
+                if code is None:
+                    check_reason(reason)
+                    code = encoded[reason] = reason.encode("ascii")
+                chunks.append(pack(at, pid, delta, after, code))
+                if self._loaded:
+                    self._index(at, pid, delta, after, code)
+                if self._max_pid is not None and pid > self._max_pid:
+                    self._max_pid = pid
+            self._last_at = last
+            if not chunks:
+                return
+            data = b"".join(chunks)
+            f.write(data)
+            f.flush()
+            metrics.add_bytes("ledger", written=len(data))
+
+    def append(self, pid: int, delta: int, after: int, reason: str, at: Optional[float] = None):
+        self.extend([(time.time() if at is None else at, pid, delta, after, reason)])
+
+    def _movement(self, pid: int, row: int) -> StockMovement:
+        return StockMovement(at=self._at[row], product_id=pid, delta=self._delta[row],
+                             stock=self._after[row], reason=self._reason[row])
+
+    def history(self, pid: int, since: Optional[float] = None, until: Optional[float] = None) -> List[StockMovement]:
+        """Movements of one product, oldest first, optionally within [since, until]."""
+        with self._mutex:
+            self._load()
+            entry = self._by_product.get(pid)
+            if entry is None:
+                return []
+            times, rows = entry
+            lo = 0 if since is None else bisect.bisect_left(times, since)
+            hi = len(times) if until is None else bisect.bisect_right(times, until)
+            return [self._movement(pid, rows[i]) for i in range(lo, hi)]
+
+    def stock_at(self, pid: int, at: float) -> Optional[int]:
+        """Stock of a product just after time `at`; None if the ledger never saw it."""
+        with self._mutex:
+            self._load()
+            entry = self._by_product.get(pid)
+            if entry is None:
+                return None
+            times, rows = entry
+            i = bisect.bisect_right(times, at)
+            if i == 0:
+                # Before its first movement: what that movement started from
+                first = rows[0]
+                return self._after[first] - self._delta[first]
+            return self._after[rows[i - 1]]
+
+    def max_product_id(self) -> int:
+        """Highest product id with any movement, deleted products included (0 if none)."""
+        with self._mutex:
+            if self._max_pid is None:
+                if self._loaded:
+                    self._max_pid = max(self._by_product, default=0)
+                else:
+                    self._max_pid = self._scan_max_pid()
+            return self._max_pid
+
+    def _scan_max_pid(self) -> int:
+        if self._file is not None:
+            self._file.flush()
+        try:
+            with open(self.path, "rb") as f:
+                data = f.read()
+        except FileNotFoundError:
+            return 0
+        metrics.add_bytes("ledger", read=len(data))
+        if data[:len(_MAGIC)] != _MAGIC:
+            return 0
+        body = memoryview(data)[len(_MAGIC):]
+        body = body[:len(body) - len(body) % _RECORD.size]
+        return max((pid for pid, in _PID.iter_unpack(body)), default=0)
+
+    def close(self):
+        with self._mutex:
+            if self._file is not None:
+                self._file.close()
+                self._file = None
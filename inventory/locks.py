@@ -0,0 +1,77 @@
+import threading
+from contextlib import contextmanager
+
+class RWLock:
+    """Reentrant readers-writer lock with writer preference.
+
+    Many threads may hold read() at once; write() is exclusive. A thread that
+    holds write() may also enter read() or write() again. Upgrading a read
+    lock to a write lock is not supported (it would deadlock) and raises.
+    """
+
+    def __init__(self):
+        self._cond = threading.Condition(threading.Lock())
+        self._readers: dict[int, int] = {}
+        self._writer = None
+        self._write_depth = 0
+        self._waiting_writers = 0
+
+    @contextmanager
+    def read(self):
+        me = threading.get_ident()
+        with self._cond:
+            if self._writer == me:
+                owned = True
+            else:
+                owned = False
+                if me not in self._readers:
+                    while self._writer is not None or self._waiting_writers:
+                        self._cond.wait()
+                self._readers[me] = self._readers.get(me, 0) + 1
+        try:
+            yield
+        finally:
+            if not owned:
+                with self._cond:
+                    depth = self._readers[me] - 1
+                    if depth:
+                        self._readers[me] = depth
+                    else:
+                        del self._readers[me]
+                        if not self._readers:
+                            self._cond.notify_all()
+
+    @contextmanager
+    def write(self):
+        me = threading.get_ident()
+        with self._cond:
+            if self._writer == me:
+                self._write_depth += 1
+            else:
+                if me in self._readers:
+                    raise RuntimeError("Cannot upgrade a read lock to a write lock")
+                self._waiting_writers += 1
+                try:
+                    while self._writer is not None or self._readers:
+                        self._cond.wait()
+                finally:
+                    self._waiting_writers -= 1
+                self._writer = me
+                self._write_depth = 1
+        try:
+            yield
+        finally:
+            with self._cond:
+                self._write_depth -= 1
+                if not self._write_depth:
+                    self._writer = None
+                    self._cond.notify_all()
+
+class ShardedLocks:
+    """A fixed pool of plain locks; keys hash onto one of them."""
+
+    def __init__(self, shards: int = 64):
+        self._locks = [threading.Lock() for _ in range(shards)]
+
+    def for_key(self, key) -> threading.Lock:
+        return self._locks[hash(key) % len(self._locks)]
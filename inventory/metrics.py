@@ -0,0 +1,116 @@
+import functools
+import threading
+import time
+from contextlib import contextmanager
+from typing import Dict, Optional
+
+# Per-operation counters, off unless enable() is called (init_storage does so
+# when INVENTORY_METRICS is set). When off, timed() wrappers cost one global
+# check per call and timer()/add_bytes() return immediately.
+_enabled: bool = False
+_mutex = threading.Lock()
+_stats: Dict[str, "OpStats"] = {}
+
+class OpStats:
+    __slots__ = ("calls", "errors", "total", "max", "bytes_read", "bytes_written")
+
+    def __init__(self):
+        self.calls = 0
+        self.errors = 0
+        self.total = 0.0
+        self.max = 0.0
+        self.bytes_read = 0
+        self.bytes_written = 0
+
+    def as_dict(self) -> dict:
+        return {
+            "calls": self.calls,
+            "errors": self.errors,
+            "total_s": self.total,
+            "mean_s": self.total / self.calls if self.calls else 0.0,
+            "max_s": self.max,
+            "bytes_read": self.bytes_read,
+            "bytes_written": self.bytes_written,
+        }
+
+def enable(enabled: bool = True):
+    global _enabled
+    _enabled = enabled
+
+def enabled() -> bool:
+    return _enabled
+
+def reset():
+    with _mutex:
+        _stats.clear()
+
+def _entry(name: str) -> OpStats:
+    st = _stats.get(name)
+    if st is None:
+        st = _stats[name] = OpStats()
+    return st
+
+def record(name: str, elapsed: float, failed: bool = False):
+    if not _enabled:
+        return
+    with _mutex:
+        st = _entry(name)
+        st.calls += 1
+        st.total += elapsed
+        if elapsed > st.max:
+            st.max = elapsed
+        if failed:
+            st.errors += 1
+
+def add_bytes(name: str, read: int = 0, written: int = 0):
+    if not _enabled:
+        return
+    with _mutex:
+        st = _entry(name)
+        st.bytes_read += read
+        st.bytes_written += written
+
+@contextmanager
+def timer(name: str):
+    """Time a block under `name` (e.g. a UI refresh)."""
+    if not _enabled:
+        yield
+        return
+    start = time.perf_counter()
+    failed = True
+    try:
+        yield
+        failed = False
+    finally:
+        record(name, time.perf_counter() - start, failed)
+
+def timed(fn=None, *, name: Optional[str] = None):
+    """Decorator form of timer(); the operation name defaults to the function name."""
+    if fn is None:
+        return functools.partial(timed, name=name)
+    op = name or fn.__name__
+
+    @functools.wraps(fn)
+    def wrapper(*args, **kwargs):
+        if not _enabled:
+            return fn(*args, **kwargs)
+        start = time.perf_counter()
+        failed = True
+        try:
+            result = fn(*args, **kwargs)
+            failed = False
+            return result
+        finally:
+            record(op, time.perf_counter() - start, failed)
+    return wrapper
+
+def snapshot() -> Dict[str, dict]:
+    with _mutex:
+        return {name: st.as_dict() for name, st in sorted(_stats.items())}
+
+def export_json(path: str):
+    import json
+    data = {"enabled": _enabled, "exported": time.time(), "operations": snapshot()}
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump(data, f, indent=2)
+        f.write("\n")
@@ -1,7 +1,7 @@
-from dataclasses import dataclass
-from typing import Optional
+from dataclasses import dataclass, field
+from typing import List, Optional, Tuple
 
-@dataclass
+@dataclass(slots=True)
 class Product:
     id: int
     name: str
@@ -13,4 +13,90 @@ class Product:
 
     @property
     def is_low_stock(self) -> bool:
-        return self.stock <= self.reorder_level
\ No newline at end of file
+        return self.stock <= self.reorder_level
+
+@dataclass
+class ImportResult:
+    applied: int = 0
+    created: int = 0
+    updated: int = 0
+    rejected: int = 0
+    # (line number, reason); capped so huge bad feeds stay bounded in memory
+    errors: List[Tuple[int, str]] = field(default_factory=list)
+    rows_read: int = 0
+    bytes_read: int = 0
+    elapsed: float = 0.0
+
+@dataclass
+class BulkAdjustResult:
+    applied: int = 0
+    # Distinct products the applied rows touched
+    products: int = 0
+    rejected: int = 0
+    # (row number, reason); capped like ImportResult.errors
+    errors: List[Tuple[int, str]] = field(default_factory=list)
+
+@dataclass
+class SaveStatus:
+    # "idle", "pending", "saving" or "error"
+    state: str = "idle"
+    last_saved: Optional[float] = None
+    error: Optional[str] = None
+
+@dataclass
+class SupplierTotals:
+    supplier: Optional[str]
+    products: int = 0
+    units: int = 0
+    # Sum of stock * price
+    value: float = 0.0
+    low_stock: int = 0
+
+@dataclass
+class ValuationReport:
+    products: int = 0
+    units: int = 0
+    value: float = 0.0
+    low_stock: int = 0
+    zero_stock: int = 0
+    # Largest value first
+    by_supplier: List[SupplierTotals] = field(default_factory=list)
+
+@dataclass
+class ReorderLine:
+    id: int
+    name: str
+    sku: str
+    supplier: Optional[str]
+    stock: int
+    reorder_level: int
+    # Units to order to get back to the target level, and what they cost
+    suggested: int = 0
+    cost: float = 0.0
+
+@dataclass
+class ExternalConflict:
+    id: int
+    sku: str
+    # None on either side means the product was deleted there
+    local: Optional[Product] = None
+    disk: Optional[Product] = None
+
+@dataclass
+class ExternalChanges:
+    created: int = 0
+    updated: int = 0
+    deleted: int = 0
+    # Rows that failed validation or reuse another product's SKU
+    skipped: int = 0
+    conflicts: List[ExternalConflict] = field(default_factory=list)
+
+@dataclass
+class StockMovement:
+    # Seconds since the epoch, like SaveStatus.last_saved
+    at: float
+    product_id: int
+    delta: int
+    # Stock right after this movement
+    stock: int
+    reason: str = ""
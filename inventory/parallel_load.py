@@ -0,0 +1,99 @@
+import csv
+import io
+import os
+import re
+from concurrent.futures import ProcessPoolExecutor
+from typing import List, Optional, Tuple
+from .csvrows import Columns, empty_columns, parse_rows, read_columns
+
+# Parallel CSV loading: the parent finds row boundaries, worker processes
+# parse and validate byte ranges, and the column lists are concatenated back
+# in file order so the result matches read_columns() exactly.
+#
+# Boundaries come from counting quotes, which is only right while every '"'
+# belongs to a properly quoted field. A literal quote in an unquoted field
+# (1,12" ruler,...) throws the count off, so each worker checks its range and
+# any stray quote sends the whole load back to the serial reader.
+
+_BLOCK = 1 << 20
+# A quoted field: opens at the start of a field, closes right before one ends
+# (the lookbehind sits after the quote so the search can jump from quote to quote)
+_QUOTED = re.compile(r'"(?<![^,\n]")[^"]*(?:""[^"]*)*"(?![^,\r\n])')
+
+def _next_row_end(f, pos: int, quotes: int) -> Tuple[int, int]:
+    """Offset just past the first newline at/after pos that ends a CSV row.
+
+    quotes is the number of '"' bytes before pos. Inside a quoted field the
+    running count is odd (escaped "" adds two), so only newlines reached with
+    an even count are real row boundaries. Returns (offset, quotes before it);
+    offset is the file size if no boundary follows.
+    """
+    f.seek(pos)
+    while True:
+        block = f.read(_BLOCK)
+        if not block:
+            return pos, quotes
+        start = 0
+        while True:
+            nl = block.find(b"\n", start)
+            if nl < 0:
+                quotes += block.count(b'"', start)
+                pos += len(block)
+                break
+            quotes += block.count(b'"', start, nl)
+            if quotes % 2 == 0:
+                return pos + nl + 1, quotes
+            start = nl + 1
+
+def split_rows(path: str, parts: int) -> Tuple[List[str], List[Tuple[int, int]]]:
+    """Read the header and cut the rest of the file into ~equal row-aligned ranges."""
+    size = os.path.getsize(path)
+    with open(path, "rb") as f:
+        body_start, quotes = _next_row_end(f, 0, 0)
+        f.seek(0)
+        header = f.read(body_start).decode("utf-8")
+        fieldnames = next(csv.reader(io.StringIO(header, newline="")), None) or []
+
+        ranges = []
+        start = body_start
+        step = max((size - body_start) // max(parts, 1), 1)
+        while start < size:
+            target = start + step
+            if target >= size:
+                end = size
+            else:
+                f.seek(start)
+                quotes += f.read(target - start).count(b'"')
+                end, quotes = _next_row_end(f, target, quotes)
+            ranges.append((start, end))
+            start = end
+    return fieldnames, ranges
+
+def _has_stray_quote(text: str) -> bool:
+    return '"' in text and '"' in _QUOTED.sub("", text)
+
+def _parse_range(path: str, start: int, end: int, fieldnames: List[str]) -> Optional[Columns]:
+    """Columns of the rows in [start, end), or None if its quotes are ambiguous."""
+    with open(path, "rb") as f:
+        f.seek(start)
+        text = f.read(end - start).decode("utf-8")
+    if _has_stray_quote(text):
+        return None
+    return parse_rows(csv.reader(io.StringIO(text, newline="")), fieldnames, empty_columns())
+
+def read_columns_parallel(path: str, workers: Optional[int] = None) -> Columns:
+    workers = workers or os.cpu_count() or 1
+    fieldnames, ranges = split_rows(path, workers * 4)
+    out = empty_columns()
+    if not fieldnames:
+        return out
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        futures = [pool.submit(_parse_range, path, s, e, fieldnames) for s, e in ranges]
+        parts = [fut.result() for fut in futures]
+    if any(part is None for part in parts):
+        # Row boundaries may be wrong; only a sequential csv pass can tell
+        return read_columns(path)
+    for part in parts:
+        for col, values in zip(out, part):
+            col.extend(values)
+    return out
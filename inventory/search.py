@@ -0,0 +1,124 @@
+import bisect
+from typing import Dict, Iterable, List, Set
+
+# Queries of at least _GRAM characters match anywhere in the name or SKU
+# through a trigram index; shorter ones match name/SKU prefixes via sorted
+# keys. Suppliers get an exact (case-insensitive) inverted index.
+_GRAM = 3
+
+def _grams(text: str) -> Set[str]:
+    return {text[i:i + _GRAM] for i in range(len(text) - _GRAM + 1)}
+
+class SearchIndex:
+    """Incrementally maintained name/SKU/supplier index keyed by product id."""
+
+    def __init__(self, products: Iterable = ()):
+        self._text: Dict[int, tuple] = {}
+        self._postings: Dict[str, Set[int]] = {}
+        self._by_supplier: Dict[str, Set[int]] = {}
+        # Bulk build: same as add() per product, but one sort at the end
+        text, postings, by_supplier = self._text, self._postings, self._by_supplier
+        for p in products:
+            pid = p.id
+            name, sku = p.name.lower(), p.sku.lower()
+            supplier = (p.supplier or "").lower()
+            text[pid] = (name, sku, supplier)
+            for g in _grams(name) | _grams(sku):
+                ids = postings.get(g)
+                if ids is None:
+                    postings[g] = {pid}
+                else:
+                    ids.add(pid)
+            if supplier:
+                ids = by_supplier.get(supplier)
+                if ids is None:
+                    by_supplier[supplier] = {pid}
+                else:
+                    ids.add(pid)
+        self._sku_keys: List[tuple] = sorted((t[1], pid) for pid, t in text.items())
+
+    def add(self, p):
+        if p.id in self._text:
+            self.remove(p.id)
+        name, sku = p.name.lower(), p.sku.lower()
+        supplier = (p.supplier or "").lower()
+        self._text[p.id] = (name, sku, supplier)
+        postings = self._postings
+        for g in _grams(name) | _grams(sku):
+            ids = postings.get(g)
+            if ids is None:
+                postings[g] = {p.id}
+            else:
+                ids.add(p.id)
+        if supplier:
+            self._by_supplier.setdefault(supplier, set()).add(p.id)
+        bisect.insort(self._sku_keys, (sku, p.id))
+
+    def remove(self, pid: int):
+        entry = self._text.pop(pid, None)
+        if entry is None:
+            return
+        name, sku, supplier = entry
+        for g in _grams(name) | _grams(sku):
+            ids = self._postings.get(g)
+            if ids is not None:
+                ids.discard(pid)
+                if not ids:
+                    del self._postings[g]
+        if supplier:
+            ids = self._by_supplier.get(supplier)
+            if ids is not None:
+                ids.discard(pid)
+                if not ids:
+                    del self._by_supplier[supplier]
+        i = bisect.bisect_left(self._sku_keys, (sku, pid))
+        if i < len(self._sku_keys) and self._sku_keys[i] == (sku, pid):
+            del self._sku_keys[i]
+
+    def update(self, p):
+        entry = self._text.get(p.id)
+        if entry != (p.name.lower(), p.sku.lower(), (p.supplier or "").lower()):
+            self.add(p)
+
+    def supplier_ids(self, supplier: str) -> Set[int]:
+        return self._by_supplier.get(supplier.strip().lower(), set())
+
+    def suppliers(self) -> List[str]:
+        return sorted(self._by_supplier)
+
+    def _substring_ids(self, q: str) -> Set[int]:
+        grams = sorted((self._postings.get(g, set()) for g in _grams(q)), key=len)
+        if not grams or not grams[0]:
+            return set()
+        candidates = set(grams[0])
+        for ids in grams[1:]:
+            candidates &= ids
+            if not candidates:
+                return candidates
+        text = self._text
+        # Trigrams only prove the pieces exist; confirm the whole query
+        return {pid for pid in candidates if q in text[pid][0] or q in text[pid][1]}
+
+    def _sku_prefix_ids(self, q: str) -> Set[int]:
+        out = set()
+        keys = self._sku_keys
+        i = bisect.bisect_left(keys, (q,))
+        while i < len(keys) and keys[i][0].startswith(q):
+            out.add(keys[i][1])
+            i += 1
+        return out
+
+    def match_ids(self, query: str) -> Set[int]:
+        """Ids whose name or SKU contains query (3+ chars) or whose SKU starts with it.
+
+        Short queries should also be matched against name prefixes, which the
+        caller's name-ordered index answers as one contiguous range.
+        """
+        q = query.strip().lower()
+        if len(q) >= _GRAM:
+            return self._substring_ids(q)
+        return self._sku_prefix_ids(q)
+
+    @staticmethod
+    def is_short(query: str) -> bool:
+        return len(query.strip()) < _GRAM
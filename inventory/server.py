@@ -0,0 +1,323 @@
+"""Headless HTTP/JSON front end for the inventory core.
+
+    python main.py --serve --port 8765
+
+Routes (all bodies are JSON):
+
+    GET    /products?offset=0&limit=100
+    GET    /products/<id>
+    POST   /products                      {"name", "sku", "price", ...}
+    PATCH  /products/<id>                 {"name"?, "sku"?, "price"?, ...}
+    DELETE /products/<id>
+    POST   /products/<id>/adjust          {"delta": -2}
+    GET    /search?q=&supplier=&low=1&limit=
+    GET    /low-stock
+
+Stock adjustments are not applied one by one: StockBatcher collects those
+arriving within a short window and applies them in one transaction, so a
+burst of adjustments costs one persistence step instead of one each.
+An adjustment answers {"id", "stock", "saved"}: "saved" is false (with an
+"error") when it was applied but its batch could not be written, so the
+client must not send it again.
+"""
+import asyncio
+import json
+from typing import List, Optional, Tuple
+from urllib.parse import parse_qs, urlsplit
+
+from . import inventory as inv
+from .errors import InvalidSKUError, NegativeStockError
+
+DEFAULT_HOST = "127.0.0.1"
+DEFAULT_PORT = 8765
+# How long the first adjustment of a batch waits for company
+_BATCH_WINDOW = 0.005
+_MAX_BATCH = 2000
+_MAX_BODY = 1 << 20
+
+_REASONS = {200: "OK", 201: "Created", 204: "No Content", 400: "Bad Request", 404: "Not Found",
+            405: "Method Not Allowed", 409: "Conflict", 413: "Payload Too Large", 500: "Internal Server Error"}
+
+class HttpError(Exception):
+    def __init__(self, status: int, message: str):
+        super().__init__(message)
+        self.status = status
+
+def product_json(p) -> dict:
+    return {
+        "id": p.id,
+        "name": p.name,
+        "sku": p.sku,
+        "price": p.price,
+        "stock": p.stock,
+        "reorder_level": p.reorder_level,
+        "supplier": p.supplier,
+        "low_stock": p.is_low_stock,
+    }
+
+def _apply_adjustments(batch: List[Tuple[int, int]]) -> Tuple[list, Optional[Exception]]:
+    """Apply (pid, delta) pairs in one transaction; one outcome per pair.
+
+    A rejected adjustment (unknown product, stock would go negative) is
+    reported on its own and does not roll back the rest of the batch. If
+    only saving the batch fails, the adjustments stay applied (in memory and
+    in the ledger) and the error is returned alongside the outcomes.
+    """
+    outcomes = []
+    try:
+        with inv.transaction():
+            for pid, delta in batch:
+                try:
+                    inv.adjust_stock(pid, delta)
+                except (NegativeStockError, ValueError) as e:
+                    outcomes.append(e)
+                else:
+                    outcomes.append(inv.get_product(pid).stock)
+    except Exception as e:
+        if len(outcomes) < len(batch):
+            # Failed while applying: the transaction rolled everything back
+            raise
+        return outcomes, e
+    return outcomes, None
+
+class StockBatcher:
+    """Coalesce concurrent adjust_stock calls into transaction-sized batches."""
+
+    def __init__(self, window: float = _BATCH_WINDOW, max_batch: int = _MAX_BATCH):
+        self.window = window
+        self.max_batch = max_batch
+        self._pending: List[Tuple[int, int, asyncio.Future]] = []
+        self._wakeup: Optional[asyncio.Event] = None
+        self._task: Optional[asyncio.Task] = None
+        self.batches = 0
+
+    def start(self):
+        self._wakeup = asyncio.Event()
+        self._task = asyncio.get_running_loop().create_task(self._run())
+
+    async def stop(self):
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+        # Anything still queued gets applied rather than dropped
+        if self._pending:
+            await self._flush()
+
+    async def adjust(self, pid: int, delta: int) -> Tuple[int, Optional[Exception]]:
+        """Queue an adjustment and wait for the batch holding it.
+
+        Returns the new stock and, if the batch was applied but not saved, why.
+        """
+        fut = asyncio.get_running_loop().create_future()
+        self._pending.append((pid, delta, fut))
+        self._wakeup.set()
+        return await fut
+
+    async def _run(self):
+        while True:
+            await self._wakeup.wait()
+            self._wakeup.clear()
+            if len(self._pending) < self.max_batch:
+                await asyncio.sleep(self.window)
+            await self._flush()
+
+    async def _flush(self):
+        while self._pending:
+            batch = self._pending[:self.max_batch]
+            del self._pending[:self.max_batch]
+            loop = asyncio.get_running_loop()
+            try:
+                outcomes, save_error = await loop.run_in_executor(None, _apply_adjustments, [(pid, d) for pid, d, _ in batch])
+            except Exception as e:
+                outcomes, save_error = [e] * len(batch), None
+            self.batches += 1
+            for (_, _, fut), outcome in zip(batch, outcomes):
+                if fut.done():
+                    continue
+                if isinstance(outcome, Exception):
+                    fut.set_exception(outcome)
+                else:
+                    fut.set_result((outcome, save_error))
+
+def _int_arg(params: dict, name: str, default: Optional[int]) -> Optional[int]:
+    raw = params.get(name, [None])[0]
+    if raw in (None, ""):
+        return default
+    try:
+        return int(raw)
+    except ValueError:
+        raise HttpError(400, f"{name} must be an integer")
+
+def _product_or_404(pid: int):
+    p = inv.get_product(pid)
+    if p is None:
+        raise HttpError(404, "Product not found")
+    return p
+
+class InventoryServer:
+    """Route HTTP requests onto inventory calls; blocking work runs in the default executor."""
+
+    def __init__(self, batcher: Optional[StockBatcher] = None):
+        self.batcher = batcher or StockBatcher()
+        self._server: Optional[asyncio.AbstractServer] = None
+
+    async def start(self, host: str = DEFAULT_HOST, port: int = DEFAULT_PORT) -> asyncio.AbstractServer:
+        self.batcher.start()
+        self._server = await asyncio.start_server(self._handle_connection, host, port)
+        return self._server
+
+    @property
+    def port(self) -> int:
+        return self._server.sockets[0].getsockname()[1]
+
+    async def close(self):
+        if self._server is not None:
+            self._server.close()
+            await self._server.wait_closed()
+        await self.batcher.stop()
+
+    async def _handle_connection(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter):
+        try:
+            while True:
+                request = await self._read_request(reader)
+                if request is None:
+                    break
+                method, target, body, keep_alive = request
+                status, payload = await self._dispatch(method, target, body)
+                self._write_response(writer, status, payload, keep_alive)
+                await writer.drain()
+                if not keep_alive:
+                    break
+        except (ConnectionError, asyncio.IncompleteReadError):
+            pass
+        except HttpError as e:
+            self._write_response(writer, e.status, {"error": str(e)}, False)
+        finally:
+            writer.close()
+
+    async def _read_request(self, reader: asyncio.StreamReader):
+        line = await reader.readline()
+        if not line:
+            return None
+        try:
+            method, target, version = line.decode("latin-1").split()
+        except ValueError:
+            raise HttpError(400, "Malformed request line")
+        headers = {}
+        while True:
+            line = await reader.readline()
+            if line in (b"\r\n", b"\n", b""):
+                break
+            name, _, value = line.decode("latin-1").partition(":")
+            headers[name.strip().lower()] = value.strip()
+        length = int(headers.get("content-length") or 0)
+        if length > _MAX_BODY:
+            raise HttpError(413, "Request body too large")
+        body = await reader.readexactly(length) if length else b""
+        connection = headers.get("connection", "").lower()
+        keep_alive = connection != "close" if version == "HTTP/1.1" else connection == "keep-alive"
+        return method.upper(), target, body, keep_alive
+
+    def _write_response(self, writer: asyncio.StreamWriter, status: int, payload, keep_alive: bool):
+        data = b"" if payload is None else json.dumps(payload, separators=(",", ":")).encode("utf-8")
+        head = (f"HTTP/1.1 {status} {_REASONS.get(status, '')}\r\n"
+                f"Content-Type: application/json\r\n"
+                f"Content-Length: {len(data)}\r\n"
+                f"Connection: {'keep-alive' if keep_alive else 'close'}\r\n\r\n")
+        writer.write(head.encode("latin-1") + data)
+
+    async def _dispatch(self, method: str, target: str, body: bytes):
+        url = urlsplit(target)
+        parts = [s for s in url.path.split("/") if s]
+        params = parse_qs(url.query)
+        try:
+            data = json.loads(body) if body else {}
+            if not isinstance(data, dict):
+                raise HttpError(400, "Body must be a JSON object")
+            return await self._route(method, parts, params, data)
+        except HttpError as e:
+            return e.status, {"error": str(e)}
+        except json.JSONDecodeError:
+            return 400, {"error": "Body is not valid JSON"}
+        except NegativeStockError as e:
+            return 409, {"error": str(e)}
+        except (InvalidSKUError, ValueError, TypeError) as e:
+            return 400, {"error": str(e)}
+        except Exception as e:
+            return 500, {"error": str(e)}
+
+    async def _route(self, method: str, parts: list, params: dict, data: dict):
+        run = asyncio.get_running_loop().run_in_executor
+        if parts == ["products"]:
+            if method == "GET":
+                offset = _int_arg(params, "offset", 0)
+                limit = _int_arg(params, "limit", 100)
+                rows = await run(None, inv.list_products, offset, limit)
+                return 200, {"total": inv.product_count(), "products": [product_json(p) for p in rows]}
+            if method == "POST":
+                pid = await run(None, lambda: inv.create_product(**data))
+                return 201, product_json(inv.get_product(pid))
+            raise HttpError(405, "Use GET or POST")
+        if len(parts) in (2, 3) and parts[0] == "products":
+            try:
+                pid = int(parts[1])
+            except ValueError:
+                raise HttpError(404, "Product not found")
+            if len(parts) == 3:
+                if parts[2] != "adjust":
+                    raise HttpError(404, "No such route")
+                if method != "POST":
+                    raise HttpError(405, "Use POST")
+                delta = data.get("delta")
+                if not isinstance(delta, int) or isinstance(delta, bool):
+                    raise HttpError(400, "delta must be an integer")
+                _product_or_404(pid)
+                stock, save_error = await self.batcher.adjust(pid, delta)
+                if save_error is not None:
+                    # Applied but not written: a retry would apply it twice
+                    return 200, {"id": pid, "stock": stock, "saved": False, "error": str(save_error)}
+                return 200, {"id": pid, "stock": stock, "saved": True}
+            if method == "GET":
+                return 200, product_json(_product_or_404(pid))
+            if method == "PATCH":
+                _product_or_404(pid)
+                await run(None, lambda: inv.update_product(pid, **data))
+                return 200, product_json(inv.get_product(pid))
+            if method == "DELETE":
+                _product_or_404(pid)
+                await run(None, inv.delete_product, pid)
+                return 204, None
+            raise HttpError(405, "Use GET, PATCH or DELETE")
+        if parts == ["search"] and method == "GET":
+            rows = await run(None, lambda: inv.search(
+                params.get("q", [""])[0],
+                supplier=params.get("supplier", [None])[0],
+                low_only=params.get("low", ["0"])[0] not in ("", "0", "false"),
+                limit=_int_arg(params, "limit", 100),
+            ))
+            return 200, {"products": [product_json(p) for p in rows]}
+        if parts == ["low-stock"] and method == "GET":
+            rows = await run(None, inv.list_low_stock)
+            return 200, {"products": [product_json(p) for p in rows]}
+        raise HttpError(404, "No such route")
+
+async def _serve_forever(host: str, port: int):
+    server = InventoryServer()
+    srv = await server.start(host, port)
+    print(f"Inventory service listening on http://{host}:{server.port}")
+    try:
+        async with srv:
+            await srv.serve_forever()
+    finally:
+        await server.close()
+
+def serve(host: str = DEFAULT_HOST, port: int = DEFAULT_PORT):
+    """Run the HTTP service until interrupted."""
+    try:
+        asyncio.run(_serve_forever(host, port))
+    except KeyboardInterrupt:
+        pass
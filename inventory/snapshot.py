@@ -0,0 +1,116 @@
+import mmap
+import os
+import struct
+import tempfile
+from array import array
+from typing import Iterable, List, Optional, Tuple
+
+# Binary snapshot written next to the CSV (<csv>.snap). Layout, little-endian:
+#
+#   header   magic "INVSNAP1", size of the CSV it mirrors, row count n, char
+#            lengths of the 3 string tables and byte lengths of their blobs
+#   columns  id, price, stock, reorder_level   (8 bytes x n each)
+#            name, sku, supplier char offsets  (8 bytes x (n + 1) each)
+#   blobs    names, skus, suppliers            (UTF-8, concatenated)
+#
+# Rows are written already validated, so loading skips parsing and SKU checks.
+
+_MAGIC = b"INVSNAP1"
+_HEADER = struct.Struct("<8sQQ6Q")
+
+Columns = Tuple[List[int], List[str], List[str], List[float], List[int], List[int], List[Optional[str]]]
+
+def snapshot_path(csv_path: str) -> str:
+    return csv_path + ".snap"
+
+def is_fresh(csv_path: str) -> bool:
+    """True if a snapshot exists and is at least as new as the CSV."""
+    try:
+        return os.path.getmtime(snapshot_path(csv_path)) >= os.path.getmtime(csv_path)
+    except OSError:
+        return False
+
+def _string_table(values: List[str]) -> Tuple[array, bytes, int]:
+    offsets = array("q", [0])
+    pos = 0
+    for v in values:
+        pos += len(v)
+        offsets.append(pos)
+    text = "".join(values)
+    return offsets, text.encode("utf-8"), len(text)
+
+def write_snapshot(csv_path: str, products: Iterable) -> str:
+    """Write products to <csv>.snap atomically (temp file then replace)."""
+    ids, prices, stocks, reorders = array("q"), array("d"), array("q"), array("q")
+    names: List[str] = []
+    skus: List[str] = []
+    suppliers: List[str] = []
+    for p in products:
+        ids.append(p.id)
+        # Same rounding as the CSV so both load paths agree exactly
+        prices.append(float(f"{float(p.price):.2f}"))
+        stocks.append(p.stock)
+        reorders.append(p.reorder_level)
+        names.append(p.name)
+        skus.append(p.sku)
+        suppliers.append(p.supplier or "")
+    tables = [_string_table(names), _string_table(skus), _string_table(suppliers)]
+
+    target = snapshot_path(csv_path)
+    dir_name = os.path.dirname(target) or "."
+    with tempfile.NamedTemporaryFile("wb", delete=False, dir=dir_name) as tmp:
+        tmp.write(_HEADER.pack(
+            _MAGIC, os.path.getsize(csv_path), len(ids),
+            tables[0][2], len(tables[0][1]),
+            tables[1][2], len(tables[1][1]),
+            tables[2][2], len(tables[2][1]),
+        ))
+        for col in (ids, prices, stocks, reorders):
+            col.tofile(tmp)
+        for offsets, _, _ in tables:
+            offsets.tofile(tmp)
+        for _, blob, _ in tables:
+            tmp.write(blob)
+        temp_name = tmp.name
+    os.replace(temp_name, target)
+    return target
+
+def read_snapshot(csv_path: str) -> Columns:
+    """Memory-map <csv>.snap and return its columns; raises ValueError if corrupt."""
+    with open(snapshot_path(csv_path), "rb") as f, mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+        if len(mm) < _HEADER.size:
+            raise ValueError("Snapshot truncated")
+        magic, csv_size, n, *lengths = _HEADER.unpack_from(mm, 0)
+        if magic != _MAGIC:
+            raise ValueError("Not an inventory snapshot")
+        if csv_size != os.path.getsize(csv_path):
+            raise ValueError("Snapshot does not match the CSV")
+        blob_sizes = lengths[1::2]
+        expected = _HEADER.size + 8 * 4 * n + 8 * 3 * (n + 1) + sum(blob_sizes)
+        if len(mm) != expected:
+            raise ValueError("Snapshot size mismatch")
+
+        view = memoryview(mm)
+        try:
+            pos = _HEADER.size
+            numeric = []
+            for code in ("q", "d", "q", "q"):
+                numeric.append(view[pos:pos + 8 * n].cast(code).tolist())
+                pos += 8 * n
+            offsets = []
+            for _ in range(3):
+                offsets.append(view[pos:pos + 8 * (n + 1)].cast("q").tolist())
+                pos += 8 * (n + 1)
+            strings = []
+            for offs, size, chars in zip(offsets, blob_sizes, lengths[0::2]):
+                text = str(view[pos:pos + size], "utf-8")
+                pos += size
+                if len(text) != chars or offs[-1] != chars:
+                    raise ValueError("Snapshot string table corrupt")
+                strings.append([text[offs[i]:offs[i + 1]] for i in range(n)])
+        finally:
+            view.release()
+
+    ids, prices, stocks, reorders = numeric
+    names, skus, suppliers = strings
+    return ids, names, skus, prices, stocks, reorders, [s or None for s in suppliers]
@@ -0,0 +1,104 @@
+import os
+import sqlite3
+import threading
+from typing import Iterable, List
+
+from .csvrows import Columns, empty_columns
+from .storage import StorageBackend
+
+# Rows are only ever read whole (load) and written by id, so the primary key
+# is the only index: paging and lookups are served from memory. Databases
+# created before that still carry the old secondary indexes, which are
+# dropped so writes stop maintaining them. SKUs are not UNIQUE: uniqueness
+# is enforced by the inventory layer, and a CSV with duplicate SKUs must
+# still migrate.
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS products (
+    id INTEGER PRIMARY KEY,
+    name TEXT NOT NULL,
+    sku TEXT NOT NULL,
+    price REAL NOT NULL DEFAULT 0,
+    stock INTEGER NOT NULL DEFAULT 0,
+    reorder_level INTEGER NOT NULL DEFAULT 0,
+    supplier TEXT
+);
+DROP INDEX IF EXISTS products_sku;
+DROP INDEX IF EXISTS products_name;
+DROP INDEX IF EXISTS products_low;
+"""
+
+_COLUMNS = "id, name, sku, price, stock, reorder_level, supplier"
+_UPSERT = (f"INSERT INTO products ({_COLUMNS}) VALUES (?, ?, ?, ?, ?, ?, ?) "
+           "ON CONFLICT(id) DO UPDATE SET name = excluded.name, sku = excluded.sku, price = excluded.price, "
+           "stock = excluded.stock, reorder_level = excluded.reorder_level, supplier = excluded.supplier")
+
+class SqliteBackend(StorageBackend):
+    """Products in an SQLite database (WAL mode), updated row by row."""
+
+    row_level = True
+
+    def __init__(self, path: str):
+        super().__init__(path)
+        self._conn = None
+        # One connection shared by every thread; sqlite3 objects aren't
+        self._mutex = threading.Lock()
+
+    def _connect(self) -> sqlite3.Connection:
+        if self._conn is None:
+            os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+            conn = sqlite3.connect(self.path, check_same_thread=False, isolation_level=None)
+            conn.execute("PRAGMA journal_mode=WAL")
+            # With WAL, NORMAL only risks the last commits on power loss, never corruption
+            conn.execute("PRAGMA synchronous=NORMAL")
+            conn.executescript(_SCHEMA)
+            self._conn = conn
+        return self._conn
+
+    def load(self) -> Columns:
+        if not os.path.exists(self.path):
+            return empty_columns()
+        with self._mutex:
+            rows = self._connect().execute(f"SELECT {_COLUMNS} FROM products ORDER BY id").fetchall()
+        if not rows:
+            return empty_columns()
+        return tuple(list(col) for col in zip(*rows))
+
+    def _write(self, fn):
+        with self._mutex:
+            conn = self._connect()
+            conn.execute("BEGIN IMMEDIATE")
+            try:
+                fn(conn)
+            except BaseException:
+                conn.execute("ROLLBACK")
+                raise
+            conn.execute("COMMIT")
+
+    def save_all(self, products: Iterable):
+        rows = [(p.id, p.name, p.sku, float(p.price), int(p.stock), int(p.reorder_level), p.supplier or None)
+                for p in products]
+
+        def replace(conn):
+            conn.execute("DELETE FROM products")
+            conn.executemany(f"INSERT INTO products ({_COLUMNS}) VALUES (?, ?, ?, ?, ?, ?, ?)", rows)
+        self._write(replace)
+
+    def apply(self, records: List[dict]):
+        """Apply journal-style records in one SQLite transaction."""
+        def run(conn):
+            for rec in records:
+                op = rec.get("op")
+                if op == "stock":
+                    conn.execute("UPDATE products SET stock = ? WHERE id = ?", (int(rec["stock"]), rec["id"]))
+                elif op == "put":
+                    conn.execute(_UPSERT, (rec["id"], rec["name"], rec["sku"], float(rec["price"]), int(rec["stock"]),
+                                           int(rec["reorder_level"]), rec.get("supplier")))
+                elif op == "delete":
+                    conn.execute("DELETE FROM products WHERE id = ?", (rec["id"],))
+        self._write(run)
+
+    def close(self):
+        with self._mutex:
+            if self._conn is not None:
+                self._conn.close()
+                self._conn = None
@@ -0,0 +1,137 @@
+"""Storage backends: where a catalog file's products are persisted.
+
+The in-memory catalog in inventory.inventory stays the working set; a
+backend only loads it and writes changes back. Which backend handles a
+path is decided by its extension: .db/.sqlite/.sqlite3 files use SQLite,
+everything else is CSV (the default).
+
+One-shot migration between formats, from the project root:
+
+    python -m inventory.storage products.csv products.db
+"""
+import csv
+import os
+import sys
+from abc import ABC, abstractmethod
+from typing import Iterable, List, Optional
+
+from .csvrows import Columns, empty_columns, read_columns
+from .models import Product
+
+CSV_HEADERS = ["id", "name", "sku", "price", "stock", "reorder_level", "supplier"]
+SQLITE_SUFFIXES = (".db", ".sqlite", ".sqlite3")
+
+class StorageBackend(ABC):
+    """Interface every backend implements.
+
+    load() returns the stored products as csvrows.Columns (id 0 = missing)
+    and save_all() replaces them. Backends with row_level = True also accept
+    the journal's mutation records ("put", "stock", "delete") through
+    apply(), so one change costs one row write instead of a full rewrite.
+    """
+
+    row_level = False
+
+    def __init__(self, path: str):
+        self.path = path
+
+    @abstractmethod
+    def load(self) -> Columns:
+        ...
+
+    @abstractmethod
+    def save_all(self, products: Iterable):
+        ...
+
+    @abstractmethod
+    def apply(self, records: List[dict]):
+        """Write mutation records; full-rewrite backends raise NotImplementedError."""
+
+    def close(self):
+        pass
+
+class CsvBackend(StorageBackend):
+    """The original format: the whole catalog is read and rewritten at once."""
+
+    def __init__(self, path: str, parallel_workers: Optional[int] = None, parallel_min_bytes: int = 0):
+        super().__init__(path)
+        self.parallel_workers = parallel_workers
+        self.parallel_min_bytes = parallel_min_bytes
+
+    def load(self) -> Columns:
+        try:
+            size = os.path.getsize(self.path)
+        except FileNotFoundError:
+            return empty_columns()
+        workers = self.parallel_workers or os.cpu_count() or 1
+        if self.parallel_min_bytes and size >= self.parallel_min_bytes and workers > 1:
+            # Imported here: multiprocessing is slow to import and rarely needed
+            from .parallel_load import read_columns_parallel
+            return read_columns_parallel(self.path, workers)
+        return read_columns(self.path)
+
+    def save_all(self, products: Iterable):
+        """Write to a temp file in the same directory, then replace."""
+        import tempfile
+        target = self.path
+        dir_name = os.path.dirname(target) or "."
+        os.makedirs(dir_name, exist_ok=True)
+        with tempfile.NamedTemporaryFile("w", delete=False, dir=dir_name, newline="", encoding="utf-8") as tmp:
+            writer = csv.DictWriter(tmp, fieldnames=CSV_HEADERS)
+            writer.writeheader()
+            for p in products:
+                writer.writerow({
+                    "id": p.id,
+                    "name": p.name,
+                    "sku": p.sku,
+                    "price": f"{float(p.price):.2f}",
+                    "stock": int(p.stock),
+                    "reorder_level": int(p.reorder_level),
+                    "supplier": p.supplier or "",
+                })
+            temp_name = tmp.name
+        os.replace(temp_name, target)
+
+    def apply(self, records: List[dict]):
+        raise NotImplementedError("CsvBackend only supports full saves")
+
+def is_sqlite_path(path: str) -> bool:
+    return path.lower().endswith(SQLITE_SUFFIXES)
+
+def open_backend(path: str, parallel_workers: Optional[int] = None, parallel_min_bytes: int = 0) -> StorageBackend:
+    if is_sqlite_path(path):
+        from .sqlite_backend import SqliteBackend
+        return SqliteBackend(path)
+    return CsvBackend(path, parallel_workers, parallel_min_bytes)
+
+def assign_missing_ids(ids: List[int]):
+    """Number rows without an id (0 or negative) in place, as load_from always has."""
+    next_id = 1
+    for i, pid in enumerate(ids):
+        if not pid or pid < 0:
+            ids[i] = next_id
+            next_id += 1
+        elif pid >= next_id:
+            next_id = pid + 1
+
+def migrate(src: str, dst: str) -> int:
+    """Copy a whole catalog from one file to another (e.g. CSV -> SQLite); returns the row count."""
+    source, target = open_backend(src), open_backend(dst)
+    try:
+        columns = source.load()
+        assign_missing_ids(columns[0])
+        products = [Product(*row) for row in zip(*columns)]
+        target.save_all(products)
+        return len(products)
+    finally:
+        source.close()
+        target.close()
+
+def main(argv):
+    if len(argv) != 2:
+        raise SystemExit("usage: python -m inventory.storage <source> <destination>")
+    n = migrate(argv[0], argv[1])
+    print(f"Copied {n} products from {argv[0]} to {argv[1]}")
+
+if __name__ == "__main__":
+    main(sys.argv[1:])
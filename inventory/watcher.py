@@ -0,0 +1,82 @@
+import csv
+import os
+import threading
+from typing import Callable, Dict, List, Optional, Set, Tuple
+
+# A row's fingerprint is the hash of its seven fields as the CSV writer
+# formats them, in _HEADERS order. Rows are keyed by id, or ("sku", SKU) when
+# the id cell is empty (rows typed in by hand).
+RowValues = Tuple[str, str, str, str, str, str, str]
+
+def product_values(p) -> RowValues:
+    """The fields exactly as save_to writes them."""
+    return (str(p.id), p.name, p.sku, f"{float(p.price):.2f}", str(int(p.stock)),
+            str(int(p.reorder_level)), p.supplier or "")
+
+def fingerprint(values: RowValues) -> int:
+    return hash(values)
+
+def file_stat(path: str) -> Optional[tuple]:
+    try:
+        st = os.stat(path)
+    except FileNotFoundError:
+        return None
+    return (st.st_mtime_ns, st.st_size)
+
+def _row_key(values: RowValues):
+    pid = values[0].strip()
+    if pid.isdigit() and int(pid) > 0:
+        return int(pid)
+    return ("sku", values[2].strip().upper())
+
+def changed_rows(path: str, known: Dict[object, int], headers: List[str]) -> Tuple[List[tuple], Set[object]]:
+    """Diff a CSV against known fingerprints without parsing unchanged rows.
+
+    Returns ([(key, values)] for rows whose fingerprint is new or different,
+    every key seen in the file).
+    """
+    changed = []
+    seen = set()
+    with open(path, "r", newline="", encoding="utf-8") as f:
+        reader = csv.reader(f)
+        fieldnames = next(reader, None)
+        if fieldnames is None:
+            return changed, seen
+        positions = [fieldnames.index(h) if h in fieldnames else None for h in headers]
+        for raw in reader:
+            if not raw:
+                continue
+            width = len(raw)
+            values = tuple(raw[i] if i is not None and i < width else "" for i in positions)
+            key = _row_key(values)
+            seen.add(key)
+            if known.get(key) != fingerprint(values):
+                changed.append((key, values))
+    return changed, seen
+
+class FileWatcher:
+    """Call check() every `interval` seconds on a daemon thread.
+
+    check() does its own stat comparison, so a tick with no change on disk
+    costs one os.stat. Errors are kept in `error` and retried next tick.
+    """
+
+    def __init__(self, check: Callable[[], None], interval: float = 2.0):
+        self._check = check
+        self.interval = interval
+        self.error: Optional[str] = None
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, name="inventory-watcher", daemon=True)
+        self._thread.start()
+
+    def _run(self):
+        while not self._stop.wait(self.interval):
+            try:
+                self._check()
+                self.error = None
+            except Exception as e:
+                self.error = str(e)
+
+    def stop(self):
+        self._stop.set()
+        self._thread.join()
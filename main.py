@@ -1,11 +1,29 @@
-from ui.app import InventoryApp
+import argparse
 from inventory import inventory as inv
 
-def main():
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Simple inventory system")
+    parser.add_argument("--serve", action="store_true", help="run the headless HTTP/JSON service instead of the GUI")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8765)
+    args = parser.parse_args(argv)
     # Initialize storage (loads from INVENTORY_CSV_PATH or products.csv if present)
     inv.init_storage()
+    # Save in the background so slow disks don't freeze the UI
+    inv.enable_autosave()
+    if args.serve:
+        # Imported lazily so POS boxes without Tk can still serve
+        from inventory.server import serve
+        try:
+            serve(args.host, args.port)
+        finally:
+            inv.disable_autosave()
+        return
+    # Pick up edits made to the CSV by other programs while the window is open
+    inv.enable_watch()
+    from ui.app import InventoryApp
     app = InventoryApp()
     app.run()
 
 if __name__ == "__main__":
-    main()
\ No newline at end of file
+    main()
@@ -13,10 +13,11 @@ from inventory.errors import NegativeStockError  # noqa: E402
 def setup_csv():
     # reset file each test
     inv.set_current_path(os.environ["INVENTORY_CSV_PATH"])
-    try:
-        os.remove(inv.current_path())
-    except FileNotFoundError:
-        pass
+    for path in (inv.current_path(), inv.current_path() + ".journal", inv.current_path() + ".ledger"):
+        try:
+            os.remove(path)
+        except FileNotFoundError:
+            pass
     inv.init_storage()
     yield
 
@@ -35,4 +36,714 @@ def test_increment_and_low_stock_flag():
     inv.adjust_stock(pid, +10)
     p = inv.get_product(pid)
     assert p.stock == 11
-    assert p.is_low_stock is False
\ No newline at end of file
+    assert p.is_low_stock is False
+
+def test_id_and_sku_indexes_follow_mutations():
+    pid = inv.create_product(name="Gadget", sku="GAD-0001", stock=3)
+    assert inv.get_product(pid).sku == "GAD-0001"
+    assert inv._find_by_sku(" gad-0001 ").id == pid
+    inv.update_product(pid, sku="GAD-0002")
+    assert inv._find_by_sku("GAD-0001") is None
+    assert inv._find_by_sku("GAD-0002").id == pid
+    with pytest.raises(ValueError):
+        inv.create_product(name="Dup", sku="GAD-0002")
+    inv.load_from(inv.current_path())
+    assert inv.get_product(pid).sku == "GAD-0002"
+    inv.delete_product(pid)
+    assert inv.get_product(pid) is None
+    assert inv._find_by_sku("GAD-0002") is None
+
+
+def test_journal_mode_appends_and_replays():
+    inv.enable_journal(fsync_every=0)
+    try:
+        pid = inv.create_product(name="Bolt", sku="BLT-0001", stock=5, reorder_level=2)
+        inv.adjust_stock(pid, -3)
+        inv.update_product(pid, name="Hex Bolt")
+        other = inv.create_product(name="Nut", sku="NUT-0001", stock=1)
+        inv.delete_product(other)
+        inv.flush_journal()
+        # No CSV snapshot written yet, only the journal
+        assert not os.path.exists(inv.current_path())
+        inv.load_from(inv.current_path())
+        p = inv.get_product(pid)
+        assert (p.name, p.stock) == ("Hex Bolt", 2)
+        assert inv.get_product(other) is None
+        inv.checkpoint()
+        assert not os.path.exists(inv.current_path() + ".journal")
+        inv.load_from(inv.current_path())
+        assert inv.get_product(pid).stock == 2
+    finally:
+        inv.disable_journal()
+
+def test_transaction_saves_once_and_rolls_back(monkeypatch):
+    a = inv.create_product(name="Alpha", sku="ALP-0001", stock=5)
+    b = inv.create_product(name="Beta", sku="BET-0001", stock=1)
+    saves = []
+    real_save = inv.save_to
+    monkeypatch.setattr(inv, "save_to", lambda path=None: saves.append(path) or real_save(path))
+    with inv.transaction():
+        inv.adjust_stock(a, -1)
+        inv.adjust_stock(b, +2)
+        inv.update_product(a, name="Alpha 2")
+    assert len(saves) == 1
+    inv.search("alpha")
+    search = inv._search
+    with pytest.raises(NegativeStockError):
+        with inv.transaction():
+            inv.adjust_stock(a, +10)
+            inv.update_product(b, sku="BET-0002", name="Aardvark", reorder_level=5)
+            inv.create_product(name="Gamma", sku="GAM-0001")
+            inv.delete_product(a)
+            inv.adjust_stock(b, -100)
+    assert len(saves) == 1
+    assert inv.get_product(a).stock == 4
+    assert inv.get_product(a).name == "Alpha 2"
+    assert inv.get_product(b).sku == "BET-0001"
+    assert inv._find_by_sku("GAM-0001") is None
+    assert [p.id for p in inv.list_products()] == [a, b]
+    assert [p.id for p in inv._products] == [a, b]
+    assert inv.list_low_stock() == []
+    # Only the touched entries were reverted; the search index was kept
+    assert inv._search is search
+    assert [p.id for p in inv.search("alp")] == [a]
+    assert inv.search("aardvark") == [] and inv.search("gam") == []
+    assert inv.create_product(name="Gamma", sku="GAM-0001") == b + 1
+
+def test_import_reports_created_updated_and_rejected(tmp_path, monkeypatch):
+    pid = inv.create_product(name="Old Name", sku="IMP-0001", stock=1)
+    saves = []
+    real_save = inv.save_to
+    monkeypatch.setattr(inv, "save_to", lambda path=None: saves.append(path) or real_save(path))
+    src = tmp_path / "feed.csv"
+    src.write_text(
+        "name,sku,price,stock,reorder_level,supplier\n"
+        "New Name,imp-0001,2.50,7,1,Acme\n"
+        "Fresh,IMP-0002,1,3,0,\n"
+        ",IMP-0003,1,1,1,\n"
+        "Bad Sku,x,1,1,1,\n"
+        "Bad Num,IMP-0004,abc,1,1,\n",
+        encoding="utf-8",
+    )
+    result = inv.import_csv(str(src), chunk_size=2)
+    assert (result.applied, result.created, result.updated, result.rejected) == (2, 1, 1, 3)
+    assert [line for line, _ in result.errors] == [4, 5, 6]
+    p = inv.get_product(pid)
+    assert (p.name, p.stock, p.supplier) == ("New Name", 7, "Acme")
+    assert inv._find_by_sku("IMP-0002") is not None
+    assert len(saves) == 1
+
+    # Each chunk commits on its own: stopping early keeps what was merged
+    src.write_text("name,sku,price,stock\nOne,IMP-0011,1,1\nTwo,IMP-0012,1,1\n", encoding="utf-8")
+    steps = inv.iter_import_csv(str(src), chunk_size=1)
+    assert next(steps).applied == 1
+    steps.close()
+    assert inv._find_by_sku("IMP-0011") is not None and inv._find_by_sku("IMP-0012") is None
+    assert len(saves) == 2
+    inv.load_from(inv.current_path())
+    assert inv._find_by_sku("IMP-0011") is not None
+
+def test_sorted_view_tracks_inserts_renames_and_deletes():
+    ids = {n: inv.create_product(name=n, sku=f"SRT-{i:04d}") for i, n in enumerate(["pear", "Apple", "mango", "banana"])}
+    assert [p.name for p in inv.list_products()] == ["Apple", "banana", "mango", "pear"]
+    inv.update_product(ids["pear"], name="Aardvark pear")
+    inv.delete_product(ids["mango"])
+    assert [p.name for p in inv.list_products()] == ["Aardvark pear", "Apple", "banana"]
+    inv.load_from(inv.current_path())
+    assert [p.name for p in inv.list_products()] == ["Aardvark pear", "Apple", "banana"]
+    assert [p.name for p in inv.list_products(1, 5)] == ["Apple", "banana"]
+
+def test_low_stock_set_and_threshold_callback():
+    events = []
+    listener = lambda p, is_low: events.append((p.id, is_low))
+    inv.add_low_stock_listener(listener)
+    try:
+        a = inv.create_product(name="A", sku="LOW-0001", stock=5, reorder_level=2)
+        b = inv.create_product(name="B", sku="LOW-0002", stock=0, reorder_level=0)
+        assert (inv.low_stock_count(), inv.zero_stock_count()) == (1, 1)
+        inv.adjust_stock(a, -3)
+        inv.adjust_stock(a, -1)
+        assert [p.id for p in inv.list_low_stock()] == [a, b]
+        inv.update_product(a, reorder_level=0)
+        inv.delete_product(b)
+        assert (inv.low_stock_count(), inv.zero_stock_count()) == (0, 0)
+        assert events == [(a, True), (a, False)]
+        # In a transaction only the net crossing is reported, once it commits
+        inv.update_product(a, reorder_level=2)
+        events.clear()
+        with pytest.raises(NegativeStockError):
+            with inv.transaction():
+                inv.adjust_stock(a, +5)
+                inv.adjust_stock(a, -100)
+        with inv.transaction():
+            inv.adjust_stock(a, +5)
+            inv.adjust_stock(a, -5)
+        assert events == []
+        inv.adjust_stock_bulk([("LOW-0001", 5)])
+        assert events == [(a, False)] and a not in {p.id for p in inv.list_low_stock()}
+    finally:
+        inv.remove_low_stock_listener(listener)
+
+def test_change_listener_events_and_transaction_buffering():
+    events = []
+    listener = lambda kind, pid: events.append((kind, pid))
+    inv.add_change_listener(listener)
+    try:
+        a = inv.create_product(name="A", sku="EVT-0001", stock=1)
+        inv.adjust_stock(a, 1)
+        with inv.transaction():
+            inv.update_product(a, name="AA")
+            assert events == [("create", a), ("update", a)]
+        with pytest.raises(NegativeStockError):
+            with inv.transaction():
+                inv.delete_product(a)
+                raise NegativeStockError("boom")
+        inv.delete_product(a)
+        inv.load_from(inv.current_path())
+        assert events == [("create", a), ("update", a), ("update", a), ("delete", a), ("reload", None)]
+    finally:
+        inv.remove_change_listener(listener)
+
+def test_columnar_store_keeps_api_working():
+    inv.create_product(name="Plain", sku="COL-0001", stock=4, reorder_level=1, supplier="Acme")
+    inv.enable_columnar_store()
+    try:
+        pid = inv.create_product(name="Packed", sku="COL-0002", stock=1, reorder_level=3, supplier="Acme")
+        p = inv.get_product(pid)
+        assert p.is_low_stock and p.supplier == "Acme"
+        inv.adjust_stock(pid, 5)
+        assert inv.get_product(pid).stock == 6 and not inv.get_product(pid).is_low_stock
+        with pytest.raises(NegativeStockError):
+            with inv.transaction():
+                inv.update_product(pid, name="Renamed", supplier="Other")
+                inv.adjust_stock(pid, -7)
+        assert (p.name, p.supplier, p.stock) == ("Packed", "Acme", 6)
+        inv.load_from(inv.current_path())
+        assert [q.name for q in inv.list_products()] == ["Packed", "Plain"]
+    finally:
+        inv.enable_columnar_store(False)
+
+def test_snapshot_load_matches_csv_load():
+    inv.create_product(name="Snap A", sku="SNP-0001", price=1.239, stock=3, reorder_level=1, supplier="Acme")
+    inv.create_product(name="Snap B é", sku="SNP-0002", stock=0)
+    inv.load_from(inv.current_path())
+    from_csv = [(p.id, p.name, p.sku, p.price, p.stock, p.reorder_level, p.supplier) for p in inv.list_products()]
+    inv.enable_snapshot()
+    try:
+        inv.save_to()
+        assert os.path.exists(inv.current_path() + ".snap")
+        inv.load_from(inv.current_path())
+        from_snap = [(p.id, p.name, p.sku, p.price, p.stock, p.reorder_level, p.supplier) for p in inv.list_products()]
+        assert from_snap == from_csv
+    finally:
+        inv.enable_snapshot(False)
+        os.remove(inv.current_path() + ".snap")
+
+def test_parallel_load_matches_serial(tmp_path):
+    from inventory.csvrows import read_columns
+    from inventory.parallel_load import read_columns_parallel, split_rows
+    src = tmp_path / "big.csv"
+    lines = ["id,name,sku,price,stock,reorder_level,supplier"]
+    for i in range(1, 400):
+        if i % 7 == 0:
+            lines.append(f'{i},"Multi\nline ""{i}""",ML-{i:05d},1.5,{i},3,"Acme, Inc"')
+        elif i % 11 == 0:
+            lines.append(f",No Id {i},NID-{i:05d},2,1,1,")
+        elif i % 13 == 0:
+            lines.append(f"{i},Bad {i},bad sku,1,1,1,")
+        elif i % 17 == 0:
+            lines.append("")
+        else:
+            lines.append(f"{i},Item {i},ITM-{i:05d},{i}.25,{i % 5},2,Globex")
+    src.write_text("\n".join(lines) + "\n", encoding="utf-8")
+    fieldnames, ranges = split_rows(str(src), 37)
+    assert fieldnames[0] == "id" and len(ranges) > 10
+    assert all(a[1] == b[0] for a, b in zip(ranges, ranges[1:]))
+    assert read_columns_parallel(str(src), workers=2) == read_columns(str(src))
+    # A literal quote in an unquoted field throws off the quote count the
+    # boundaries are based on; the result must still match the serial reader
+    odd = tmp_path / "odd.csv"
+    odd.write_text(lines[0] + "\n" + '5,12" ruler,RUL-00001,1,1,1,\n' + "\n".join(lines[1:]) + "\n", encoding="utf-8")
+    expected = read_columns(str(odd))
+    assert len(expected[0]) == len(read_columns(str(src))[0]) + 1
+    assert read_columns_parallel(str(odd), workers=2) == expected
+    inv.load_from(str(src))
+    serial = [(p.id, p.name, p.sku, p.price, p.stock, p.supplier) for p in inv.list_products()]
+    inv.configure_parallel_load(workers=2, min_bytes=1)
+    try:
+        inv.load_from(str(src))
+    finally:
+        inv.configure_parallel_load()
+    assert [(p.id, p.name, p.sku, p.price, p.stock, p.supplier) for p in inv.list_products()] == serial
+
+def test_autosave_debounces_into_one_background_write(monkeypatch):
+    import time
+    writes = []
+    from inventory.storage import CsvBackend
+    real_write = CsvBackend.save_all
+    monkeypatch.setattr(CsvBackend, "save_all", lambda self, rows: writes.append(len(rows)) or real_write(self, rows))
+    inv.enable_autosave(delay=0.2)
+    try:
+        pid = inv.create_product(name="Auto", sku="AUT-0001", stock=1)
+        for _ in range(20):
+            inv.adjust_stock(pid, 1)
+        assert writes == [] and inv.save_status().state == "pending"
+        deadline = time.time() + 5
+        while inv.save_status().state != "idle" and time.time() < deadline:
+            time.sleep(0.05)
+        assert writes == [1]
+        assert inv.save_status().last_saved is not None
+        inv.adjust_stock(pid, 1)
+        inv.flush_autosave()
+        assert writes == [1, 1]
+    finally:
+        inv.disable_autosave()
+    inv.load_from(inv.current_path())
+    assert inv.get_product(pid).stock == 22
+
+def test_failed_commit_save_still_records_history_and_events(monkeypatch):
+    pid = inv.create_product(name="Alpha", sku="ALP-0001", stock=5)
+    events = []
+    listener = lambda kind, p: events.append((kind, p))
+
+    def fail(path=None):
+        raise OSError("disk full")
+    monkeypatch.setattr(inv, "save_to", fail)
+    inv.add_change_listener(listener)
+    try:
+        with pytest.raises(OSError):
+            with inv.transaction():
+                inv.adjust_stock(pid, -2)
+    finally:
+        inv.remove_change_listener(listener)
+    assert inv.get_product(pid).stock == 3
+    assert events == [("update", pid)]
+    assert [(m.delta, m.stock) for m in inv.stock_history(pid)] == [(5, 5), (-2, 3)]
+
+def test_search_by_substring_prefix_and_supplier():
+    a = inv.create_product(name="Blue Widget", sku="BLU-0001", stock=5, supplier="Acme")
+    b = inv.create_product(name="Red Widget", sku="RED-0001", stock=5, supplier="Globex")
+    c = inv.create_product(name="Bolt", sku="BOL-0001", stock=0, reorder_level=1, supplier="acme")
+    assert [p.id for p in inv.search("widg")] == [a, b]
+    assert [p.id for p in inv.search("b")] == [a, c]
+    assert [p.id for p in inv.search("0001", supplier="ACME")] == [a, c]
+    assert [p.id for p in inv.search("", low_only=True)] == [c]
+    inv.update_product(b, name="Red Gadget", supplier="Acme")
+    inv.delete_product(a)
+    assert inv.search("widg") == []
+    assert [p.id for p in inv.search("gadget", supplier="acme")] == [b]
+    assert [p.id for p in inv.search("red-")] == [b]
+    # Once the index exists, queries only need the shared read lock
+    import threading
+    found = []
+    with inv._lock.read():
+        t = threading.Thread(target=lambda: found.append(inv.search("bolt", low_only=True)))
+        t.start()
+        t.join(5)
+    assert [p.id for p in found[0]] == [c]
+
+def test_concurrent_mutations_keep_invariants():
+    import random
+    import threading
+    pids = [inv.create_product(name=f"Shared {i}", sku=f"SHR-{i:04d}", stock=5) for i in range(8)]
+    errors = []
+
+    def worker(seed):
+        rng = random.Random(seed)
+        try:
+            for n in range(150):
+                r = rng.random()
+                if r < 0.7:
+                    try:
+                        inv.adjust_stock(rng.choice(pids), rng.choice([-2, -1, 1, 2]))
+                    except NegativeStockError:
+                        pass
+                elif r < 0.9:
+                    try:
+                        inv.create_product(name="Racer", sku=f"RAC-{rng.randint(0, 40):04d}", stock=1, reorder_level=1)
+                    except ValueError:
+                        pass
+                elif r < 0.95:
+                    victims = [p.id for p in inv.snapshot_products() if p.sku.startswith("RAC-")]
+                    if victims:
+                        inv.delete_product(rng.choice(victims))
+                else:
+                    # Readers like the server's /low-stock run alongside the deletes
+                    assert all(p.is_low_stock for p in inv.list_low_stock())
+        except Exception as e:
+            errors.append(e)
+
+    inv.enable_autosave(delay=0.05)
+    try:
+        threads = [threading.Thread(target=worker, args=(seed,)) for seed in range(8)]
+        for t in threads:
+            t.start()
+        for t in threads:
+            t.join()
+    finally:
+        inv.disable_autosave()
+    assert errors == []
+    products = inv.snapshot_products()
+    assert all(p.stock >= 0 for p in products)
+    assert len({p.sku for p in products}) == len(products)
+    assert len({p.id for p in products}) == len(products)
+    inv.load_from(inv.current_path())
+    assert sorted((p.id, p.stock) for p in inv.list_products()) == sorted((p.id, p.stock) for p in products)
+
+def test_same_product_adjustments_reach_the_journal_in_order(monkeypatch):
+    import threading
+    import time
+    from inventory.journal import Journal, journal_path, read_records
+    pid = inv.create_product(name="Shared", sku="SHR-0001", stock=0)
+    inv.enable_journal(checkpoint_bytes=0)
+    real_append = Journal.append
+    first = threading.Event()
+
+    def slow_first_append(self, rec):
+        # Stall the first writer so the second one catches up with it
+        if not first.is_set():
+            first.set()
+            time.sleep(0.05)
+        real_append(self, rec)
+    monkeypatch.setattr(Journal, "append", slow_first_append)
+    try:
+        threads = [threading.Thread(target=inv.adjust_stock, args=(pid, 1)) for _ in range(2)]
+        threads[0].start()
+        first.wait()
+        threads[1].start()
+        for t in threads:
+            t.join()
+        inv.flush_journal()
+        assert [r["stock"] for r in read_records(journal_path(inv.current_path()))] == [1, 2]
+    finally:
+        inv.disable_journal()
+
+def test_server_batches_concurrent_adjustments(monkeypatch):
+    import asyncio
+    import json
+    from inventory.server import InventoryServer
+    saves = []
+    failing = []
+    from inventory.storage import CsvBackend
+    real_write = CsvBackend.save_all
+
+    def save_all(self, rows):
+        if failing:
+            raise OSError("disk full")
+        saves.append(1)
+        real_write(self, rows)
+    monkeypatch.setattr(CsvBackend, "save_all", save_all)
+
+    async def call(port, method, path, payload=None):
+        reader, writer = await asyncio.open_connection("127.0.0.1", port)
+        body = b"" if payload is None else json.dumps(payload).encode()
+        writer.write(f"{method} {path} HTTP/1.1\r\nConnection: close\r\nContent-Length: {len(body)}\r\n\r\n".encode() + body)
+        raw = await reader.read()
+        writer.close()
+        head, _, data = raw.partition(b"\r\n\r\n")
+        return int(head.split()[1]), json.loads(data) if data else None
+
+    async def scenario():
+        server = InventoryServer()
+        await server.start("127.0.0.1", 0)
+        port = server.port
+        try:
+            status, created = await call(port, "POST", "/products", {"name": "Served", "sku": "SRV-0001", "stock": 10})
+            assert status == 201
+            pid = created["id"]
+            saves.clear()
+            results = await asyncio.gather(*(call(port, "POST", f"/products/{pid}/adjust", {"delta": 1}) for _ in range(30)))
+            assert all(s == 200 for s, _ in results)
+            assert len(saves) < 30 and server.batcher.batches < 30
+            assert (await call(port, "POST", f"/products/{pid}/adjust", {"delta": -100}))[0] == 409
+            assert (await call(port, "GET", f"/products/{pid}"))[1]["stock"] == 40
+            # Applied but not saved: reported as such, not as an error to retry
+            failing.append(1)
+            status, body = await call(port, "POST", f"/products/{pid}/adjust", {"delta": 2})
+            failing.clear()
+            assert status == 200 and (body["stock"], body["saved"]) == (42, False) and "disk full" in body["error"]
+            assert (await call(port, "GET", f"/products/{pid}"))[1]["stock"] == 42
+            assert (await call(port, "GET", "/products/999"))[0] == 404
+            assert (await call(port, "GET", "/search?q=served"))[1]["products"][0]["id"] == pid
+            assert (await call(port, "DELETE", f"/products/{pid}"))[0] == 204
+        finally:
+            await server.close()
+
+    asyncio.run(scenario())
+
+def test_benchmark_catalog_is_deterministic_and_flags_regressions(tmp_path):
+    from benchmarks.catalog import write_catalog
+    from benchmarks.run_benchmarks import compare
+    a = write_catalog(str(tmp_path / "a.csv"), 500)
+    b = write_catalog(str(tmp_path / "b.csv"), 500)
+    assert open(a, "rb").read() == open(b, "rb").read()
+    inv.load_from(a)
+    assert inv.product_count() == 500 and len({p.sku for p in inv.list_products()}) == 500
+    base = {"results": {"500": {"load_from": {"median_s": 0.010}, "search": {"median_s": 0.010}}}}
+    current = {"results": {"500": {"load_from": {"median_s": 0.020}, "search": {"median_s": 0.011}}}}
+    assert compare(current, base, tolerance=0.25) == [("500", "load_from", 0.010, 0.020)]
+
+def test_metrics_count_calls_and_bytes_when_enabled(tmp_path):
+    import json
+    from inventory import metrics
+    pid = inv.create_product(name="Timed", sku="TIM-0001", stock=5)
+    assert metrics.snapshot() == {}
+    metrics.enable()
+    try:
+        inv.adjust_stock(pid, 1)
+        with pytest.raises(NegativeStockError):
+            inv.adjust_stock(pid, -100)
+        inv.save_to()
+        inv.load_from(inv.current_path())
+        out = tmp_path / "metrics.json"
+        metrics.export_json(str(out))
+    finally:
+        metrics.enable(False)
+        metrics.reset()
+    ops = json.loads(out.read_text())["operations"]
+    assert ops["adjust_stock"]["calls"] == 2 and ops["adjust_stock"]["errors"] == 1
+    size = os.path.getsize(inv.current_path())
+    assert ops["save_to"]["bytes_written"] >= size and ops["load_from"]["bytes_read"] == size
+    assert ops["load_from"]["max_s"] > 0
+
+@pytest.mark.parametrize("vectorized", [True, False])
+def test_valuation_and_reorder_reports(monkeypatch, vectorized):
+    from inventory import analytics
+    if not vectorized:
+        monkeypatch.setattr(analytics, "np", None)
+    elif analytics._numpy() is None:
+        pytest.skip("numpy not installed")
+    else:
+        monkeypatch.setattr(analytics, "_NUMPY_MIN_ROWS", 0)
+    a = inv.create_product(name="Cable", sku="CAB-0001", price=2.5, stock=10, reorder_level=4, supplier="Acme")
+    b = inv.create_product(name="Bolt", sku="BOL-0001", price=0.1, stock=3, reorder_level=5, supplier="Acme")
+    c = inv.create_product(name="Hinge", sku="HIN-0001", price=4.0, stock=0, reorder_level=0)
+    report = inv.valuation_report()
+    assert (report.products, report.units, report.value, report.low_stock, report.zero_stock) == (3, 13, 25.3, 2, 1)
+    acme, none = report.by_supplier
+    assert (acme.supplier, acme.products, acme.units, acme.value, acme.low_stock) == ("Acme", 2, 13, 25.3, 1)
+    assert none.supplier is None and none.low_stock == 1
+    assert [(r.id, r.suggested) for r in inv.reorder_report()] == [(b, 7), (c, 1)]
+    # Stock changes patch the cached columns instead of rebuilding them
+    cols = inv._columns
+    inv.adjust_stock(a, -10)
+    inv.update_product(b, supplier="Globex")
+    assert inv._columns is cols
+    assert [(r.id, r.suggested) for r in inv.reorder_report(limit=1)] == [(a, 8)]
+    assert [r.supplier for r in inv.valuation_report().by_supplier] == ["Globex", None, "Acme"]
+    inv.delete_product(c)
+    assert inv.valuation_report().products == 2 and inv._columns is not cols
+    # A report taken inside a transaction that rolls back is not kept
+    with pytest.raises(NegativeStockError):
+        with inv.transaction():
+            inv.adjust_stock(a, +100)
+            assert inv.valuation_report().units == 103
+            inv.adjust_stock(b, -100)
+    assert inv.valuation_report().units == 3
+    assert [r.id for r in inv.reorder_report()] == [a, b]
+
+def test_sqlite_backend_row_writes_and_migration(tmp_path):
+    from inventory import storage
+    from inventory.sqlite_backend import SqliteBackend
+    a = inv.create_product(name="Cable", sku="CAB-0001", stock=10, reorder_level=2)
+    b = inv.create_product(name="Bolt", sku="BOL-0001", stock=1, reorder_level=5, supplier="Acme")
+    db = str(tmp_path / "products.db")
+    assert storage.migrate(inv.current_path(), db) == 2
+    inv.load_from(db)
+    assert inv.current_path() == db and [p.id for p in inv.list_products()] == [b, a]
+    inv.adjust_stock(a, -9)
+    with inv.transaction():
+        inv.update_product(b, name="Anchor Bolt")
+        c = inv.create_product(name="Hinge", sku="HIN-0001", stock=0)
+    inv.delete_product(a)
+    assert not os.path.exists(db[:-3] + ".csv")
+    direct = SqliteBackend(db)
+    try:
+        ids, names, _, _, stocks = direct.load()[:5]
+        assert sorted(zip(ids, names, stocks)) == [(b, "Anchor Bolt", 1), (c, "Hinge", 0)]
+        assert direct._connect().execute("PRAGMA journal_mode").fetchone()[0] == "wal"
+        assert direct._connect().execute("SELECT name FROM sqlite_master WHERE type = 'index' AND sql IS NOT NULL").fetchall() == []
+    finally:
+        direct.close()
+    inv.load_from(db)
+    assert [(p.id, p.stock) for p in inv.list_low_stock(offset=1, limit=1)] == [(c, 0)]
+    back = str(tmp_path / "back.csv")
+    assert storage.migrate(db, back) == 2
+    # A backend missing part of the interface fails when created, not on first use
+    with pytest.raises(TypeError):
+        type("HalfBackend", (storage.StorageBackend,), {"load": lambda self: None})(back)
+    inv.load_from(back)
+    assert [p.name for p in inv.list_products(limit=1)] == ["Anchor Bolt"]
+
+def test_watch_merges_external_edits_and_flags_conflicts():
+    import csv
+    from inventory.errors import ExternalEditConflict
+    a = inv.create_product(name="Cable", sku="CAB-0001", stock=10)
+    b = inv.create_product(name="Bolt", sku="BOL-0001", stock=5)
+    c = inv.create_product(name="Nut", sku="NUT-0001", stock=7)
+    path = inv.current_path()
+
+    def edit_file(edit, stamp):
+        with open(path, newline="", encoding="utf-8") as f:
+            rows = list(csv.reader(f))
+        header, by_id = rows[0], {row[0]: row for row in rows[1:]}
+        extra = edit(by_id) or []
+        with open(path, "w", newline="", encoding="utf-8") as f:
+            csv.writer(f).writerows([header, *by_id.values(), *extra])
+        os.utime(path, ns=(stamp, stamp))
+
+    inv.enable_watch(0)
+    inv.enable_autosave(60)
+    events = []
+    inv.add_change_listener(lambda kind, pid: events.append((kind, pid)))
+    try:
+        assert inv.check_external_changes() is None
+
+        def first(by_id):
+            by_id[str(a)][4] = "99"
+            del by_id[str(c)]
+            return [["", "Washer", "WAS-0001", "0.10", "3", "0", ""]]
+        edit_file(first, 1)
+        result = inv.check_external_changes()
+        assert (result.created, result.updated, result.deleted, result.conflicts) == (1, 1, 1, [])
+        assert inv.get_product(a).stock == 99 and inv.get_product(c) is None
+        assert ("update", a) in events and ("delete", c) in events
+        assert [p.name for p in inv.list_products()] == ["Bolt", "Cable", "Washer"]
+
+        # Changed here (not saved yet) and on disk: neither side wins silently
+        inv.update_product(b, name="Anchor Bolt")
+
+        def second(by_id):
+            by_id[str(b)][1] = "Hex Bolt"
+        edit_file(second, 2)
+        result = inv.check_external_changes()
+        assert [(x.id, x.local.name, x.disk.name) for x in result.conflicts] == [(b, "Anchor Bolt", "Hex Bolt")]
+        assert ("conflict", b) in events and inv.get_product(b).name == "Anchor Bolt"
+        with pytest.raises(ExternalEditConflict):
+            inv.save_to()
+        inv.resolve_conflicts(keep_local=False)
+        assert inv.get_product(b).name == "Hex Bolt" and not inv.conflicts()
+        inv.flush_autosave()
+        inv.load_from(path)
+        assert sorted((p.name, p.stock) for p in inv.list_products()) == [("Cable", 99), ("Hex Bolt", 5), ("Washer", 3)]
+
+        # A blanked id cell still matches the product by SKU; it is not deleted
+        def third(by_id):
+            row = by_id.pop(str(a))
+            row[0], row[4] = "", "50"
+            return [row]
+        edit_file(third, 3)
+        result = inv.check_external_changes()
+        assert (result.created, result.updated, result.deleted) == (0, 1, 0)
+        assert inv.get_product(a).stock == 50
+        inv.flush_autosave()
+        inv.load_from(path)
+        assert inv.get_product(a).stock == 50 and len(inv.list_products()) == 3
+    finally:
+        inv.disable_autosave()
+        inv.disable_watch()
+
+def test_stock_ledger_history_and_as_of():
+    import time
+    a = inv.create_product(name="Cable", sku="CAB-0001", stock=10)
+    time.sleep(0.01)
+    inv.adjust_stock(a, -3, reason="sale")
+    time.sleep(0.01)
+    with inv.transaction():
+        inv.adjust_stock(a, +5, reason="restock")
+    with pytest.raises(RuntimeError):
+        with inv.transaction():
+            inv.adjust_stock(a, -1)
+            raise RuntimeError("rolled back")
+    # Reasons that don't fit a ledger record are refused, not truncated
+    for reason in ("x" * 13, "réassort"):
+        with pytest.raises(ValueError):
+            inv.adjust_stock(a, +1, reason=reason)
+        with pytest.raises(ValueError):
+            inv.adjust_stock_bulk([("CAB-0001", 1)], reason=reason)
+    assert inv.get_product(a).stock == 12
+    history = inv.stock_history(a)
+    assert [(m.delta, m.stock, m.reason) for m in history] == [(10, 10, "create"), (-3, 7, "sale"), (5, 12, "restock")]
+    t0, t1, t2 = (m.at for m in history)
+    assert t0 < t1 < t2
+    assert inv.stock_as_of(a, t0 - 1) == 0 and inv.stock_as_of(a, t1) == 7 and inv.stock_as_of(a, t2 + 1) == 12
+    assert [m.reason for m in inv.stock_history(a, since=t1, until=t1)] == ["sale"]
+    # Survives a reload, and movements after it land in the same index
+    inv.load_from(inv.current_path())
+    inv.delete_product(a)
+    assert [(m.stock, m.reason) for m in inv.stock_history(a)][-2:] == [(12, "restock"), (0, "delete")]
+    assert inv.stock_as_of(a, t2) == 12 and inv.stock_as_of(999, t2) is None
+    # A is gone and was the highest id; its id is not handed out again, even after a restart
+    inv.load_from(inv.current_path())
+    b = inv.create_product(name="Bolt", sku="BOL-0001", stock=1)
+    assert b > a
+    assert [m.reason for m in inv.stock_history(b)] == ["create"] and inv.stock_as_of(b, t2) == 0
+
+def test_streaming_export_formats_and_filters(tmp_path):
+    import gzip
+    import json
+    from inventory.export import read_binary
+    inv.create_product(name="Cable", sku="CAB-0001", price=2.5, stock=10, reorder_level=2, supplier="WireWorks")
+    inv.create_product(name="Bolt", sku="BOL-0001", stock=1, reorder_level=5, supplier="Acme")
+    inv.create_product(name="Anchor", sku="BOL-0002", stock=0, reorder_level=1, supplier="acme")
+    current = inv.current_path()
+
+    out = str(tmp_path / "all.csv")
+    assert inv.export_csv(out) == 3 and inv.current_path() == current
+    inv.load_from(out)
+    assert [p.name for p in inv.list_products()] == ["Anchor", "Bolt", "Cable"]
+    inv.load_from(current)
+
+    out = str(tmp_path / "low.jsonl.gz")
+    assert inv.export_products(out, low_only=True, supplier="ACME") == 2
+    with gzip.open(out, "rt", encoding="utf-8") as f:
+        assert [json.loads(line)["sku"] for line in f] == ["BOL-0002", "BOL-0001"]
+
+    out = str(tmp_path / "bolts.bin")
+    assert inv.export_products(out, sku_prefix="bol-", sort=False) == 2
+    assert sorted((p.name, p.stock, p.supplier) for p in read_binary(out)) == [("Anchor", 0, "acme"), ("Bolt", 1, "Acme")]
+    # Chunked iteration picks up where it left off even when rows move underneath
+    it = inv.iter_products(chunk_size=1)
+    assert next(it).name == "Anchor"
+    inv.create_product(name="Aardvark", sku="AAR-0001")
+    assert [p.name for p in it] == ["Bolt", "Cable"]
+
+def test_cli_bulk_adjust_reports_bad_lines_and_saves_once(tmp_path, capsys, monkeypatch):
+    from inventory.__main__ import main
+    a = inv.create_product(name="Cable", sku="CAB-0001", stock=5, reorder_level=2)
+    b = inv.create_product(name="Bolt", sku="BOL-0001", stock=1, reorder_level=3)
+    path = inv.current_path()
+    moves = tmp_path / "moves.csv"
+    moves.write_text("sku,delta\nCAB-0001,-4\ncab-0001,+10\n\nNOPE-0001,1\nBOL-0001,x\nBOL-0001,-2\nBOL-0001,4\n")
+    saves = []
+    real_save = inv.save_to
+    monkeypatch.setattr(inv, "save_to", lambda *args: saves.append(args) or real_save(*args))
+
+    assert main(["--file", path, "adjust-bulk", "--strict", str(moves)]) == 1
+    assert inv.get_product(a).stock == 5 and not saves
+    assert main(["--file", path, "adjust-bulk", str(moves)]) == 1
+    out, err = capsys.readouterr()
+    assert "Applied 3 adjustments to 2 products, rejected 3" in out
+    assert err.splitlines()[-3:] == ["line 5: Unknown SKU 'NOPE-0001'", "line 6: Invalid delta 'x'",
+                                     "line 7: Stock of BOL-0001 cannot go below zero"]
+    assert len(saves) == 1
+    inv.load_from(path)
+    assert (inv.get_product(a).stock, inv.get_product(b).stock) == (11, 5)
+    assert [m.reason for m in inv.stock_history(a)] == ["create", "bulk", "bulk"]
+
+    assert main(["--file", path, "stats"]) == 0
+    assert "Units:       16" in capsys.readouterr().out
+    inv.adjust_stock(b, -4)
+    assert main(["--file", path, "low-stock"]) == 0
+    assert capsys.readouterr().out.splitlines()[1:] == [f"{b},Bolt,BOL-0001,0.00,1,3,"]
+
+def test_cli_file_that_does_not_exist_yet_is_created(tmp_path, monkeypatch):
+    from inventory.__main__ import main
+    monkeypatch.chdir(tmp_path)
+    feed = tmp_path / "feed.csv"
+    feed.write_text("name,sku,stock\nCable,CAB-0001,5\n")
+    target = tmp_path / "data" / "new.csv"
+    assert main(["--file", str(target), "import", str(feed)]) == 0
+    assert inv.current_path() == str(target)
+    assert target.exists() and os.path.exists(str(target) + ".ledger")
+    assert not (tmp_path / "products.csv").exists()
@@ -1,12 +1,33 @@
+import threading
+import time
 import tkinter as tk
+from collections import deque
 from tkinter import ttk, messagebox, filedialog
 from inventory import inventory as inv
-from ui.dialogs import AddEditProductDialog, AdjustStockDialog
+from inventory import metrics
+from ui.dialogs import AddEditProductDialog, AdjustStockDialog, DiagnosticsDialog, ExportDialog, ImportProgressDialog, ReportsDialog, StockHistoryDialog
+from ui.virtual_table import VirtualTable
+
+# Above this many queued changes a full rebuild is cheaper than patching rows
+_MAX_INCREMENTAL_CHANGES = 500
+# Catalogs bigger than this are shown through the paged VirtualTable
+_VIRTUAL_THRESHOLD = 2000
 
 class InventoryApp:
     def __init__(self):
         self.root = tk.Tk()
         self.root.title("Simple Inventory")
+        self.low_only = False
+        self.query = ""
+        self._search_after = None
+        # Rows of the active filter (low stock and/or search); None = everything
+        self._filtered_rows = None
+        self._pending_changes: dict = {}
+        # Events from other threads wait here until the Tk thread drains them
+        self._foreign_changes = deque()
+        self._pending_reload = False
+        self._flush_scheduled = False
+        self._conflict_prompt = False
 
         self._build_menu()
         self._build_toolbar()
@@ -14,9 +35,15 @@ class InventoryApp:
         self._build_status()
 
         self.refresh_table()
+        inv.add_change_listener(self._on_inventory_change)
+        self.root.protocol("WM_DELETE_WINDOW", self.on_exit)
+        self._poll_save_status()
 
     def run(self):
-        self.root.mainloop()
+        try:
+            self.root.mainloop()
+        finally:
+            inv.remove_change_listener(self._on_inventory_change)
 
     def _build_menu(self):
         menubar = tk.Menu(self.root)
@@ -26,10 +53,14 @@ class InventoryApp:
         filemenu.add_command(label="Save As...", command=self.on_save_as)
         filemenu.add_separator()
         filemenu.add_command(label="Import CSV (merge)...", command=self.on_import_csv)
-        filemenu.add_command(label="Export CSV...", command=self.on_export_csv)
+        filemenu.add_command(label="Export...", command=self.on_export)
         filemenu.add_separator()
-        filemenu.add_command(label="Exit", command=self.root.quit)
+        filemenu.add_command(label="Exit", command=self.on_exit)
         menubar.add_cascade(label="File", menu=filemenu)
+        viewmenu = tk.Menu(menubar, tearoff=0)
+        viewmenu.add_command(label="Reports...", command=self.on_reports)
+        viewmenu.add_command(label="Diagnostics...", command=self.on_diagnostics)
+        menubar.add_cascade(label="View", menu=viewmenu)
         self.root.config(menu=menubar)
 
     def _build_toolbar(self):
@@ -39,8 +70,15 @@ class InventoryApp:
         ttk.Button(bar, text="Add", command=self.on_add).pack(side="left", padx=4)
         ttk.Button(bar, text="Edit", command=self.on_edit).pack(side="left", padx=4)
         ttk.Button(bar, text="Adjust Stock", command=self.on_adjust).pack(side="left", padx=4)
+        ttk.Button(bar, text="History", command=self.on_history).pack(side="left", padx=4)
         ttk.Button(bar, text="Delete", command=self.on_delete).pack(side="left", padx=4)
 
+        self.search_var = tk.StringVar()
+        self.search_var.trace_add("write", lambda *a: self.on_search_typed())
+        self.search_entry = ttk.Entry(bar, textvariable=self.search_var, width=24)
+        self.search_entry.pack(side="right", padx=(4,12))
+        ttk.Label(bar, text="Search:").pack(side="right")
+
         self.btn_show_low = ttk.Button(bar, text="Show Low Stock", command=self.on_show_low)
         self.btn_show_low.pack(side="left", padx=12)
 
@@ -49,7 +87,11 @@ class InventoryApp:
 
     def _build_table(self):
         columns = ("name", "sku", "supplier", "price", "stock", "reorder")
-        self.tree = ttk.Treeview(self.root, columns=columns, show="headings", height=16)
+        frame = ttk.Frame(self.root)
+        frame.pack(side="top", fill="both", expand=True, padx=8, pady=(0,8))
+        self.tree = ttk.Treeview(frame, columns=columns, show="headings", height=16)
+        self.scrollbar = ttk.Scrollbar(frame, orient="vertical", command=self.tree.yview)
+        self.tree.config(yscrollcommand=self.scrollbar.set)
         self.tree.heading("name", text="Name")
         self.tree.heading("sku", text="SKU")
         self.tree.heading("supplier", text="Supplier")
@@ -67,33 +109,176 @@ class InventoryApp:
         self.tree.tag_configure("low", background="#fff3cd")
         self.tree.tag_configure("verylow", background="#f8d7da")
 
-        self.tree.pack(side="top", fill="both", expand=True, padx=8, pady=(0,8))
+        self.scrollbar.pack(side="right", fill="y")
+        self.tree.pack(side="left", fill="both", expand=True)
         self.tree.bind("<Double-1>", lambda e: self.on_edit())
+        self.vtable = VirtualTable(
+            self.tree,
+            self.scrollbar,
+            fetch=self._fetch_rows,
+            count=self._row_count,
+            row=lambda p: (self._row_values(p), self._row_tags(p)),
+        )
 
     def _build_status(self):
         status = ttk.Frame(self.root, padding=8)
         status.pack(side="bottom", fill="x")
         self.low_label = ttk.Label(status, text="Low stock: 0", foreground="#b26b00")
         self.low_label.pack(side="left")
+        self.save_label = ttk.Label(status, text="")
+        self.save_label.pack(side="right")
+
+    def _poll_save_status(self):
+        # The autosave thread can't touch Tk, so the status bar polls it
+        st = inv.save_status()
+        if st.state == "error":
+            self.save_label.config(text=f"Save failed: {st.error}", foreground="#b00020")
+        elif st.state in ("pending", "saving"):
+            self.save_label.config(text="Saving...", foreground="")
+        elif st.last_saved:
+            self.save_label.config(text=f"Saved {time.strftime('%H:%M:%S', time.localtime(st.last_saved))}", foreground="")
+        while self._foreign_changes:
+            self._on_inventory_change(*self._foreign_changes.popleft())
+        self.root.after(500, self._poll_save_status)
+
+    @staticmethod
+    def _row_values(p):
+        return (p.name, p.sku, p.supplier or "-", f"{p.price:.2f}", p.stock, p.reorder_level)
+
+    @staticmethod
+    def _row_tags(p):
+        return ("verylow",) if p.is_low_stock and p.stock == 0 else ("low",) if p.is_low_stock else ()
+
+    def _filtered(self):
+        if self.query:
+            return inv.search(self.query, low_only=self.low_only)
+        if self.low_only:
+            return inv.list_low_stock()
+        return None
 
-    def refresh_table(self, low_only: bool = False):
+    def _fetch_rows(self, offset, limit):
+        if self._filtered_rows is not None:
+            return self._filtered_rows[offset:offset + limit]
+        return inv.list_products(offset, limit)
+
+    def _row_count(self):
+        return len(self._filtered_rows) if self._filtered_rows is not None else inv.product_count()
+
+    @metrics.timed(name="ui.refresh_table")
+    def refresh_table(self, low_only=None):
+        """Full rebuild; only needed on load or when switching filters."""
+        if low_only is not None:
+            self.low_only = low_only
+        self._pending_changes.clear()
+        self._pending_reload = False
+        self._filtered_rows = self._filtered()
+        if inv.product_count() > _VIRTUAL_THRESHOLD:
+            if not self.vtable.active:
+                self.vtable.attach()
+            else:
+                self.vtable.offset = 0
+                self.vtable.invalidate()
+            self._update_status()
+            return
+        if self.vtable.active:
+            self.vtable.detach()
         for row in self.tree.get_children():
             self.tree.delete(row)
-        products = inv.list_low_stock() if low_only else inv.list_products()
-        low_count = len(inv.list_low_stock())
+        products = self._filtered_rows if self._filtered_rows is not None else inv.list_products()
 
         for p in products:
-            tags = ("verylow",) if p.is_low_stock and p.stock == 0 else ("low",) if p.is_low_stock else ()
             self.tree.insert(
                 "",
                 "end",
                 iid=str(p.id),
-                values=(p.name, p.sku, p.supplier or "-", f"{p.price:.2f}", p.stock, p.reorder_level),
-                tags=tags,
+                values=self._row_values(p),
+                tags=self._row_tags(p),
             )
-        self.low_label.config(text=f"Low stock: {low_count}")
+        self._update_status()
+
+    def _update_status(self):
+        self.low_label.config(text=f"Low stock: {inv.low_stock_count()}")
         self.path_label.config(text=f"File: {inv.current_path()}")
 
+    def _on_inventory_change(self, kind, pid):
+        if threading.current_thread() is not threading.main_thread():
+            # Tk isn't thread-safe; _poll_save_status picks these up
+            self._foreign_changes.append((kind, pid))
+            return
+        if kind == "conflict":
+            # Edited here and by another program; ask once for the whole batch
+            if not self._conflict_prompt:
+                self._conflict_prompt = True
+                self.root.after_idle(self._resolve_conflicts)
+            return
+        if kind == "reload":
+            self._pending_reload = True
+        else:
+            self._pending_changes[pid] = kind
+        if not self._flush_scheduled:
+            self._flush_scheduled = True
+            self.root.after_idle(self._apply_changes)
+
+    def _resolve_conflicts(self):
+        self._conflict_prompt = False
+        pending = inv.conflicts()
+        if not pending:
+            return
+        skus = ", ".join(c.sku for c in pending[:5]) + (", ..." if len(pending) > 5 else "")
+        keep = messagebox.askyesno(
+            "Changed on disk",
+            f"{len(pending)} product(s) were also changed in {inv.current_path()} by another program: {skus}\n\n"
+            "Keep your changes? Choose No to use the versions on disk.",
+        )
+        inv.resolve_conflicts(keep_local=keep, ids=[c.id for c in pending])
+
+    @metrics.timed(name="ui.apply_changes")
+    def _apply_changes(self):
+        """Patch only the rows touched since the last flush."""
+        self._flush_scheduled = False
+        if self._pending_reload or self.query or len(self._pending_changes) > _MAX_INCREMENTAL_CHANGES:
+            # Reloads, big batches and searches (cheap to re-run) redraw fully
+            self.refresh_table()
+            return
+        changed = self._pending_changes
+        self._pending_changes = {}
+        if self.vtable.active:
+            # Only the visible window exists as rows, so just redraw it
+            self._filtered_rows = self._filtered()
+            self.vtable.invalidate()
+            self._update_status()
+            return
+
+        # Detach every touched row first so the rows left in the tree are
+        # exactly the untouched ones, already in order; then re-place the
+        # touched rows in ascending target position.
+        placed = []
+        for pid in changed:
+            iid = str(pid)
+            exists = self.tree.exists(iid)
+            p = inv.get_product(pid)
+            if p is None or (self.low_only and not p.is_low_stock):
+                if exists:
+                    self.tree.delete(iid)
+                continue
+            if exists:
+                self.tree.detach(iid)
+            placed.append(p)
+
+        if self.low_only:
+            order = {q.id: i for i, q in enumerate(inv.list_low_stock())}
+            position = lambda p: order[p.id]
+        else:
+            position = lambda p: inv.product_position(p.id)
+        for p in sorted(placed, key=position):
+            iid = str(p.id)
+            if self.tree.exists(iid):
+                self.tree.item(iid, values=self._row_values(p), tags=self._row_tags(p))
+                self.tree.move(iid, "", position(p))
+            else:
+                self.tree.insert("", position(p), iid=iid, values=self._row_values(p), tags=self._row_tags(p))
+        self._update_status()
+
     def get_selected_product_id(self):
         sel = self.tree.selection()
         if not sel:
@@ -106,8 +291,6 @@ class InventoryApp:
     def on_add(self):
         dlg = AddEditProductDialog(self.root, "Add Product", product_id=None)
         self.root.wait_window(dlg)
-        if dlg.result_ok:
-            self.refresh_table()
 
     def on_edit(self):
         pid = self.get_selected_product_id()
@@ -116,8 +299,6 @@ class InventoryApp:
             return
         dlg = AddEditProductDialog(self.root, "Edit Product", product_id=pid)
         self.root.wait_window(dlg)
-        if dlg.result_ok:
-            self.refresh_table()
 
     def on_adjust(self):
         pid = self.get_selected_product_id()
@@ -130,8 +311,6 @@ class InventoryApp:
             return
         dlg = AdjustStockDialog(self.root, product_id=pid, product_name=p.name)
         self.root.wait_window(dlg)
-        if dlg.result_ok:
-            self.refresh_table()
 
     def on_delete(self):
         pid = self.get_selected_product_id()
@@ -144,7 +323,6 @@ class InventoryApp:
             return
         if messagebox.askyesno("Delete", f'Delete "{p.name}"?'):
             inv.delete_product(pid)
-            self.refresh_table()
 
     def on_show_low(self):
         if self.btn_show_low.cget("text") == "Show Low Stock":
@@ -154,6 +332,27 @@ class InventoryApp:
             self.refresh_table(low_only=False)
             self.btn_show_low.config(text="Show Low Stock")
 
+    def on_exit(self):
+        try:
+            inv.flush_autosave()
+        except Exception as e:
+            if not messagebox.askyesno("Save failed", f"{e}\n\nExit without saving?"):
+                return
+        self.root.quit()
+
+    def on_search_typed(self):
+        # Debounce: only search once typing pauses
+        if self._search_after is not None:
+            self.root.after_cancel(self._search_after)
+        self._search_after = self.root.after(200, self._apply_search)
+
+    def _apply_search(self):
+        self._search_after = None
+        query = self.search_var.get().strip()
+        if query != self.query:
+            self.query = query
+            self.refresh_table()
+
     def on_save(self):
         try:
             inv.save_to()
@@ -166,10 +365,10 @@ class InventoryApp:
         if not path:
             return
         try:
-            inv.export_csv(path)
-            inv.set_current_path(path)
+            # Unlike exports, Save As makes path the working file
+            inv.save_to(path)
             messagebox.showinfo("Saved", f"Saved to {path}")
-            self.refresh_table()
+            self._update_status()
         except Exception as e:
             messagebox.showerror("Save failed", str(e))
 
@@ -179,24 +378,48 @@ class InventoryApp:
             return
         try:
             inv.load_from(path)
-            self.refresh_table()
         except Exception as e:
             messagebox.showerror("Open failed", str(e))
 
-    def on_export_csv(self):
-        path = filedialog.asksaveasfilename(defaultextension=".csv", filetypes=[("CSV files", "*.csv")], title="Export CSV")
-        if not path:
+    def on_export(self):
+        dlg = ExportDialog(self.root)
+        self.root.wait_window(dlg)
+        if dlg.count is not None:
+            messagebox.showinfo("Export complete", f"Exported {dlg.count} products to {dlg.path}")
+
+    def on_history(self):
+        pid = self.get_selected_product_id()
+        if pid is None:
+            messagebox.showinfo("Select a product", "Please select a product to show its stock history.")
             return
-        try:
-            inv.export_csv(path)
-            messagebox.showinfo("Export complete", f"Exported to {path}")
-        except Exception as e:
-            messagebox.showerror("Export failed", str(e))
+        p = inv.get_product(pid)
+        if not p:
+            messagebox.showerror("Error", "Product not found")
+            return
+        StockHistoryDialog(self.root, product_id=pid, product_name=p.name)
+
+    def on_reports(self):
+        ReportsDialog(self.root)
+
+    def on_diagnostics(self):
+        DiagnosticsDialog(self.root)
 
     def on_import_csv(self):
         path = filedialog.askopenfilename(filetypes=[("CSV files", "*.csv")], title="Import CSV (merge)")
         if not path:
             return
-        count = inv.import_csv(path)
-        messagebox.showinfo("Import complete", f"Imported {count} rows")
-        self.refresh_table()
\ No newline at end of file
+        dlg = ImportProgressDialog(self.root, path)
+        self.root.wait_window(dlg)
+        if dlg.cancelled:
+            applied = dlg.result.applied if dlg.result is not None else 0
+            messagebox.showinfo("Import cancelled", f"Stopped after {applied} rows; those changes were kept.")
+            return
+        if dlg.error is not None:
+            messagebox.showerror("Import failed", str(dlg.error))
+            return
+        r = dlg.result
+        msg = f"Imported {r.applied} rows ({r.created} new, {r.updated} updated) in {r.elapsed:.1f}s"
+        if r.rejected:
+            details = "\n".join(f"line {line}: {reason}" for line, reason in r.errors[:10])
+            msg += f"\n\nRejected {r.rejected} rows:\n{details}"
+        messagebox.showinfo("Import complete", msg)
\ No newline at end of file
@@ -1,5 +1,7 @@
+import os
+import time
 import tkinter as tk
-from tkinter import simpledialog, messagebox
+from tkinter import ttk, simpledialog, messagebox, filedialog
 
 class AddEditProductDialog(tk.Toplevel):
 	def __init__(self, parent, title, product_id=None):
@@ -52,8 +54,9 @@ class AddEditProductDialog(tk.Toplevel):
 			reorder_level = int(self.vars["reorder_level"].get())
 			supplier = self.vars["supplier"].get().strip() or None
 			if self.product_id:
-				inv.update_product(self.product_id, name=name, sku=sku, price=price, reorder_level=reorder_level, supplier=supplier)
-				inv.adjust_stock(self.product_id, stock - inv.get_product(self.product_id).stock)
+				with inv.transaction():
+					inv.update_product(self.product_id, name=name, sku=sku, price=price, reorder_level=reorder_level, supplier=supplier)
+					inv.adjust_stock(self.product_id, stock - inv.get_product(self.product_id).stock, reason="edit")
 			else:
 				inv.create_product(name, sku, price, stock, reorder_level, supplier)
 			self.result_ok = True
@@ -62,6 +65,7 @@ class AddEditProductDialog(tk.Toplevel):
 			messagebox.showerror("Error", str(e))
 
 from inventory import inventory as inv
+from inventory import metrics
 
 class AdjustStockDialog(tk.Toplevel):
 	def __init__(self, parent, product_id, product_name):
@@ -97,3 +101,311 @@ class AdjustStockDialog(tk.Toplevel):
 			self.destroy()
 		except Exception as e:
 			messagebox.showerror("Error", str(e))
+
+class ImportProgressDialog(tk.Toplevel):
+	"""Drives inv.iter_import_csv one chunk per Tk tick so the UI stays live."""
+
+	def __init__(self, parent, path):
+		super().__init__(parent)
+		self.title("Importing...")
+		self.result = None
+		self.error = None
+		self.cancelled = False
+		self.transient(parent)
+		self.grab_set()
+		try:
+			self._total = max(os.path.getsize(path), 1)
+		except OSError:
+			self._total = 1
+		self._steps = inv.iter_import_csv(path)
+		self._build_ui(path)
+		self.protocol("WM_DELETE_WINDOW", self.on_cancel)
+		self.after(1, self._step)
+
+	def _build_ui(self, path):
+		tk.Label(self, text=f"Importing {os.path.basename(path)}").pack(padx=12, pady=(12,4))
+		self.bar = ttk.Progressbar(self, length=300, maximum=self._total)
+		self.bar.pack(padx=12, pady=4)
+		self.status_var = tk.StringVar(value="Starting...")
+		tk.Label(self, textvariable=self.status_var).pack(padx=12, pady=4)
+		tk.Button(self, text="Cancel", width=10, command=self.on_cancel).pack(pady=8)
+
+	def _step(self):
+		try:
+			self.result = next(self._steps)
+		except StopIteration:
+			self.destroy()
+			return
+		except Exception as e:
+			self.error = e
+			self.destroy()
+			return
+		r = self.result
+		self.bar["value"] = r.bytes_read
+		self.status_var.set(f"{r.rows_read} rows read, {r.applied} applied, {r.rejected} rejected")
+		self.after(1, self._step)
+
+	def on_cancel(self):
+		# Closing the generator stops the import; chunks already merged stay
+		self.cancelled = True
+		self._steps.close()
+		self.destroy()
+
+class DiagnosticsDialog(tk.Toplevel):
+	"""Per-operation timings and I/O counters from inventory.metrics."""
+
+	_COLUMNS = (
+		("op", "Operation", 170, "w"),
+		("calls", "Calls", 70, "e"),
+		("total", "Total ms", 90, "e"),
+		("mean", "Mean ms", 80, "e"),
+		("max", "Max ms", 80, "e"),
+		("read", "Read KB", 80, "e"),
+		("written", "Written KB", 90, "e"),
+		("errors", "Errors", 60, "e"),
+	)
+
+	def __init__(self, parent):
+		super().__init__(parent)
+		self.title("Diagnostics")
+		self.transient(parent)
+		self._build_ui()
+		self.refresh()
+
+	def _build_ui(self):
+		self.enabled_var = tk.BooleanVar(value=metrics.enabled())
+		tk.Checkbutton(self, text="Collect timings (INVENTORY_METRICS=1 turns this on at startup)",
+			variable=self.enabled_var, command=self.on_toggle).pack(anchor="w", padx=12, pady=(12,4))
+		self.tree = ttk.Treeview(self, columns=[c[0] for c in self._COLUMNS], show="headings", height=14)
+		for key, text, width, anchor in self._COLUMNS:
+			self.tree.heading(key, text=text)
+			self.tree.column(key, width=width, anchor=anchor)
+		self.tree.pack(fill="both", expand=True, padx=12, pady=4)
+
+		btn_frame = tk.Frame(self)
+		btn_frame.pack(pady=8)
+		tk.Button(btn_frame, text="Refresh", width=10, command=self.refresh).pack(side="left", padx=6)
+		tk.Button(btn_frame, text="Reset", width=10, command=self.on_reset).pack(side="left", padx=6)
+		tk.Button(btn_frame, text="Export JSON...", width=12, command=self.on_export).pack(side="left", padx=6)
+		tk.Button(btn_frame, text="Close", width=10, command=self.destroy).pack(side="left", padx=6)
+
+	def refresh(self):
+		self.tree.delete(*self.tree.get_children())
+		for op, st in metrics.snapshot().items():
+			self.tree.insert("", "end", values=(
+				op,
+				st["calls"],
+				f"{st['total_s'] * 1000:.1f}",
+				f"{st['mean_s'] * 1000:.3f}",
+				f"{st['max_s'] * 1000:.1f}",
+				f"{st['bytes_read'] / 1024:.0f}",
+				f"{st['bytes_written'] / 1024:.0f}",
+				st["errors"],
+			))
+
+	def on_toggle(self):
+		metrics.enable(self.enabled_var.get())
+
+	def on_reset(self):
+		metrics.reset()
+		self.refresh()
+
+	def on_export(self):
+		path = filedialog.asksaveasfilename(parent=self, defaultextension=".json", filetypes=[("JSON files", "*.json")], title="Export Diagnostics")
+		if not path:
+			return
+		try:
+			metrics.export_json(path)
+		except Exception as e:
+			messagebox.showerror("Export failed", str(e), parent=self)
+
+class ReportsDialog(tk.Toplevel):
+	"""Stock valuation per supplier and suggested reorder quantities."""
+
+	_REORDER_ROWS = 500
+
+	def __init__(self, parent):
+		super().__init__(parent)
+		self.title("Reports")
+		self.transient(parent)
+		self._build_ui()
+		self.refresh()
+
+	def _tree(self, parent, columns):
+		tree = ttk.Treeview(parent, columns=[c[0] for c in columns], show="headings", height=14)
+		for key, text, width, anchor in columns:
+			tree.heading(key, text=text)
+			tree.column(key, width=width, anchor=anchor)
+		tree.pack(fill="both", expand=True, padx=8, pady=8)
+		return tree
+
+	def _build_ui(self):
+		self.summary_var = tk.StringVar()
+		tk.Label(self, textvariable=self.summary_var, justify="left").pack(anchor="w", padx=12, pady=(12,4))
+		notebook = ttk.Notebook(self)
+		notebook.pack(fill="both", expand=True, padx=12, pady=4)
+
+		tab = ttk.Frame(notebook)
+		notebook.add(tab, text="Valuation by supplier")
+		self.valuation_tree = self._tree(tab, (
+			("supplier", "Supplier", 180, "w"),
+			("products", "Products", 80, "e"),
+			("units", "Units", 90, "e"),
+			("value", "Value", 120, "e"),
+			("low", "Low stock", 80, "e"),
+		))
+
+		tab = ttk.Frame(notebook)
+		notebook.add(tab, text="Reorder suggestions")
+		self.reorder_tree = self._tree(tab, (
+			("name", "Name", 200, "w"),
+			("sku", "SKU", 120, "w"),
+			("supplier", "Supplier", 140, "w"),
+			("stock", "Stock", 70, "e"),
+			("reorder", "Reorder", 70, "e"),
+			("suggested", "Order", 70, "e"),
+			("cost", "Cost", 100, "e"),
+		))
+
+		btn_frame = tk.Frame(self)
+		btn_frame.pack(pady=8)
+		tk.Button(btn_frame, text="Refresh", width=10, command=self.refresh).pack(side="left", padx=6)
+		tk.Button(btn_frame, text="Close", width=10, command=self.destroy).pack(side="left", padx=6)
+
+	def refresh(self):
+		report = inv.valuation_report()
+		lines = inv.reorder_report(limit=self._REORDER_ROWS)
+		self.summary_var.set(
+			f"{report.products} products, {report.units} units, total value {report.value:,.2f}\n"
+			f"{report.low_stock} at or below reorder level ({report.zero_stock} out of stock)"
+		)
+		self.valuation_tree.delete(*self.valuation_tree.get_children())
+		for r in report.by_supplier:
+			self.valuation_tree.insert("", "end", values=(r.supplier or "-", r.products, r.units, f"{r.value:,.2f}", r.low_stock))
+		self.reorder_tree.delete(*self.reorder_tree.get_children())
+		for line in lines:
+			self.reorder_tree.insert("", "end", iid=str(line.id), values=(
+				line.name, line.sku, line.supplier or "-", line.stock, line.reorder_level, line.suggested, f"{line.cost:,.2f}"))
+
+class StockHistoryDialog(tk.Toplevel):
+	"""Recorded stock movements of one product, plus its stock at a given time."""
+
+	_ROWS = 1000
+
+	def __init__(self, parent, product_id, product_name):
+		super().__init__(parent)
+		self.title(f"Stock History - {product_name}")
+		self.product_id = product_id
+		self.transient(parent)
+		self._build_ui()
+		self.refresh()
+
+	def _build_ui(self):
+		self.tree = ttk.Treeview(self, columns=("at", "delta", "stock", "reason"), show="headings", height=16)
+		for key, text, width, anchor in (
+			("at", "When", 160, "w"),
+			("delta", "Change", 80, "e"),
+			("stock", "Stock after", 90, "e"),
+			("reason", "Reason", 110, "w"),
+		):
+			self.tree.heading(key, text=text)
+			self.tree.column(key, width=width, anchor=anchor)
+		self.tree.pack(fill="both", expand=True, padx=12, pady=(12,4))
+
+		frm = tk.Frame(self)
+		frm.pack(fill="x", padx=12, pady=4)
+		tk.Label(frm, text="Stock on (YYYY-MM-DD [HH:MM]):").pack(side="left")
+		self.when_var = tk.StringVar(value=time.strftime("%Y-%m-%d"))
+		tk.Entry(frm, textvariable=self.when_var, width=18).pack(side="left", padx=6)
+		tk.Button(frm, text="Show", command=self.on_as_of).pack(side="left")
+		self.as_of_var = tk.StringVar()
+		tk.Label(frm, textvariable=self.as_of_var).pack(side="left", padx=8)
+
+		btn_frame = tk.Frame(self)
+		btn_frame.pack(pady=8)
+		tk.Button(btn_frame, text="Refresh", width=10, command=self.refresh).pack(side="left", padx=6)
+		tk.Button(btn_frame, text="Close", width=10, command=self.destroy).pack(side="left", padx=6)
+
+	def refresh(self):
+		self.tree.delete(*self.tree.get_children())
+		# Newest first
+		for m in reversed(inv.stock_history(self.product_id)[-self._ROWS:]):
+			when = time.strftime("%Y-%m-%d %H:%M:%S", time.localtime(m.at))
+			self.tree.insert("", "end", values=(when, f"{m.delta:+d}", m.stock, m.reason))
+
+	def on_as_of(self):
+		text = self.when_var.get().strip()
+		try:
+			if " " in text:
+				at = time.mktime(time.strptime(text, "%Y-%m-%d %H:%M")) + 59
+			else:
+				# A bare date means the end of that day
+				at = time.mktime(time.strptime(text, "%Y-%m-%d")) + 86399
+		except ValueError:
+			messagebox.showerror("Invalid date", "Use YYYY-MM-DD or YYYY-MM-DD HH:MM", parent=self)
+			return
+		stock = inv.stock_as_of(self.product_id, at)
+		self.as_of_var.set("unknown" if stock is None else f"{stock} in stock")
+
+class ExportDialog(tk.Toplevel):
+	"""Export products to CSV, JSON Lines or binary, optionally filtered and gzipped."""
+
+	_FORMATS = (("CSV", "csv", ".csv"), ("JSON Lines", "jsonl", ".jsonl"), ("Binary", "bin", ".bin"))
+
+	def __init__(self, parent):
+		super().__init__(parent)
+		self.title("Export")
+		self.count = None
+		self.path = None
+		self.transient(parent)
+		self.grab_set()
+		self._build_ui()
+		self.protocol("WM_DELETE_WINDOW", self.destroy)
+
+	def _build_ui(self):
+		frm = tk.Frame(self, padx=12, pady=12)
+		frm.pack(fill="both", expand=True)
+		self.format_var = tk.StringVar(value=self._FORMATS[0][0])
+		self.path_var = tk.StringVar()
+		self.supplier_var = tk.StringVar()
+		self.prefix_var = tk.StringVar()
+		self.sort_var = tk.BooleanVar(value=True)
+		self.low_var = tk.BooleanVar(value=False)
+		self.gzip_var = tk.BooleanVar(value=False)
+
+		tk.Label(frm, text="Format").grid(row=0, column=0, sticky="w", pady=4)
+		ttk.Combobox(frm, textvariable=self.format_var, values=[f[0] for f in self._FORMATS], state="readonly", width=14).grid(row=0, column=1, sticky="w", pady=4)
+		tk.Label(frm, text="Supplier").grid(row=1, column=0, sticky="w", pady=4)
+		tk.Entry(frm, textvariable=self.supplier_var, width=30).grid(row=1, column=1, sticky="w", pady=4)
+		tk.Label(frm, text="SKU prefix").grid(row=2, column=0, sticky="w", pady=4)
+		tk.Entry(frm, textvariable=self.prefix_var, width=30).grid(row=2, column=1, sticky="w", pady=4)
+		tk.Checkbutton(frm, text="Low stock only", variable=self.low_var).grid(row=3, column=1, sticky="w")
+		tk.Checkbutton(frm, text="Sort by name", variable=self.sort_var).grid(row=4, column=1, sticky="w")
+		tk.Checkbutton(frm, text="Compress (gzip)", variable=self.gzip_var).grid(row=5, column=1, sticky="w")
+
+		btn_frame = tk.Frame(self)
+		btn_frame.pack(pady=8)
+		tk.Button(btn_frame, text="Export...", width=10, command=self.on_ok).pack(side="left", padx=6)
+		tk.Button(btn_frame, text="Cancel", width=10, command=self.destroy).pack(side="left", padx=6)
+
+	def on_ok(self):
+		label, fmt, ext = next(f for f in self._FORMATS if f[0] == self.format_var.get())
+		if self.gzip_var.get():
+			ext += ".gz"
+		path = filedialog.asksaveasfilename(parent=self, defaultextension=ext, filetypes=[(label, "*" + ext)], title="Export")
+		if not path:
+			return
+		try:
+			self.count = inv.export_products(
+				path, fmt,
+				sort=self.sort_var.get(),
+				low_only=self.low_var.get(),
+				supplier=self.supplier_var.get().strip() or None,
+				sku_prefix=self.prefix_var.get().strip() or None,
+				compress=self.gzip_var.get(),
+			)
+		except Exception as e:
+			messagebox.showerror("Export failed", str(e), parent=self)
+			return
+		self.path = path
+		self.destroy()
@@ -0,0 +1,106 @@
+from inventory import metrics
+
+class VirtualTable:
+    """Show a window of a large ordered row source in a ttk.Treeview.
+
+    Only the rows currently on screen (plus a small read-ahead buffer) are
+    materialized as Treeview items; scrolling fetches a new window from
+    fetch(offset, limit). Row iids are product ids so selection keeps working.
+    """
+
+    def __init__(self, tree, scrollbar, fetch, count, row, buffer_rows=20):
+        self.tree = tree
+        self.scrollbar = scrollbar
+        self.fetch = fetch          # (offset, limit) -> list of products
+        self.count = count          # () -> total number of rows
+        self.row = row              # product -> (values, tags)
+        self.buffer_rows = buffer_rows
+        self.offset = 0
+        self.visible_rows = int(tree.cget("height"))
+        self._cache_start = 0
+        self._cache = []
+        self.active = False
+
+    def attach(self):
+        self.active = True
+        self.offset = 0
+        self.scrollbar.config(command=self.on_scrollbar)
+        self.tree.config(yscrollcommand="")
+        self.tree.bind("<MouseWheel>", self._on_wheel)
+        self.tree.bind("<Button-4>", lambda e: self.scroll_by(-3))
+        self.tree.bind("<Button-5>", lambda e: self.scroll_by(3))
+        self.tree.bind("<Prior>", lambda e: self._key_scroll(-self.visible_rows))
+        self.tree.bind("<Next>", lambda e: self._key_scroll(self.visible_rows))
+        self.tree.bind("<Configure>", self._on_resize)
+        self.invalidate()
+
+    def detach(self):
+        self.active = False
+        for seq in ("<MouseWheel>", "<Button-4>", "<Button-5>", "<Prior>", "<Next>", "<Configure>"):
+            self.tree.unbind(seq)
+        self.scrollbar.config(command=self.tree.yview)
+        self.tree.config(yscrollcommand=self.scrollbar.set)
+        self._cache = []
+
+    def invalidate(self):
+        """Drop cached rows and redraw the current window (after data changed)."""
+        self._cache = []
+        self.render()
+
+    def _window(self):
+        total = self.count()
+        self.offset = max(0, min(self.offset, total - self.visible_rows))
+        end = min(self.offset + self.visible_rows, total)
+        cached_end = self._cache_start + len(self._cache)
+        if not self._cache or self.offset < self._cache_start or end > cached_end:
+            self._cache_start = max(0, self.offset - self.buffer_rows)
+            self._cache = self.fetch(self._cache_start, self.visible_rows + 2 * self.buffer_rows)
+        lo = self.offset - self._cache_start
+        return self._cache[lo:lo + self.visible_rows], total
+
+    @metrics.timed(name="ui.render_window")
+    def render(self):
+        if not self.active:
+            return
+        rows, total = self._window()
+        selected = set(self.tree.selection())
+        self.tree.delete(*self.tree.get_children())
+        for p in rows:
+            values, tags = self.row(p)
+            self.tree.insert("", "end", iid=str(p.id), values=values, tags=tags)
+        keep = [iid for iid in selected if self.tree.exists(iid)]
+        if keep:
+            self.tree.selection_set(keep)
+        if total:
+            self.scrollbar.set(self.offset / total, min(1.0, (self.offset + len(rows)) / total))
+        else:
+            self.scrollbar.set(0.0, 1.0)
+
+    def scroll_to(self, offset):
+        self.offset = int(offset)
+        self.render()
+
+    def scroll_by(self, rows):
+        self.scroll_to(self.offset + rows)
+
+    def on_scrollbar(self, action, *args):
+        if action == "moveto":
+            self.scroll_to(float(args[0]) * self.count())
+        elif action == "scroll":
+            amount, unit = int(args[0]), args[1]
+            self.scroll_by(amount * (self.visible_rows if unit == "pages" else 1))
+
+    def _on_wheel(self, event):
+        self.scroll_by(-3 if event.delta > 0 else 3)
+        return "break"
+
+    def _key_scroll(self, rows):
+        self.scroll_by(rows)
+        return "break"
+
+    def _on_resize(self, event):
+        row_height = 20
+        rows = max(1, (event.height - 24) // row_height)
+        if rows != self.visible_rows:
+            self.visible_rows = rows
+            self.render()